@@ -13,6 +13,7 @@ from navsim.planning.training.abstract_feature_target_builder import (
     AbstractTargetBuilder,
 )
 from navsim.common.dataclasses import Scene
+from navsim.evaluate.pdm_result_store import PDMResultStore
 import timm, cv2
 from navsim.common.enums import BoundingBoxIndex, LidarIndex
 from navsim.planning.scenario_builder.navsim_scenario_utils import tracked_object_types
@@ -45,8 +46,15 @@ class WoTETargetBuilder(AbstractTargetBuilder):
 
         self.sim_reward_dict_path = sim_reward_dict_path
         if self.sim_reward_dict_path is not None:
-            self.sim_reward_dict = np.load(self.sim_reward_dict_path, allow_pickle=True).item() 
             self.sim_keys = ['no_at_fault_collisions', 'drivable_area_compliance', 'ego_progress', 'time_to_collision_within_bound', 'comfort']
+            if os.path.isdir(self.sim_reward_dict_path):
+                # columnar result store, memory-mapped and shared between dataloader workers
+                self.sim_reward_store = PDMResultStore(self.sim_reward_dict_path)
+                self.sim_reward_dict = None
+            else:
+                # legacy pickled dictionary of results
+                self.sim_reward_store = None
+                self.sim_reward_dict = np.load(self.sim_reward_dict_path, allow_pickle=True).item()
         
         self.future_idx = config.future_idx if hasattr(config, 'future_idx') else 11
         cluster_file = self._config.cluster_file_path
@@ -79,9 +87,12 @@ class WoTETargetBuilder(AbstractTargetBuilder):
         # obtain sim scores
         if self.sim_reward_dict_path is not None:
             token = scene.frames[index].token
-            sim_reward_dict_single = self.sim_reward_dict[token]['trajectory_scores'][0]
-            # dict_keys(['no_at_fault_collisions', 'drivable_area_compliance', 'driving_direction_compliance', 'ego_progress', 'time_to_collision_within_bound', 'comfort', 'score'])
-            combined_sim_reward = np.vstack([sim_reward_dict_single[key] for key in self.sim_keys])
+            if self.sim_reward_store is not None:
+                combined_sim_reward = self.sim_reward_store.get(token, self.sim_keys).T
+            else:
+                sim_reward_dict_single = self.sim_reward_dict[token]['trajectory_scores'][0]
+                # dict_keys(['no_at_fault_collisions', 'drivable_area_compliance', 'driving_direction_compliance', 'ego_progress', 'time_to_collision_within_bound', 'comfort', 'score'])
+                combined_sim_reward = np.vstack([sim_reward_dict_single[key] for key in self.sim_keys])
             combined_sim_reward_tensor = torch.tensor(combined_sim_reward, dtype=torch.float32)
             sim_reward_list.append(combined_sim_reward_tensor)
 
@@ -171,5 +171,8 @@ class WoTEConfig:
         # Set dynamic paths based on environment variables and num_traj_anchor
         # extra_data is shared data, use OPENSCENE_DATA_ROOT
         openscene_data_root = os.environ.get('OPENSCENE_DATA_ROOT', '')
-        self.sim_reward_dict_path = os.path.join(openscene_data_root, f'extra_data/planning_vb/formatted_pdm_score_{self.num_traj_anchor}.npy')
+        # columnar result store of gen_multi_trajs_pdm_score.py, falls back to the legacy pickled .npy file
+        self.sim_reward_dict_path = os.path.join(openscene_data_root, f'extra_data/planning_vb/formatted_pdm_score_{self.num_traj_anchor}')
+        if not os.path.isdir(self.sim_reward_dict_path):
+            self.sim_reward_dict_path = f'{self.sim_reward_dict_path}.npy'
         self.cluster_file_path = os.path.join(openscene_data_root, f'extra_data/planning_vb/trajectory_anchors_{self.num_traj_anchor}.npy')
@@ -3,13 +3,21 @@ from __future__ import annotations
 import lzma
 import os
 import pickle
+import threading
 
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Tuple
 from tqdm import tqdm
 
 from navsim.common.dataclasses import AgentInput, Scene, SceneFilter, SensorConfig
-from navsim.planning.metric_caching.metric_cache import MetricCache
+from navsim.planning.metric_caching.metric_cache import MetricCache, load_metric_cache_paths
+from navsim.planning.metric_caching.metric_cache_shard import (
+    SHARD_DIR_NAME,
+    MetricCacheShardReader,
+    load_metric_cache_shards,
+)
 import numpy as np
 
 def filter_scenes(data_path: Path, scene_filter: SceneFilter) -> Dict[str, List[Dict[str, Any]]]:
@@ -141,21 +149,35 @@ class MetricCacheLoader:
         self,
         cache_path: Path,
         file_name: str = "metric_cache.pkl",
+        lru_size: int = 0,
     ):
+        """
+        Constructor of MetricCacheLoader
+        :param cache_path: root of the metric cache
+        :param file_name: file name of the metric cache per token, defaults to metric_cache.pkl
+        :param lru_size: number of decoded metric caches kept for repeated access, defaults to 0 (disabled)
+        """
 
         self._file_name = file_name
-        self.metric_cache_paths = self._load_metric_cache_paths(cache_path)
+        self._lru_size = lru_size
+        self._lru_cache: OrderedDict[str, MetricCache] = OrderedDict()
+        self._lru_lock = threading.Lock()
+
+        # packed caches (one shard per log) are preferred over one file per token, see pack_metric_cache.py
+        shard_dir = cache_path / SHARD_DIR_NAME
+        self._shard_readers: Dict[str, MetricCacheShardReader] = (
+            load_metric_cache_shards(shard_dir) if shard_dir.is_dir() else {}
+        )
+        self.metric_cache_paths = (
+            {token: shard_reader.shard_path for token, shard_reader in self._shard_readers.items()}
+            if self._shard_readers
+            else self._load_metric_cache_paths(cache_path)
+        )
 
     def _load_metric_cache_paths(self, cache_path: Path) -> Dict[str, Path]:
         metadata_dir = cache_path / "metadata"
         metadata_file = [file for file in metadata_dir.iterdir() if ".csv" in str(file)][0]
-        with open(str(metadata_file), "r") as f:
-            cache_paths=f.read().splitlines()[1:]
-        metric_cache_dict = {
-            cache_path.split("/")[-2]: cache_path
-            for cache_path in cache_paths
-        }
-        return metric_cache_dict
+        return load_metric_cache_paths(metadata_file)
 
     @property
     def tokens(self) -> List[str]:
@@ -169,14 +191,58 @@ class MetricCacheLoader:
 
     def get_from_token(self, token: str) -> MetricCache:
 
-        with lzma.open(self.metric_cache_paths[token], "rb") as f:
-            metric_cache: MetricCache = pickle.load(f)
+        if self._lru_size > 0:
+            with self._lru_lock:
+                if token in self._lru_cache:
+                    self._lru_cache.move_to_end(token)
+                    return self._lru_cache[token]
+
+        # decompress as a whole, since lzma and zstd release the GIL (unlike streamed unpickling)
+        if self._shard_readers:
+            pickle_object = self._shard_readers[token].get_pickle(token)
+        else:
+            with open(self.metric_cache_paths[token], "rb") as f:
+                pickle_object = lzma.decompress(f.read())
+        metric_cache: MetricCache = pickle.loads(pickle_object)
+
+        if self._lru_size > 0:
+            with self._lru_lock:
+                self._lru_cache[token] = metric_cache
+                self._lru_cache.move_to_end(token)
+                while len(self._lru_cache) > self._lru_size:
+                    self._lru_cache.popitem(last=False)
 
         return metric_cache
 
+    def iter_from_tokens(
+        self, tokens: Iterable[str], num_workers: int = 4, num_prefetch: int = 8
+    ) -> Iterator[Tuple[str, "Future[MetricCache]"]]:
+        """
+        Iterates over metric caches of tokens, while upcoming tokens are decoded by a thread pool.
+        Futures are yielded in order of tokens, thus decoding errors are raised by result() per token.
+        :param tokens: scene tokens to load
+        :param num_workers: number of decoding threads, defaults to 4
+        :param num_prefetch: maximum number of tokens decoded ahead, defaults to 8
+        :return: iterator of token and future of the metric cache
+        """
+        tokens = iter(tokens)
+        with ThreadPoolExecutor(max_workers=max(num_workers, 1)) as executor:
+            # bounded read-ahead, i.e. at most num_prefetch decoded caches are kept in memory
+            pending: Deque[Tuple[str, Future]] = deque()
+            try:
+                for token in tokens:
+                    pending.append((token, executor.submit(self.get_from_token, token)))
+                    if len(pending) > num_prefetch:
+                        yield pending.popleft()
+                while pending:
+                    yield pending.popleft()
+            finally:
+                for _, future in pending:
+                    future.cancel()
+
     def to_pickle(self, path: Path) -> None:
         full_metric_cache = {}
-        for token in tqdm(self.tokens):
-            full_metric_cache[token] = self.get_from_token(token)
+        for token, metric_cache in tqdm(self.iter_from_tokens(self.tokens), total=len(self)):
+            full_metric_cache[token] = metric_cache.result()
         with open(path, "wb") as f:
             pickle.dump(full_metric_cache, f)
@@ -0,0 +1,301 @@
+import json
+import os
+import tempfile
+from dataclasses import fields
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+import numpy as np
+import numpy.typing as npt
+
+from navsim.common.dataclasses import PDMResults
+
+# file names of the result store
+METADATA_FILE_NAME = "metadata.json"
+SCORES_FILE_PREFIX = "scores_"
+TOKENS_FILE_PREFIX = "tokens_"
+
+# default sub-scores stored per token and trajectory anchor
+PDM_RESULT_NAMES = [field.name for field in fields(PDMResults)]
+
+
+def _save_array(file_path: Path, array: npt.NDArray) -> None:
+    """
+    Saves array as npy file, written to a temporary file first to avoid corrupted files of interrupted runs.
+    :param file_path: target path of npy file
+    :param array: numpy array without python objects
+    """
+    file_descriptor, temp_path = tempfile.mkstemp(dir=file_path.parent, suffix=".npy.tmp")
+    try:
+        with os.fdopen(file_descriptor, "wb") as f:
+            np.save(f, array, allow_pickle=False)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+class PDMResultStore:
+    """
+    Columnar on-disk store of PDM sub-scores per token and trajectory anchor.
+    Results are stored in append-only segments, each of a token array and a dense score array of shape
+    (num_tokens, num_anchors, num_metrics). Score arrays are memory-mapped, thus dataloader workers share pages.
+    Tokens of later segments overwrite earlier entries, e.g. when re-evaluating tokens.
+    Appending skips tokens with unchanged scores, and compact merges all segments into one.
+    """
+
+    def __init__(self, store_path: Path, mmap: bool = True):
+        """
+        Constructor of PDMResultStore
+        :param store_path: directory of the result store
+        :param mmap: whether to memory-map score arrays instead of loading them, defaults to True
+        """
+        self._store_path = Path(store_path)
+        self._mmap = mmap
+
+        metadata_path = self._store_path / METADATA_FILE_NAME
+        assert metadata_path.exists(), f"PDMResultStore: No result store found at {self._store_path}!"
+        with open(metadata_path, "r") as f:
+            metadata = json.load(f)
+
+        self._metric_names: List[str] = metadata["metric_names"]
+        self._num_anchors: int = metadata["num_anchors"]
+        self._dtype = np.dtype(metadata["dtype"])
+
+        # token index, later segments overwrite earlier entries
+        self._segment_names: List[str] = self._get_segment_names(self._store_path)
+        self._token_to_idx: Dict[str, Tuple[int, int]] = {}
+        for segment_idx, segment_name in enumerate(self._segment_names):
+            tokens = np.load(self._store_path / f"{TOKENS_FILE_PREFIX}{segment_name}.npy")
+            for row_idx, token in enumerate(tokens.tolist()):
+                self._token_to_idx[token] = (segment_idx, row_idx)
+
+        # lazy loaded
+        self._scores: Optional[List[npt.NDArray]] = None
+
+    def __reduce__(self) -> Tuple[Type["PDMResultStore"], Tuple[Any, ...]]:
+        """Helper for pickling (without memory-mapped arrays, e.g. for dataloader workers)."""
+        return self.__class__, (self._store_path, self._mmap)
+
+    def __len__(self) -> int:
+        """
+        Number of tokens in the store
+        :return: int
+        """
+        return len(self._token_to_idx)
+
+    def __contains__(self, token: str) -> bool:
+        """
+        Checks whether token is in the store
+        :param token: scene token
+        :return: boolean
+        """
+        return token in self._token_to_idx
+
+    @property
+    def tokens(self) -> List[str]:
+        """
+        Getter for tokens in the store
+        :return: list of scene tokens
+        """
+        return list(self._token_to_idx.keys())
+
+    @property
+    def metric_names(self) -> List[str]:
+        """
+        Getter for names of stored sub-scores (last axis of score arrays)
+        :return: list of metric names
+        """
+        return self._metric_names
+
+    @property
+    def num_anchors(self) -> int:
+        """
+        Getter for number of trajectory anchors per token
+        :return: int
+        """
+        return self._num_anchors
+
+    @property
+    def scores(self) -> List[npt.NDArray]:
+        """
+        Getter for score arrays of all segments (lazy loaded)
+        :return: list of arrays, shape (num_tokens, num_anchors, num_metrics)
+        """
+        if self._scores is None:
+            self._scores = [
+                np.load(
+                    self._store_path / f"{SCORES_FILE_PREFIX}{segment_name}.npy",
+                    mmap_mode="r" if self._mmap else None,
+                )
+                for segment_name in self._segment_names
+            ]
+        return self._scores
+
+    def get_metric_indices(self, metric_names: List[str]) -> List[int]:
+        """
+        Retrieves index of metrics along the last axis of score arrays.
+        :param metric_names: names of metrics
+        :return: list of indices
+        """
+        return [self._metric_names.index(metric_name) for metric_name in metric_names]
+
+    def get(self, token: str, metric_names: Optional[List[str]] = None) -> npt.NDArray:
+        """
+        Retrieves sub-scores of all trajectory anchors of a token.
+        :param token: scene token
+        :param metric_names: optional subset of metrics, defaults to all metrics
+        :return: array of shape (num_anchors, num_metrics)
+        """
+        segment_idx, row_idx = self._token_to_idx[token]
+        scores = self.scores[segment_idx][row_idx]
+        if metric_names is not None:
+            scores = scores[:, self.get_metric_indices(metric_names)]
+        return np.asarray(scores)
+
+    @staticmethod
+    def _get_segment_names(store_path: Path) -> List[str]:
+        """
+        Finds completed segments of a store, in order of writing.
+        :param store_path: directory of the result store
+        :return: list of segment names
+        """
+        # tokens are written last, hence segments without token file are incomplete
+        return sorted(
+            file_path.stem[len(TOKENS_FILE_PREFIX) :]
+            for file_path in Path(store_path).glob(f"{TOKENS_FILE_PREFIX}*.npy")
+        )
+
+    @classmethod
+    def exists(cls, store_path: Path) -> bool:
+        """
+        Checks whether a result store exists at a path.
+        :param store_path: directory of the result store
+        :return: boolean
+        """
+        return (Path(store_path) / METADATA_FILE_NAME).exists()
+
+    @classmethod
+    def append(
+        cls,
+        store_path: Path,
+        tokens: List[str],
+        scores: npt.NDArray,
+        metric_names: List[str] = PDM_RESULT_NAMES,
+        dtype: str = "float32",
+    ) -> None:
+        """
+        Appends results as new segment, creates the store if not existing.
+        Tokens already stored with identical scores are skipped, i.e. only missing or changed tokens are written.
+        :param store_path: directory of the result store
+        :param tokens: scene tokens, shape (num_tokens,)
+        :param scores: sub-scores, shape (num_tokens, num_anchors, num_metrics)
+        :param metric_names: names of sub-scores, defaults to fields of PDMResults
+        :param dtype: dtype of score arrays (e.g. float16 or float32), ignored for existing stores
+        """
+        assert scores.ndim == 3 and len(tokens) == len(scores) and scores.shape[-1] == len(
+            metric_names
+        ), "PDMResultStore: Scores must have shape (num_tokens, num_anchors, num_metrics)!"
+
+        store_path = Path(store_path)
+        store_path.mkdir(parents=True, exist_ok=True)
+        metadata_path = store_path / METADATA_FILE_NAME
+        if metadata_path.exists():
+            with open(metadata_path, "r") as f:
+                metadata = json.load(f)
+            assert metadata["metric_names"] == list(metric_names) and metadata["num_anchors"] == scores.shape[1], (
+                "PDMResultStore: Metrics or number of anchors do not match existing store!"
+            )
+        else:
+            metadata = {
+                "metric_names": list(metric_names),
+                "num_anchors": scores.shape[1],
+                "dtype": np.dtype(dtype).name,
+            }
+            with open(metadata_path, "w") as f:
+                json.dump(metadata, f)
+
+        scores = np.ascontiguousarray(scores, dtype=metadata["dtype"])
+        segment_names = cls._get_segment_names(store_path)
+        if len(segment_names) > 0 and len(tokens) > 0:
+            store = PDMResultStore(store_path)
+            changed_idcs = [
+                idx
+                for idx, token in enumerate(tokens)
+                if token not in store or not np.array_equal(store.get(token), scores[idx], equal_nan=True)
+            ]
+            tokens, scores = [tokens[idx] for idx in changed_idcs], scores[changed_idcs]
+
+        if len(tokens) == 0:
+            return
+
+        cls._write_segment(store_path, segment_names, tokens, scores)
+
+    @classmethod
+    def compact(cls, store_path: Path) -> None:
+        """
+        Rewrites all segments of a store into a single segment, keeping the latest entry of each token.
+        Bounds the number of segments, e.g. after repeated appends of re-evaluated tokens.
+        :param store_path: directory of the result store
+        """
+        store_path = Path(store_path)
+        segment_names = cls._get_segment_names(store_path)
+        if len(segment_names) <= 1:
+            return
+
+        store = PDMResultStore(store_path, mmap=False)
+        tokens = store.tokens
+        scores = np.stack([store.get(token) for token in tokens]) if tokens else None
+        if scores is not None:
+            cls._write_segment(store_path, segment_names, tokens, scores)
+
+        # token files first, i.e. partially removed segments are never read
+        for prefix in [TOKENS_FILE_PREFIX, SCORES_FILE_PREFIX]:
+            for segment_name in segment_names:
+                (store_path / f"{prefix}{segment_name}.npy").unlink(missing_ok=True)
+
+    @staticmethod
+    def _write_segment(
+        store_path: Path, segment_names: List[str], tokens: List[str], scores: npt.NDArray
+    ) -> None:
+        """
+        Writes results as segment after the existing segments.
+        :param store_path: directory of the result store
+        :param segment_names: names of existing segments
+        :param tokens: scene tokens, shape (num_tokens,)
+        :param scores: sub-scores in dtype of the store, shape (num_tokens, num_anchors, num_metrics)
+        """
+        segment_name = f"{int(segment_names[-1]) + 1 if segment_names else 0:06d}"
+        _save_array(store_path / f"{SCORES_FILE_PREFIX}{segment_name}.npy", np.ascontiguousarray(scores))
+        # tokens are written last, hence segments without token file are incomplete
+        _save_array(store_path / f"{TOKENS_FILE_PREFIX}{segment_name}.npy", np.array(tokens, dtype=np.str_))
+
+    @classmethod
+    def from_score_dict(
+        cls,
+        store_path: Path,
+        score_dict: Dict[str, Dict[str, Any]],
+        metric_names: List[str] = PDM_RESULT_NAMES,
+        dtype: str = "float32",
+    ) -> "PDMResultStore":
+        """
+        Converts results in the legacy format {token: {"trajectory_scores": [{metric: (num_anchors,)}]}}.
+        :param store_path: directory of the result store
+        :param score_dict: dictionary of results per token
+        :param metric_names: names of sub-scores, defaults to fields of PDMResults
+        :param dtype: dtype of score arrays (e.g. float16 or float32), defaults to float32
+        :return: PDMResultStore object
+        """
+        assert len(score_dict) > 0, "PDMResultStore: Cannot convert empty results!"
+
+        tokens = list(score_dict.keys())
+        scores = np.stack(
+            [
+                np.stack(
+                    [score_dict[token]["trajectory_scores"][0][name] for name in metric_names], axis=-1
+                )
+                for token in tokens
+            ]
+        )
+        cls.append(store_path, tokens, scores, metric_names, dtype)
+        return PDMResultStore(store_path)
@@ -1,7 +1,7 @@
 import numpy as np
 import numpy.typing as npt
 
-from typing import List
+from typing import List, Optional
 import os
 import matplotlib.pyplot as plt
 
@@ -17,23 +17,34 @@ from navsim.planning.simulation.planner.pdm_planner.scoring.pdm_scorer import (
     PDMScorer,
 )
 from navsim.planning.simulation.planner.pdm_planner.utils.pdm_array_representation import (
+    ego_state_to_state_array,
     ego_states_to_state_array,
 )
 from navsim.planning.metric_caching.metric_cache import MetricCache
+from navsim.evaluate.pdm_score_cache import (
+    PDMScoreCache,
+    PDMSimulationCache,
+    get_pdm_reference_hash,
+    get_trajectory_hash,
+    merge_proposal_metrics,
+)
 from navsim.planning.simulation.planner.pdm_planner.utils.pdm_geometry_utils import (
     convert_absolute_to_relative_se2_array,
+    convert_relative_to_absolute_se2_array,
 )
 
 from nuplan.planning.simulation.trajectory.trajectory_sampling import TrajectorySampling
 from nuplan.planning.simulation.trajectory.interpolated_trajectory import InterpolatedTrajectory
 from nuplan.common.actor_state.state_representation import StateSE2, TimePoint
 from nuplan.common.actor_state.ego_state import EgoState
+from nuplan.common.geometry.compute import principal_value
 from nuplan.common.geometry.convert import relative_to_absolute_poses
 
 from navsim.common.dataclasses import PDMResults, Trajectory
 
 from navsim.planning.simulation.planner.pdm_planner.utils.pdm_enums import (
     MultiMetricIndex,
+    StateIndex,
     WeightedMetricIndex,
 )
 
@@ -101,34 +112,183 @@ def get_trajectory_as_array(
     return ego_states_to_state_array(trajectory_ego_states)
 
 
+def get_trajectories_as_array(
+    model_trajectories: List[Trajectory],
+    future_sampling: TrajectorySampling,
+    initial_ego_state: EgoState,
+) -> npt.NDArray[np.float64]:
+    """
+    Array-only equivalent of transform_trajectory and get_trajectory_as_array for several trajectories.
+    Poses are transformed to the global frame, prepended by the initial ego state, and linearly interpolated
+    (with unwrapped headings), as in nuPlan's InterpolatedTrajectory.
+    :param model_trajectories: Predicted trajectories in ego frame, with identical trajectory sampling.
+    :param future_sampling: Sampling parameters for interpolation.
+    :param initial_ego_state: nuPlan's ego state object
+    :return: Array of interpolated trajectory states, shape (trajectories, future poses + 1, states)
+    """
+    trajectory_sampling = model_trajectories[0].trajectory_sampling
+    assert all(
+        trajectory.trajectory_sampling == trajectory_sampling for trajectory in model_trajectories
+    ), "Trajectories require identical trajectory sampling!"
+
+    # knots of the interpolation, see transform_trajectory
+    relative_poses = np.stack([trajectory.poses for trajectory in model_trajectories]).astype(np.float64)
+    absolute_poses = convert_relative_to_absolute_se2_array(initial_ego_state.rear_axle, relative_poses)
+
+    num_trajectories, num_knots = len(relative_poses), trajectory_sampling.num_poses + 1
+    timesteps = _get_fixed_timesteps(
+        initial_ego_state, trajectory_sampling.time_horizon, trajectory_sampling.interval_length
+    )
+    knot_times_us = np.array(
+        [initial_ego_state.time_us] + [int(timestep * 1e6) for timestep in timesteps], dtype=np.float64
+    )
+
+    # NOTE: velocity, acceleration, and steering angle of future poses are zero, see transform_trajectory
+    knot_states = np.zeros((num_trajectories, num_knots, StateIndex.size()), dtype=np.float64)
+    knot_states[:, 0] = ego_state_to_state_array(initial_ego_state)
+    knot_states[:, 1:, StateIndex.STATE_SE2] = absolute_poses
+    knot_states[..., StateIndex.HEADING] = np.unwrap(knot_states[..., StateIndex.HEADING], axis=-1)
+
+    # query times, see get_trajectory_as_array
+    times_s = np.arange(
+        0.0,
+        future_sampling.time_horizon + future_sampling.interval_length,
+        future_sampling.interval_length,
+    )
+    times_s += initial_ego_state.time_point.time_s
+    times_us = np.array([int(time_s * 1e6) for time_s in times_s], dtype=np.float64)
+    times_us = np.clip(times_us, knot_times_us[0], knot_times_us[-1])
+
+    # linear interpolation between neighboring knots (as in scipy's interp1d)
+    upper_idcs = np.clip(np.searchsorted(knot_times_us, times_us), 1, num_knots - 1)
+    lower_idcs = upper_idcs - 1
+    lower_states, upper_states = knot_states[:, lower_idcs], knot_states[:, upper_idcs]
+    slopes = (upper_states - lower_states) / (knot_times_us[upper_idcs] - knot_times_us[lower_idcs])[:, None]
+    states = slopes * (times_us - knot_times_us[lower_idcs])[:, None] + lower_states
+    states[..., StateIndex.HEADING] = principal_value(states[..., StateIndex.HEADING])
+
+    # steering rate, angular velocity and acceleration are not interpolated, see EgoState.from_split_state
+    states[..., StateIndex.STEERING_RATE] = 0.0
+    states[..., StateIndex.ANGULAR_VELOCITY] = 0.0
+    states[..., StateIndex.ANGULAR_ACCELERATION] = 0.0
+    return states
+
+
+def get_reference_trajectory_as_array(
+    metric_cache: MetricCache, future_sampling: TrajectorySampling
+) -> npt.NDArray[np.float64]:
+    """
+    Retrieves the PDM-Closed reference trajectory of the metric cache as array.
+    Uses the pre-sampled states of the metric cache if available for the sampling, otherwise interpolates.
+    :param metric_cache: Metric cache dataclass
+    :param future_sampling: Sampling parameters for interpolation
+    :return: Array of interpolated trajectory states.
+    """
+    if metric_cache.trajectory_states is not None and metric_cache.trajectory_sampling == future_sampling:
+        return metric_cache.trajectory_states
+    return get_trajectory_as_array(metric_cache.trajectory, future_sampling, metric_cache.ego_state.time_point)
+
+
+def simulate_trajectories(
+    metric_cache: MetricCache,
+    model_trajectories: List[Trajectory],
+    future_sampling: TrajectorySampling,
+    simulator: PDMSimulator,
+    include_pdm_reference: bool = False,
+    simulation_cache: Optional[PDMSimulationCache] = None,
+    token: Optional[str] = None,
+) -> npt.NDArray[np.float64]:
+    """
+    Simulates trajectories with LQR and kinematic bicycle model, optionally with cached simulated states.
+    :param metric_cache: Metric cache dataclass
+    :param model_trajectories: Predicted trajectories in ego frame.
+    :param future_sampling: Sampling parameters for interpolation.
+    :param simulator: PDM simulator object.
+    :param include_pdm_reference: Whether to prepend the PDM reference trajectory of the metric cache.
+    :param simulation_cache: Optional cache of simulated states, only missing trajectories are simulated.
+    :param token: Scene token, required for the simulation cache.
+    :return: Array of simulated states, shape (trajectories, proposal poses + 1, states)
+    """
+    initial_ego_state = metric_cache.ego_state
+    vehicle_parameters = initial_ego_state.car_footprint.vehicle_parameters
+
+    trajectory_hashes = [
+        get_trajectory_hash(trajectory, vehicle_parameters) for trajectory in model_trajectories
+    ]
+    if include_pdm_reference:
+        trajectory_hashes = [
+            get_pdm_reference_hash(simulator, future_sampling, vehicle_parameters)
+        ] + trajectory_hashes
+
+    # load cached simulated states of known trajectories
+    cached_mask = np.zeros(len(trajectory_hashes), dtype=bool)
+    if simulation_cache is not None:
+        assert token is not None, "Scene token is required to use the simulation cache!"
+        cached_mask, cached_arrays = simulation_cache.load(token, trajectory_hashes)
+    missing_idcs = np.flatnonzero(~cached_mask)
+
+    simulated_states = np.zeros(
+        (len(trajectory_hashes), simulator.proposal_sampling.num_poses + 1, StateIndex.size()),
+        dtype=np.float64,
+    )
+    if cached_mask.any():
+        simulated_states[cached_mask] = cached_arrays["simulated_states"]
+
+    if len(missing_idcs) > 0:
+        trajectory_states = []
+        model_idcs = missing_idcs - int(include_pdm_reference)
+        if include_pdm_reference and model_idcs[0] < 0:
+            trajectory_states.append(get_reference_trajectory_as_array(metric_cache, future_sampling)[None])
+            model_idcs = model_idcs[1:]
+        if len(model_idcs) > 0:
+            trajectory_states.append(
+                get_trajectories_as_array(
+                    [model_trajectories[idx] for idx in model_idcs], future_sampling, initial_ego_state
+                )
+            )
+
+        simulated_states[missing_idcs] = simulator.simulate_proposals(
+            np.concatenate(trajectory_states, axis=0), initial_ego_state
+        )
+
+        if simulation_cache is not None:
+            simulation_cache.save(
+                token,
+                [trajectory_hashes[idx] for idx in missing_idcs],
+                {"simulated_states": simulated_states[missing_idcs]},
+            )
+
+    return simulated_states
+
+
 def pdm_score(
     metric_cache: MetricCache,
     model_trajectory: Trajectory,
     future_sampling: TrajectorySampling,
     simulator: PDMSimulator,
-    scorer: PDMScorer
+    scorer: PDMScorer,
+    simulation_cache: Optional[PDMSimulationCache] = None,
+    token: Optional[str] = None,
 ) -> PDMResults:
     """
     Runs PDM-Score and saves results in dataclass.
     :param metric_cache: Metric cache dataclass
     :param model_trajectory: Predicted trajectory in ego frame.
+    :param simulation_cache: Optional cache of simulated states, to skip simulation of known trajectories.
+    :param token: Scene token, required for the simulation cache.
     :return: Dataclass of PDM-Subscores.
     """
 
-    initial_ego_state = metric_cache.ego_state
-
-    pdm_trajectory = metric_cache.trajectory
-    pred_trajectory = transform_trajectory(model_trajectory, initial_ego_state)
-
-    pdm_states, pred_states = (
-        get_trajectory_as_array(pdm_trajectory, future_sampling, initial_ego_state.time_point),
-        get_trajectory_as_array(pred_trajectory, future_sampling, initial_ego_state.time_point),
+    simulated_states = simulate_trajectories(
+        metric_cache,
+        [model_trajectory],
+        future_sampling,
+        simulator,
+        include_pdm_reference=True,
+        simulation_cache=simulation_cache,
+        token=token,
     )
 
-    trajectory_states = np.concatenate([pdm_states[None, ...], pred_states[None, ...]], axis=0)
-
-    simulated_states = simulator.simulate_proposals(trajectory_states, initial_ego_state)
-
     scores = scorer.score_proposals(
         simulated_states,
         metric_cache.observation,
@@ -167,46 +327,68 @@ def pdm_score_multi_trajs(
     model_trajectory_list: Trajectory,
     future_sampling: TrajectorySampling,
     simulator: PDMSimulator,
-    scorer: PDMScorer
+    scorer: PDMScorer,
+    score_cache: Optional[PDMScoreCache] = None,
+    token: Optional[str] = None,
+    simulation_cache: Optional[PDMSimulationCache] = None,
 ) -> PDMResults:
     """
     Runs PDM-Score and saves results in dataclass.
     :param metric_cache: Metric cache dataclass
     :param model_trajectory: Predicted trajectory in ego frame.
+    :param score_cache: Optional cache of per-trajectory metrics, only missing trajectories are scored.
+    :param token: Scene token, required for the score and simulation cache.
+    :param simulation_cache: Optional cache of simulated states, to skip simulation of known trajectories.
     :return: Dataclass of PDM-Subscores.
     """
 
-    initial_ego_state = metric_cache.ego_state
-
-    pdm_trajectory = metric_cache.trajectory
-
-    pdm_states = get_trajectory_as_array(pdm_trajectory, future_sampling, initial_ego_state.time_point)
-    pred_states_list = []
-    for traj in model_trajectory_list:
-        model_trajectory = Trajectory(traj)
-        pred_trajectory = transform_trajectory(model_trajectory, initial_ego_state)
-        pred_states = get_trajectory_as_array(pred_trajectory, future_sampling, initial_ego_state.time_point)
-        pred_states_list.append(pred_states[None, ...])
+    model_trajectories = [Trajectory(traj) for traj in model_trajectory_list]
+
+    # load cached metrics of known trajectories
+    cached_mask = np.zeros(len(model_trajectories), dtype=bool)
+    if score_cache is not None:
+        assert token is not None, "Scene token is required to use the score cache!"
+        vehicle_parameters = metric_cache.ego_state.car_footprint.vehicle_parameters
+        trajectory_hashes = [
+            get_trajectory_hash(trajectory, vehicle_parameters) for trajectory in model_trajectories
+        ]
+        cached_mask, cached_metrics = score_cache.load(token, trajectory_hashes)
+    missing_idcs = np.flatnonzero(~cached_mask)
+
+    computed_metrics = {}
+    if len(missing_idcs) > 0:
+        simulated_states = simulate_trajectories(
+            metric_cache,
+            [model_trajectories[idx] for idx in missing_idcs],
+            future_sampling,
+            simulator,
+            simulation_cache=simulation_cache,
+            token=token,
+        )
 
-    trajectory_states = np.concatenate(pred_states_list, axis=0)
-    # trajectory_states = np.concatenate([pdm_states[None, ...], *pred_states_list], axis=0)
-    # trajectory_states = np.concatenate([pdm_states[None, ...], pred_states[None, ...]], axis=0)
+        # simulated_states_rel = extract_relative_trajectory(simulated_states)
+        # from time import time
+        # vis_dir = os.path.join(os.environ.get('WOTE_PROJECT_ROOT', ''), f'vis/simulated_trajs_{time()}')
+        # visualize_trajectories(trajectory_states, simulated_states, vis_dir=vis_dir)
+        # print('only save simulated_states')
+        # return simulated_states_rel
+        scores = scorer.score_proposals(
+            simulated_states,
+            metric_cache.observation,
+            metric_cache.centerline,
+            metric_cache.route_lane_ids,
+            metric_cache.drivable_area_map,
+        )
 
-    simulated_states = simulator.simulate_proposals(trajectory_states, initial_ego_state)
+        if score_cache is not None:
+            computed_metrics = scorer.get_proposal_metrics()
+            score_cache.save(token, [trajectory_hashes[idx] for idx in missing_idcs], computed_metrics)
 
-    # simulated_states_rel = extract_relative_trajectory(simulated_states)
-    # from time import time
-    # vis_dir = os.path.join(os.environ.get('WOTE_PROJECT_ROOT', ''), f'vis/simulated_trajs_{time()}')
-    # visualize_trajectories(trajectory_states, simulated_states, vis_dir=vis_dir)
-    # print('only save simulated_states')
-    # return simulated_states_rel
-    scores = scorer.score_proposals(
-        simulated_states,
-        metric_cache.observation,
-        metric_cache.centerline,
-        metric_cache.route_lane_ids,
-        metric_cache.drivable_area_map,
-    )
+    # re-aggregate scene-level metrics over all trajectories, if any are cached
+    if cached_mask.any():
+        scores = scorer.score_proposal_metrics(
+            merge_proposal_metrics(cached_mask, cached_metrics, computed_metrics)
+        )
 
     # TODO: Refactor & add / modify existing metrics.
     # pred_idx = 1
@@ -233,6 +415,74 @@ def pdm_score_multi_trajs(
         score,
     )
 
+def pdm_score_batch(
+    metric_caches: List[MetricCache],
+    model_trajectories: List[List[Trajectory]],
+    future_sampling: TrajectorySampling,
+    simulator: PDMSimulator,
+    scorer: PDMScorer,
+    include_pdm_reference: bool = True,
+) -> List[PDMResults]:
+    """
+    Runs PDM-Score for several scenes with a single stacked simulation and scoring pass.
+    :param metric_caches: Metric cache dataclasses, one per scene.
+    :param model_trajectories: Predicted trajectories in ego frame, a list of candidates per scene.
+    :param future_sampling: Sampling parameters for interpolation.
+    :param simulator: PDM simulator object.
+    :param scorer: PDM scorer object.
+    :param include_pdm_reference: Whether to score the PDM reference as additional proposal (as in pdm_score).
+    :return: Dataclasses of PDM-Subscores, one per scene with arrays over the scene's candidates.
+    """
+    assert len(metric_caches) == len(model_trajectories), "Number of metric caches and trajectories does not match!"
+
+    num_reference = int(include_pdm_reference)
+
+    trajectory_states, proposal_counts = [], []
+    for metric_cache, trajectories in zip(metric_caches, model_trajectories):
+        initial_ego_state = metric_cache.ego_state
+        scene_states = []
+        if include_pdm_reference:
+            scene_states.append(get_reference_trajectory_as_array(metric_cache, future_sampling)[None])
+        scene_states.append(get_trajectories_as_array(trajectories, future_sampling, initial_ego_state))
+
+        scene_states = np.concatenate(scene_states, axis=0)
+        trajectory_states.append(scene_states)
+        proposal_counts.append(len(scene_states))
+
+    # heterogeneous initial states and vehicle parameters are handled per row
+    simulated_states = simulator.simulate_proposals_batch(
+        np.concatenate(trajectory_states, axis=0),
+        proposal_counts,
+        [metric_cache.ego_state for metric_cache in metric_caches],
+    )
+
+    scores = scorer.score_proposals_batch(
+        simulated_states,
+        proposal_counts,
+        [metric_cache.observation for metric_cache in metric_caches],
+        [metric_cache.centerline for metric_cache in metric_caches],
+        [metric_cache.route_lane_ids for metric_cache in metric_caches],
+        [metric_cache.drivable_area_map for metric_cache in metric_caches],
+    )
+
+    pdm_results: List[PDMResults] = []
+    scene_offsets = np.concatenate([[0], np.cumsum(proposal_counts)])
+    for start_idx, end_idx in zip(scene_offsets[:-1], scene_offsets[1:]):
+        pred_idcs = slice(start_idx + num_reference, end_idx)
+        pdm_results.append(
+            PDMResults(
+                scorer._multi_metrics[MultiMetricIndex.NO_COLLISION, pred_idcs],
+                scorer._multi_metrics[MultiMetricIndex.DRIVABLE_AREA, pred_idcs],
+                scorer._multi_metrics[MultiMetricIndex.DRIVING_DIRECTION, pred_idcs],
+                scorer._weighted_metrics[WeightedMetricIndex.PROGRESS, pred_idcs],
+                scorer._weighted_metrics[WeightedMetricIndex.TTC, pred_idcs],
+                scorer._weighted_metrics[WeightedMetricIndex.COMFORTABLE, pred_idcs],
+                scores[pred_idcs],
+            )
+        )
+
+    return pdm_results
+
 def extract_relative_trajectory(simulated_states: np.ndarray) -> np.ndarray:
     """
     Extract relative trajectory from simulated states.
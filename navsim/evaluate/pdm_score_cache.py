@@ -0,0 +1,368 @@
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import numpy.typing as npt
+from nuplan.common.actor_state.vehicle_parameters import VehicleParameters
+from nuplan.planning.simulation.trajectory.trajectory_sampling import TrajectorySampling
+
+from navsim.common.dataclasses import Trajectory
+from navsim.planning.simulation.planner.pdm_planner.scoring.pdm_scorer import (
+    PDMScorer,
+    PROPOSAL_METRIC_NAMES,
+)
+from navsim.planning.simulation.planner.pdm_planner.simulation.pdm_simulator import (
+    PDMSimulator,
+)
+
+# increment to invalidate all existing caches, e.g. after changes of the metric implementations
+PDM_SCORE_CACHE_VERSION = 2
+
+# prefix of the trajectory hash of the PDM reference trajectory in the metric cache
+PDM_REFERENCE_HASH_PREFIX = "pdm_reference"
+
+# arrays of the simulation cache
+SIMULATION_ARRAY_NAMES = ["simulated_states"]
+
+# runtime state of the tracker, excluded from the configuration hash
+TRACKER_STATE_ATTRIBUTES = [
+    "_proposal_states",
+    "_initialized",
+    "_velocity_profile",
+    "_curvature_profile",
+    "_discretization_time",
+]
+
+
+def _to_serializable(value: Any) -> Any:
+    """
+    Converts (nested) parameter objects to json-serializable values for hashing.
+    :param value: any parameter value, e.g. dataclass, numpy array, or object with attributes
+    :return: json-serializable value
+    """
+    if isinstance(value, dict):
+        return {str(key): _to_serializable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_serializable(item) for item in value]
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    if hasattr(value, "__dict__"):
+        return {"type": type(value).__name__, **_to_serializable(vars(value))}
+    return str(value)
+
+
+def _get_simulation_parameters(simulator: PDMSimulator) -> Dict[str, Any]:
+    """
+    Collects all parameters of the simulator affecting simulated states, i.e. of the tracker and the motion model.
+    NOTE: Scenes are simulated with the vehicle parameters of their ego state, which are keyed per trajectory.
+    :param simulator: PDM simulator object
+    :return: dictionary of parameters
+    """
+    tracker_parameters = {
+        name: value
+        for name, value in vars(simulator._tracker).items()
+        if name not in TRACKER_STATE_ATTRIBUTES
+    }
+    return {
+        "version": PDM_SCORE_CACHE_VERSION,
+        "simulator": type(simulator).__name__,
+        "simulator_proposal_sampling": simulator.proposal_sampling,
+        "tracker": tracker_parameters,
+        "motion_model": vars(simulator._motion_model),
+    }
+
+
+def _hash_parameters(parameters: Dict[str, Any]) -> str:
+    """
+    Hashes a dictionary of (nested) parameters.
+    :param parameters: dictionary of parameters
+    :return: hex digest of parameters
+    """
+    serialized = json.dumps(_to_serializable(parameters), sort_keys=True)
+    return hashlib.sha1(serialized.encode("utf-8")).hexdigest()
+
+
+def get_simulation_config_hash(
+    simulator: PDMSimulator, future_sampling: TrajectorySampling
+) -> str:
+    """
+    Computes a hash of all parameters affecting the simulated states of trajectories.
+    :param simulator: PDM simulator object
+    :param future_sampling: sampling parameters to interpolate trajectories before simulation
+    :return: hex digest of parameters
+    """
+    return _hash_parameters(
+        {"future_sampling": future_sampling, **_get_simulation_parameters(simulator)}
+    )
+
+
+def get_pdm_reference_hash(
+    simulator: PDMSimulator,
+    future_sampling: TrajectorySampling,
+    vehicle_parameters: Optional[VehicleParameters] = None,
+) -> str:
+    """
+    Computes the trajectory hash of the PDM reference trajectory, keyed by the simulation parameters.
+    :param simulator: PDM simulator object
+    :param future_sampling: sampling parameters to interpolate trajectories before simulation
+    :param vehicle_parameters: optional ego vehicle parameters of the scene used in simulation
+    :return: trajectory hash of reference
+    """
+    reference_hash = f"{PDM_REFERENCE_HASH_PREFIX}_{get_simulation_config_hash(simulator, future_sampling)}"
+    if vehicle_parameters is not None:
+        reference_hash += f"_{_hash_parameters({'vehicle_parameters': vehicle_parameters})}"
+    return reference_hash
+
+
+def get_score_config_hash(
+    simulator: PDMSimulator, scorer: PDMScorer, future_sampling: TrajectorySampling
+) -> str:
+    """
+    Computes a hash of all parameters affecting the per-proposal metrics of PDMScorer.
+    Aggregation parameters (e.g. metric weights, driving direction and progress thresholds) are excluded,
+    since cached metrics are re-aggregated when loaded.
+    :param simulator: PDM simulator object
+    :param scorer: PDM scorer object
+    :param future_sampling: sampling parameters to interpolate trajectories before simulation
+    :return: hex digest of parameters
+    """
+    return _hash_parameters(
+        {
+            "future_sampling": future_sampling,
+            "proposal_sampling": scorer.proposal_sampling,
+            "stopped_speed_threshold": scorer._config.stopped_speed_threshold,
+            "collision_backend": scorer._config.collision_backend,
+            "vehicle_parameters": scorer._vehicle_parameters,
+            **_get_simulation_parameters(simulator),
+        }
+    )
+
+
+def get_trajectory_hash(
+    trajectory: Trajectory, vehicle_parameters: Optional[VehicleParameters] = None
+) -> str:
+    """
+    Computes a content hash of a trajectory, including its sampling.
+    :param trajectory: trajectory dataclass in ego frame
+    :param vehicle_parameters: optional ego vehicle parameters of the scene used in simulation
+    :return: hex digest of trajectory
+    """
+    poses = np.ascontiguousarray(trajectory.poses, dtype=np.float64)
+    sampling = trajectory.trajectory_sampling
+    trajectory_hash = hashlib.sha1(poses.tobytes())
+    trajectory_hash.update(
+        f"{poses.shape}{sampling.num_poses}{sampling.interval_length}".encode("utf-8")
+    )
+    if vehicle_parameters is not None:
+        trajectory_hash.update(
+            _hash_parameters({"vehicle_parameters": vehicle_parameters}).encode("utf-8")
+        )
+    return trajectory_hash.hexdigest()
+
+
+class PDMArrayCache:
+    """
+    Persistent, content-addressed store of per-trajectory arrays.
+    Entries are keyed by scene token, trajectory hash, and a hash of the configuration.
+    Each token is stored as a separate npz file, thus workers can write concurrently on disjoint tokens.
+    """
+
+    def __init__(self, cache_path: Path, config_hash: str, array_names: List[str]):
+        """
+        Constructor of PDMArrayCache
+        :param cache_path: root directory of the cache
+        :param config_hash: hash of parameters the cached arrays depend on
+        :param array_names: names of the cached trajectory-first arrays
+        """
+        self._cache_path = Path(cache_path)
+        self._config_hash = config_hash
+        self._array_names = array_names
+
+    @property
+    def config_hash(self) -> str:
+        """
+        Getter for configuration hash of cache
+        :return: hex digest
+        """
+        return self._config_hash
+
+    def _get_file_path(self, token: str) -> Path:
+        """
+        Returns the file path of a token, sharded by token prefix.
+        :param token: scene token
+        :return: path to npz file
+        """
+        return self._cache_path / self._config_hash / token[:2] / f"{token}.npz"
+
+    def _read(self, token: str) -> Tuple[List[str], Dict[str, npt.NDArray]]:
+        """
+        Reads all entries of a token.
+        :param token: scene token
+        :return: trajectory hashes and dictionary of trajectory-first arrays
+        """
+        file_path = self._get_file_path(token)
+        if not file_path.exists():
+            return [], {}
+
+        with np.load(file_path, allow_pickle=False) as data:
+            trajectory_hashes = data["trajectory_hashes"].tolist()
+            arrays = {name: data[name] for name in self._array_names}
+        return trajectory_hashes, arrays
+
+    def load(
+        self, token: str, trajectory_hashes: List[str]
+    ) -> Tuple[npt.NDArray[np.bool_], Dict[str, npt.NDArray]]:
+        """
+        Loads cached arrays of trajectories.
+        :param token: scene token
+        :param trajectory_hashes: hashes of requested trajectories
+        :return: boolean mask of cached trajectories and arrays of cached trajectories (in request order)
+        """
+        cached_hashes, cached_arrays = self._read(token)
+        hash_to_idx = {trajectory_hash: idx for idx, trajectory_hash in enumerate(cached_hashes)}
+
+        row_idcs = np.array(
+            [hash_to_idx.get(trajectory_hash, -1) for trajectory_hash in trajectory_hashes],
+            dtype=np.int64,
+        )
+        found_mask = row_idcs >= 0
+        if not found_mask.any():
+            return found_mask, {}
+
+        return found_mask, {name: array[row_idcs[found_mask]] for name, array in cached_arrays.items()}
+
+    def save(
+        self,
+        token: str,
+        trajectory_hashes: List[str],
+        arrays: Dict[str, npt.NDArray],
+    ) -> None:
+        """
+        Adds arrays of trajectories to the cache, merged with existing entries of the token.
+        :param token: scene token
+        :param trajectory_hashes: hashes of trajectories
+        :param arrays: dictionary of trajectory-first arrays
+        """
+        assert all(
+            len(arrays[name]) == len(trajectory_hashes) for name in self._array_names
+        ), f"{type(self).__name__}: Number of trajectories and arrays does not match!"
+
+        cached_hashes, cached_arrays = self._read(token)
+        cached_hash_set = set(cached_hashes)
+        new_idcs = [
+            idx
+            for idx, trajectory_hash in enumerate(trajectory_hashes)
+            if trajectory_hash not in cached_hash_set
+        ]
+        if len(new_idcs) == 0:
+            return
+
+        merged_hashes = cached_hashes + [trajectory_hashes[idx] for idx in new_idcs]
+        merged_arrays = {
+            name: np.concatenate([cached_arrays[name], arrays[name][new_idcs]], axis=0)
+            if cached_arrays
+            else arrays[name][new_idcs]
+            for name in self._array_names
+        }
+
+        # write to temporary file first, to avoid corrupted files of interrupted runs
+        file_path = self._get_file_path(token)
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_descriptor, temp_path = tempfile.mkstemp(dir=file_path.parent, suffix=".npz.tmp")
+        try:
+            with os.fdopen(file_descriptor, "wb") as f:
+                np.savez(f, trajectory_hashes=np.array(merged_hashes), **merged_arrays)
+            os.replace(temp_path, file_path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+
+class PDMScoreCache(PDMArrayCache):
+    """Cache of per-proposal PDM metrics, which are re-aggregated to scores when loaded."""
+
+    def __init__(self, cache_path: Path, config_hash: str):
+        """
+        Constructor of PDMScoreCache
+        :param cache_path: root directory of the cache
+        :param config_hash: hash of simulation and scorer parameters, see get_score_config_hash
+        """
+        super().__init__(cache_path, config_hash, PROPOSAL_METRIC_NAMES)
+
+    @classmethod
+    def from_scorer(
+        cls,
+        cache_path: Path,
+        simulator: PDMSimulator,
+        scorer: PDMScorer,
+        future_sampling: TrajectorySampling,
+    ) -> "PDMScoreCache":
+        """
+        Creates cache for the configuration of a simulator and scorer.
+        :param cache_path: root directory of the cache
+        :param simulator: PDM simulator object
+        :param scorer: PDM scorer object
+        :param future_sampling: sampling parameters to interpolate trajectories before simulation
+        :return: PDMScoreCache object
+        """
+        return PDMScoreCache(cache_path, get_score_config_hash(simulator, scorer, future_sampling))
+
+
+class PDMSimulationCache(PDMArrayCache):
+    """Cache of simulated state arrays, independent of the scorer configuration."""
+
+    def __init__(self, cache_path: Path, config_hash: str):
+        """
+        Constructor of PDMSimulationCache
+        :param cache_path: root directory of the cache
+        :param config_hash: hash of simulation parameters, see get_simulation_config_hash
+        """
+        super().__init__(cache_path, config_hash, SIMULATION_ARRAY_NAMES)
+
+    @classmethod
+    def from_simulator(
+        cls, cache_path: Path, simulator: PDMSimulator, future_sampling: TrajectorySampling
+    ) -> "PDMSimulationCache":
+        """
+        Creates cache for the configuration of a simulator.
+        :param cache_path: root directory of the cache
+        :param simulator: PDM simulator object
+        :param future_sampling: sampling parameters to interpolate trajectories before simulation
+        :return: PDMSimulationCache object
+        """
+        return PDMSimulationCache(cache_path, get_simulation_config_hash(simulator, future_sampling))
+
+
+def merge_proposal_metrics(
+    cached_mask: npt.NDArray[np.bool_],
+    cached_metrics: Dict[str, npt.NDArray],
+    computed_metrics: Dict[str, npt.NDArray],
+) -> Dict[str, npt.NDArray]:
+    """
+    Merges cached and newly computed per-proposal metrics into the original proposal order.
+    :param cached_mask: boolean mask of cached proposals
+    :param cached_metrics: metric arrays of cached proposals
+    :param computed_metrics: metric arrays of remaining proposals
+    :return: dictionary of merged proposal-first metric arrays
+    """
+    if not (~cached_mask).any():
+        return cached_metrics
+
+    merged_metrics: Dict[str, npt.NDArray] = {}
+    for name in PROPOSAL_METRIC_NAMES:
+        computed_array = computed_metrics[name]
+        merged_array = np.empty(
+            (len(cached_mask),) + computed_array.shape[1:], dtype=computed_array.dtype
+        )
+        merged_array[~cached_mask] = computed_array
+        merged_array[cached_mask] = cached_metrics[name]
+        merged_metrics[name] = merged_array
+    return merged_metrics
@@ -1,6 +1,7 @@
 import gc
 import logging
 import os
+import time
 import uuid
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Union
@@ -15,6 +16,11 @@ from nuplan.planning.training.experiments.cache_metadata_entry import (
 from nuplan.planning.utils.multithreading.worker_pool import WorkerPool
 from nuplan.planning.utils.multithreading.worker_utils import worker_map
 
+from navsim.planning.metric_caching.metric_cache import (
+    METRIC_CACHE_FAILURE,
+    METRIC_CACHE_SUCCESS,
+    MetricCacheMetadataEntry,
+)
 from navsim.planning.metric_caching.metric_cache_processor import MetricCacheProcessor
 from navsim.planning.scenario_builder.navsim_scenario import NavSimScenario
 from navsim.common.dataloader import SceneLoader, SceneFilter
@@ -27,11 +33,13 @@ def cache_scenarios(args: List[Dict[str, Union[List[str], DictConfig]]]) -> List
     """
     Performs the caching of scenario DB files in parallel.
     :param args: A list of dicts containing the following items:
-        "scenario": the scenario as built by scenario_builder
+        "log_file": the log name of the tokens
+        "tokens": tokens of the log to cache
         "cfg": the DictConfig to use to process the file.
     :return: A dict with the statistics of the job. Contains the following keys:
         "successes": The number of successfully processed scenarios.
         "failures": The number of scenarios that couldn't be processed.
+        "cache_metadata": Metadata entry of each scenario, incl. errors of failed scenarios.
     """
 
     # Define a wrapper method to help with memory garbage collection.
@@ -62,16 +70,8 @@ def cache_scenarios(args: List[Dict[str, Union[List[str], DictConfig]]]) -> List
         log_names = [a["log_file"] for a in args]
         tokens = [t for a in args for t in a["tokens"]]
         cfg: DictConfig = args[0]["cfg"]
-
-        scene_filter: SceneFilter = instantiate(cfg.scene_filter)
-        scene_filter.log_names = log_names
-        scene_filter.tokens = tokens
-        scene_loader = SceneLoader(
-            sensor_blobs_path=None,
-            data_path=Path(cfg.navsim_log_path),
-            scene_filter=scene_filter,
-            sensor_config=SensorConfig.build_no_sensors(),
-        )
+        gc_interval: int = cfg.cache.get("gc_interval", 32)
+        start_time = time.perf_counter()
 
         # Create feature preprocessor
         assert (
@@ -81,26 +81,72 @@ def cache_scenarios(args: List[Dict[str, Union[List[str], DictConfig]]]) -> List
         processor = MetricCacheProcessor(
             cache_path=cfg.cache.cache_path,
             force_feature_computation=cfg.cache.force_feature_computation,
+            drivable_area_raster_resolution=cfg.cache.get("drivable_area_raster_resolution", 1.0),
+            compact_observation=cfg.cache.get("compact_observation", False),
+            map_cache_tile_size=cfg.cache.get("map_cache_tile_size", 50.0),
         )
 
+        # a corrupted log fails its tokens, instead of the whole task
+        try:
+            scene_filter: SceneFilter = instantiate(cfg.scene_filter)
+            scene_filter.log_names = log_names
+            scene_filter.tokens = tokens
+            scene_loader = SceneLoader(
+                sensor_blobs_path=None,
+                data_path=Path(cfg.navsim_log_path),
+                scene_filter=scene_filter,
+                sensor_config=SensorConfig.build_no_sensors(),
+            )
+            scene_frames_dicts = scene_loader.scene_frames_dicts
+        except Exception as e:
+            logger.exception(f"Failed to load scenes of logs {log_names} in thread_id={thread_id}, node_id={node_id}")
+            return [
+                CacheResult(
+                    failures=len(tokens),
+                    successes=0,
+                    cache_metadata=[
+                        MetricCacheMetadataEntry(None, token, METRIC_CACHE_FAILURE, _format_exception(e))
+                        for token in tokens
+                    ],
+                )
+            ]
+
         logger.info(
-            f"Extracted {len(scene_loader)} scenarios for thread_id={thread_id}, node_id={node_id}."
+            f"Extracted {len(scene_frames_dicts)} scenarios for thread_id={thread_id}, node_id={node_id}."
         )
         num_failures = 0
         num_successes = 0
-        all_file_cache_metadata: List[Optional[CacheMetadataEntry]] = []
-        for idx, scene_dict in enumerate(scene_loader.scene_frames_dicts.values()):
-            logger.info(
-                f"Processing scenario {idx + 1} / {len(scene_loader)} in thread_id={thread_id}, node_id={node_id}"
+        all_file_cache_metadata: List[MetricCacheMetadataEntry] = []
+        for idx, (token, scene_dict) in enumerate(scene_frames_dicts.items()):
+            logger.debug(
+                f"Processing scenario {idx + 1} / {len(scene_frames_dicts)} in thread_id={thread_id}, node_id={node_id}"
             )
-            file_cache_metadata = cache_single_scenario(scene_dict, processor)
-            gc.collect()
-
-            num_failures += 0 if file_cache_metadata else 1
-            num_successes += 1 if file_cache_metadata else 0
-            all_file_cache_metadata += [file_cache_metadata]
-
-        logger.info(f"Finished processing scenarios for thread_id={thread_id}, node_id={node_id}")
+            try:
+                file_cache_metadata = cache_single_scenario(scene_dict, processor)
+                metadata_entry = (
+                    MetricCacheMetadataEntry(file_cache_metadata.file_name, token)
+                    if file_cache_metadata
+                    else MetricCacheMetadataEntry(None, token, METRIC_CACHE_FAILURE)
+                )
+            except Exception as e:
+                logger.exception(f"Failed to cache scenario {token} in thread_id={thread_id}, node_id={node_id}")
+                metadata_entry = MetricCacheMetadataEntry(None, token, METRIC_CACHE_FAILURE, _format_exception(e))
+
+            # amortize garbage collection over several scenarios
+            if (idx + 1) % gc_interval == 0:
+                gc.collect()
+
+            is_success = metadata_entry.status == METRIC_CACHE_SUCCESS
+            num_failures += 0 if is_success else 1
+            num_successes += 1 if is_success else 0
+            all_file_cache_metadata += [metadata_entry]
+
+        elapsed_time = time.perf_counter() - start_time
+        logger.info(
+            f"Finished processing {len(all_file_cache_metadata)} scenarios ({num_failures} failed) in "
+            f"{elapsed_time:.1f}s ({len(all_file_cache_metadata) / max(elapsed_time, 1e-6):.2f} scenes/s) "
+            f"for thread_id={thread_id}, node_id={node_id}"
+        )
         return [
             CacheResult(
                 failures=num_failures,
@@ -117,6 +163,15 @@ def cache_scenarios(args: List[Dict[str, Union[List[str], DictConfig]]]) -> List
     return result
 
 
+def _format_exception(exception: Exception) -> str:
+    """
+    Formats an exception for the metadata csv.
+    :param exception: raised exception
+    :return: string of exception type and message
+    """
+    return f"{type(exception).__name__}: {exception}"
+
+
 def cache_data(cfg: DictConfig, worker: WorkerPool) -> None:
     """
     Build the lightning datamodule and cache all samples.
@@ -136,17 +191,22 @@ def cache_data(cfg: DictConfig, worker: WorkerPool) -> None:
         sensor_config=SensorConfig.build_no_sensors(),
     )
 
+    # split logs into bounded chunks of tokens, to balance the load across workers
+    tokens_per_task: Optional[int] = cfg.cache.get("tokens_per_task", 64)
     data_points = [
         {
             "cfg": cfg,
             "log_file": log_file,
-            "tokens": tokens_list,
+            "tokens": tokens_list[start_idx : start_idx + (tokens_per_task or len(tokens_list))],
         }
         for log_file, tokens_list in scene_loader.get_tokens_list_per_log().items()
+        for start_idx in range(0, len(tokens_list), tokens_per_task or len(tokens_list))
     ]
-    logger.info("Starting metric caching of %s files...", str(len(data_points)))
+    logger.info("Starting metric caching of %s tasks...", str(len(data_points)))
 
+    start_time = time.perf_counter()
     cache_results = worker_map(worker, cache_scenarios, data_points)
+    elapsed_time = time.perf_counter() - start_time
 
     num_success = sum(result.successes for result in cache_results)
     num_fail = sum(result.failures for result in cache_results)
@@ -162,7 +222,14 @@ def cache_data(cfg: DictConfig, worker: WorkerPool) -> None:
             str(num_fail),
             str(num_total),
         )
+    logger.info(
+        "Caching throughput: %.2f scenes/s in total, %.2f scenes/s per worker thread (%.1fs).",
+        num_total / max(elapsed_time, 1e-6),
+        num_total / max(elapsed_time * worker.number_of_threads, 1e-6),
+        elapsed_time,
+    )
 
+    # failed scenes are kept with their error, see MetricCacheMetadataEntry
     cached_metadata = [
         cache_metadata_entry
         for cache_result in cache_results
@@ -1,17 +1,25 @@
 from __future__ import annotations
 
+import csv
 import lzma
 import pickle
 from dataclasses import dataclass
 
-from typing import List
+from typing import Dict, List, Optional, Union
 from pathlib import Path
+
+import numpy as np
+import numpy.typing as npt
+from nuplan.planning.simulation.trajectory.trajectory_sampling import TrajectorySampling
 from nuplan.planning.simulation.trajectory.interpolated_trajectory import InterpolatedTrajectory
 from nuplan.common.actor_state.ego_state import EgoState
 
 from navsim.planning.simulation.planner.pdm_planner.observation.pdm_observation import (
     PDMObservation,
 )
+from navsim.planning.simulation.planner.pdm_planner.observation.pdm_compact_observation import (
+    PDMCompactObservation,
+)
 from navsim.planning.simulation.planner.pdm_planner.utils.pdm_path import PDMPath
 from navsim.planning.simulation.planner.pdm_planner.observation.pdm_occupancy_map import (
     PDMDrivableMap,
@@ -19,6 +27,38 @@ from navsim.planning.simulation.planner.pdm_planner.observation.pdm_occupancy_ma
 
 from nuplan.common.utils.io_utils import save_buffer
 
+# status of scenes in the metric cache metadata csv
+METRIC_CACHE_SUCCESS = "success"
+METRIC_CACHE_FAILURE = "failure"
+
+
+@dataclass
+class MetricCacheMetadataEntry:
+    """Metadata of a scene in the metric cache, incl. scenes failed during caching."""
+
+    file_name: Optional[Path]
+    token: str
+    status: str = METRIC_CACHE_SUCCESS
+    error: Optional[str] = None
+
+
+def load_metric_cache_paths(metadata_file: Path) -> Dict[str, str]:
+    """
+    Reads paths of successfully cached scenes from a metadata csv.
+    Supports legacy files with a single file_name column, where the token is the parent directory.
+    :param metadata_file: path to metadata csv
+    :return: dictionary of metric cache paths per token
+    """
+    metric_cache_paths: Dict[str, str] = {}
+    with open(str(metadata_file), "r", newline="") as f:
+        for row in csv.DictReader(f):
+            if row.get("status", METRIC_CACHE_SUCCESS) != METRIC_CACHE_SUCCESS:
+                continue
+            file_name = row["file_name"]
+            token = row.get("token") or file_name.split("/")[-2]
+            metric_cache_paths[token] = file_name
+    return metric_cache_paths
+
 
 @dataclass
 class MetricCache:
@@ -27,11 +67,15 @@ class MetricCache:
     trajectory: InterpolatedTrajectory
     ego_state: EgoState
 
-    observation: PDMObservation
+    observation: Union[PDMObservation, PDMCompactObservation]
     centerline: PDMPath
     route_lane_ids: List[str]
     drivable_area_map: PDMDrivableMap
 
+    # optional, trajectory interpolated as state array at the proposal sampling (e.g. for scoring)
+    trajectory_states: Optional[npt.NDArray[np.float64]] = None
+    trajectory_sampling: Optional[TrajectorySampling] = None
+
     def dump(self) -> None:
         # TODO: check if file_path must really be pickled
         pickle_object = pickle.dumps(self, protocol=pickle.HIGHEST_PROTOCOL)
@@ -1,5 +1,5 @@
 import pathlib
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 from nuplan.planning.training.experiments.cache_metadata_entry import CacheMetadataEntry
 from nuplan.planning.scenario_builder.abstract_scenario import AbstractScenario
@@ -23,21 +23,31 @@ from navsim.planning.simulation.planner.pdm_planner.proposal.batch_idm_policy im
 from navsim.planning.simulation.planner.pdm_planner.observation.pdm_observation import (
     PDMObservation,
 )
+from navsim.planning.simulation.planner.pdm_planner.observation.pdm_compact_observation import (
+    BOX_LENGTH_IDX,
+    BOX_SIZE,
+    BOX_WIDTH_IDX,
+    PDMCompactObservation,
+)
+from navsim.planning.simulation.planner.pdm_planner.utils.pdm_enums import SE2Index
 
+from navsim.planning.simulation.planner.pdm_planner.utils.pdm_map_cache import get_map_cache
 from navsim.planning.metric_caching.metric_cache import MetricCache
-from navsim.planning.metric_caching.metric_caching_utils import StateInterpolator
+from navsim.evaluate.pdm_score import get_trajectory_as_array
+from navsim.planning.metric_caching.metric_caching_utils import interpolate_state_arrays
 
 from nuplan.common.actor_state.agent import Agent
 from nuplan.common.actor_state.static_object import StaticObject
 
 import numpy as np
+import numpy.typing as npt
 
 from nuplan.common.actor_state.tracked_objects_types import (
     AGENT_TYPES,
 )
 from nuplan.common.actor_state.oriented_box import OrientedBox
 from nuplan.common.actor_state.state_representation import StateSE2, StateVector2D
-from nuplan.common.actor_state.tracked_objects import TrackedObjects
+from nuplan.common.actor_state.tracked_objects import TrackedObject, TrackedObjects
 
 
 class MetricCacheProcessor:
@@ -51,11 +61,17 @@ class MetricCacheProcessor:
         force_feature_computation: bool,
         future_traj_num_poses: int = 50,
         proposal_traj_num_poses: int = 40,
+        drivable_area_raster_resolution: Optional[float] = 1.0,
+        compact_observation: bool = False,
+        map_cache_tile_size: Optional[float] = 50.0,
     ):
         """
         Initialize class.
         :param cache_path: Whether to cache features.
         :param force_feature_computation: If true, even if cache exists, it will be overwritten.
+        :param drivable_area_raster_resolution: Cell size [m] of the drivable area raster, disabled if None.
+        :param compact_observation: Whether to store the observation as struct-of-arrays, see PDMCompactObservation.
+        :param map_cache_tile_size: Tile size [m] of map queries shared across scenes, see PDMMapCache, disabled if None.
         """
         self._cache_path = pathlib.Path(cache_path) if cache_path else None
         self._force_feature_computation = force_feature_computation
@@ -66,6 +82,9 @@ class MetricCacheProcessor:
         self._future_sampling = TrajectorySampling(num_poses=self.future_traj_num_poses, interval_length=0.1)
         self._proposal_sampling = TrajectorySampling(num_poses=self.proposal_traj_num_poses, interval_length=0.1)
         self._map_radius = 100
+        self._drivable_area_raster_resolution = drivable_area_raster_resolution
+        self._compact_observation = compact_observation
+        self._map_cache_tile_size = map_cache_tile_size
 
         self._pdm_closed = PDMClosedPlanner(
             trajectory_sampling=self._future_sampling,
@@ -91,11 +110,15 @@ class MetricCacheProcessor:
         :return: tuple of planner input and initialization objects
         """
 
-        # Initialize Planner
+        # Initialize Planner (map queries are shared with previous scenes of the worker)
+        map_api = scenario.map_api
+        if self._map_cache_tile_size is not None:
+            map_api = get_map_cache(map_api, self._map_cache_tile_size)
+
         planner_initialization = PlannerInitialization(
             route_roadblock_ids=scenario.get_route_roadblock_ids(),
             mission_goal=scenario.get_mission_goal(),
-            map_api=scenario.map_api,
+            map_api=map_api,
         )
 
         history = SimulationHistoryBuffer.initialize_from_list(
@@ -112,10 +135,21 @@ class MetricCacheProcessor:
 
         return planner_input, planner_initialization
 
-    def _interpolate_gt_observation(self, scenario: AbstractScenario) -> PDMObservation:
+    def _interpolate_gt_track_arrays(
+        self, scenario: AbstractScenario
+    ) -> Tuple[List[TrackedObject], npt.NDArray[np.float64], npt.NDArray[np.bool_], npt.NDArray[np.bool_]]:
+        """
+        Interpolates ground-truth detection tracks of the scenario to 10Hz, batched over all tracks.
+        :param scenario: scenario object of nuPlan
+        :return: tuple of
+            - initial tracked object of each track, in order of first detection
+            - interpolated (x, y, heading, velo_x, velo_y) of tracks, shape (T,N,5)
+            - whether track is observed at time-step, shape (T,N)
+            - whether track is observed only once (i.e. kept at all time-steps), shape (N,)
+        """
 
         # TODO: add to config
-        state_size = 6  # (time, x, y, heading, velo_x, velo_y)
+        state_size = 5  # (x, y, heading, velo_x, velo_y)
 
         time_horizon = float(self.future_traj_num_poses / 10) # [s]
         resolution_step = 0.5  # [s]
@@ -136,45 +170,44 @@ class MetricCacheProcessor:
             for iteration in gt_indices
         ]
 
-        detection_tracks_states: Dict[str, Any] = {}
-        unique_detection_tracks: Dict[str, Any] = {}
-
-        for time_s, detection_track in zip(relative_time_s, gt_detection_tracks):
+        # collect states of all tracks in a single (tracks, samples, states) array
+        token_to_track_idx: Dict[str, int] = {}
+        unique_detection_tracks: List[TrackedObject] = []
+        sample_states: List[List[Tuple[int, Tuple[float, ...]]]] = []
 
+        for sample_idx, detection_track in enumerate(gt_detection_tracks):
+            states = []
             for tracked_object in detection_track.tracked_objects:
-                # log detection track
                 token = tracked_object.track_token
 
-                # extract states for dynamic and static objects
-                tracked_state = np.zeros(state_size, dtype=np.float64)
-                tracked_state[:4] = (
-                    time_s,
-                    tracked_object.center.x,
-                    tracked_object.center.y,
-                    tracked_object.center.heading,
+                # found new object
+                if token not in token_to_track_idx:
+                    token_to_track_idx[token] = len(unique_detection_tracks)
+                    unique_detection_tracks.append(tracked_object)
+
+                # extract additional states for dynamic objects
+                velocity = (
+                    (tracked_object.velocity.x, tracked_object.velocity.y)
+                    if tracked_object.tracked_object_type in AGENT_TYPES
+                    else (0.0, 0.0)
                 )
-
-                if tracked_object.tracked_object_type in AGENT_TYPES:
-                    # extract additional states for dynamic objects
-                    tracked_state[4:] = (
-                        tracked_object.velocity.x,
-                        tracked_object.velocity.y,
+                states.append(
+                    (
+                        token_to_track_idx[token],
+                        (tracked_object.center.x, tracked_object.center.y, tracked_object.center.heading)
+                        + velocity,
                     )
+                )
+            sample_states.append(states)
 
-                # found new object
-                if token not in detection_tracks_states.keys():
-                    detection_tracks_states[token] = [tracked_state]
-                    unique_detection_tracks[token] = tracked_object
-
-                # object already existed
-                else:
-                    detection_tracks_states[token].append(tracked_state)
-
-        # create time interpolators
-        detection_interpolators: Dict[str, StateInterpolator] = {}
-        for token, states_list in detection_tracks_states.items():
-            states = np.array(states_list, dtype=np.float64)
-            detection_interpolators[token] = StateInterpolator(states)
+        num_tracks = len(unique_detection_tracks)
+        tracked_states = np.zeros((num_tracks, len(relative_time_s), state_size), dtype=np.float64)
+        tracked_valid = np.zeros((num_tracks, len(relative_time_s)), dtype=np.bool_)
+        for sample_idx, states in enumerate(sample_states):
+            if len(states) > 0:
+                track_idcs, values = zip(*states)
+                tracked_states[list(track_idcs), sample_idx] = values
+                tracked_valid[list(track_idcs), sample_idx] = True
 
         # interpolate at 10Hz
         interpolated_time_s = (
@@ -182,60 +215,151 @@ class MetricCacheProcessor:
             * interpolate_step
         )
 
+        if num_tracks == 0:
+            empty_shape = (len(interpolated_time_s), 0)
+            return (
+                [],
+                np.zeros(empty_shape + (state_size,), dtype=np.float64),
+                np.zeros(empty_shape, dtype=np.bool_),
+                np.zeros(0, dtype=np.bool_),
+            )
+
+        interpolated_states, interpolated_valid = interpolate_state_arrays(
+            relative_time_s, tracked_states, tracked_valid, interpolated_time_s
+        )
+
+        # objects observed once are kept at all time-steps
+        is_single_sample = tracked_valid.sum(axis=-1) == 1
+        interpolated_valid[is_single_sample] = True
+
+        return (
+            unique_detection_tracks,
+            interpolated_states.transpose(1, 0, 2),
+            interpolated_valid.transpose(1, 0),
+            is_single_sample,
+        )
+
+    def _interpolate_gt_observation(self, scenario: AbstractScenario) -> PDMObservation:
+        """
+        Creates observation of interpolated ground-truth detection tracks.
+        :param scenario: scenario object of nuPlan
+        :return: PDM's observation class
+        """
+        (
+            initial_detection_tracks,
+            interpolated_states,
+            interpolated_valid,
+            is_single_sample,
+        ) = self._interpolate_gt_track_arrays(scenario)
+
         interpolated_detection_tracks = []
-        for time_s in interpolated_time_s:
+        for time_idx in range(len(interpolated_valid)):
             interpolated_tracks = []
-            for token, interpolator in detection_interpolators.items():
-                initial_detection_track = unique_detection_tracks[token]
-                interpolated_state = interpolator.interpolate(time_s)
+            for track_idx in np.flatnonzero(interpolated_valid[time_idx]):
+                initial_detection_track = initial_detection_tracks[track_idx]
+                interpolated_state = interpolated_states[time_idx, track_idx]
 
-                if interpolator.start_time == interpolator.end_time:
+                if is_single_sample[track_idx]:
                     interpolated_tracks.append(initial_detection_track)
+                    continue
+
+                tracked_type = initial_detection_track.tracked_object_type
+                metadata = (
+                    initial_detection_track.metadata
+                )  # copied since time stamp is ignored
+
+                oriented_box = OrientedBox(
+                    StateSE2(*interpolated_state[:3]),
+                    initial_detection_track.box.length,
+                    initial_detection_track.box.width,
+                    initial_detection_track.box.height,
+                )
 
-                elif interpolated_state is not None:
-
-                    tracked_type = initial_detection_track.tracked_object_type
-                    metadata = (
-                        initial_detection_track.metadata
-                    )  # copied since time stamp is ignored
+                if tracked_type in AGENT_TYPES:
+                    velocity = StateVector2D(*interpolated_state[3:])
 
-                    oriented_box = OrientedBox(
-                        StateSE2(*interpolated_state[:3]),
-                        initial_detection_track.box.length,
-                        initial_detection_track.box.width,
-                        initial_detection_track.box.height,
+                    detection_track = Agent(
+                        tracked_object_type=tracked_type,
+                        oriented_box=oriented_box,
+                        velocity=velocity,
+                        metadata=initial_detection_track.metadata,  # simply copy
+                    )
+                else:
+                    detection_track = StaticObject(
+                        tracked_object_type=tracked_type,
+                        oriented_box=oriented_box,
+                        metadata=metadata,
                     )
 
-                    if tracked_type in AGENT_TYPES:
-                        velocity = StateVector2D(*interpolated_state[3:])
-
-                        detection_track = Agent(
-                            tracked_object_type=tracked_type,
-                            oriented_box=oriented_box,
-                            velocity=velocity,
-                            metadata=initial_detection_track.metadata,  # simply copy
-                        )
-                    else:
-                        detection_track = StaticObject(
-                            tracked_object_type=tracked_type,
-                            oriented_box=oriented_box,
-                            metadata=metadata,
-                        )
-
-                    interpolated_tracks.append(detection_track)
+                interpolated_tracks.append(detection_track)
             interpolated_detection_tracks.append(
                 DetectionsTracks(TrackedObjects(interpolated_tracks))
             )
 
         # convert to pdm observation
-        pdm_observation = PDMObservation(
+        pdm_observation = self._get_empty_observation()
+        pdm_observation.update_detections_tracks(interpolated_detection_tracks)
+        return pdm_observation
+
+    def _interpolate_gt_compact_observation(
+        self, scenario: AbstractScenario, origin: npt.NDArray[np.float64]
+    ) -> PDMCompactObservation:
+        """
+        Creates compact observation of interpolated ground-truth detection tracks, without intermediate objects.
+        Equivalent to converting _interpolate_gt_observation with PDMCompactObservation.from_observation.
+        :param scenario: scenario object of nuPlan
+        :param origin: global (x,y) origin of the compact boxes
+        :return: PDMCompactObservation object
+        """
+        initial_detection_tracks, interpolated_states, interpolated_valid, _ = self._interpolate_gt_track_arrays(
+            scenario
+        )
+        global_to_local_idcs = self._get_empty_observation()._global_to_local_idcs
+        assert len(interpolated_valid) == len(
+            global_to_local_idcs
+        ), f"Expected observation length {len(global_to_local_idcs)}, but got {len(interpolated_valid)}"
+
+        # order tracks as unique objects of PDMObservation, i.e. by first appearance and type (see TrackedObjects)
+        types = np.array(
+            [track.tracked_object_type.value for track in initial_detection_tracks], dtype=np.int8
+        )
+        first_time_idcs = np.argmax(interpolated_valid, axis=0)
+        track_order = np.lexsort((np.arange(len(types)), types, first_time_idcs))
+        interpolated_states = interpolated_states[:, track_order]
+        interpolated_valid = interpolated_valid[:, track_order]
+        initial_detection_tracks = [initial_detection_tracks[track_idx] for track_idx in track_order]
+        first_states = interpolated_states[first_time_idcs[track_order], np.arange(len(track_order))]
+
+        boxes = np.zeros(interpolated_valid.shape + (BOX_SIZE,), dtype=np.float64)
+        boxes[..., : SE2Index.HEADING + 1] = interpolated_states[..., : SE2Index.HEADING + 1]
+        boxes[..., : SE2Index.HEADING] -= origin
+        boxes[..., BOX_LENGTH_IDX] = [track.box.length for track in initial_detection_tracks]
+        boxes[..., BOX_WIDTH_IDX] = [track.box.width for track in initial_detection_tracks]
+        boxes[~interpolated_valid] = 0.0
+
+        return PDMCompactObservation(
+            tokens=[track.track_token for track in initial_detection_tracks],
+            types=types[track_order],
+            velocities=first_states[:, SE2Index.HEADING + 1 :].copy(),
+            headings=first_states[:, SE2Index.HEADING].copy(),
+            boxes=boxes.astype(np.float32),
+            valid=interpolated_valid,
+            origin=np.asarray(origin, dtype=np.float64),
+            global_to_local_idcs=list(global_to_local_idcs),
+            collided_track_ids=[],
+        )
+
+    def _get_empty_observation(self) -> PDMObservation:
+        """
+        Creates observation with the sampling parameters of the metric cache, before updating.
+        :return: PDM's observation class
+        """
+        return PDMObservation(
             self._future_sampling,
             self._proposal_sampling,
             self._map_radius,
             observation_sample_res=1,
         )
-        pdm_observation.update_detections_tracks(interpolated_detection_tracks)
-        return pdm_observation
 
     def compute_metric_cache(self, scenario: AbstractScenario) -> Optional[CacheMetadataEntry]:
 
@@ -255,7 +379,32 @@ class MetricCacheProcessor:
         self._pdm_closed.initialize(planner_initialization)
         pdm_closed_trajectory = self._pdm_closed.compute_planner_trajectory(planner_input)
 
-        observation = self._interpolate_gt_observation(scenario)
+        # pre-sample reference trajectory, identical for all evaluated trajectories of the scene
+        trajectory_states = get_trajectory_as_array(
+            pdm_closed_trajectory, self._proposal_sampling, scenario.initial_ego_state.time_point
+        )
+
+        if self._compact_observation:
+            ego_center = scenario.initial_ego_state.center
+            observation = self._interpolate_gt_compact_observation(
+                scenario, origin=np.array([ego_center.x, ego_center.y], dtype=np.float64)
+            )
+        else:
+            observation = self._interpolate_gt_observation(scenario)
+
+        # rasterize drivable area around ego for faster point-in-polygon queries while scoring
+        drivable_area_map = self._pdm_closed._drivable_area_map
+        if self._drivable_area_raster_resolution is not None:
+            ego_center = scenario.initial_ego_state.center
+            drivable_area_map.build_raster(
+                self._drivable_area_raster_resolution,
+                extent=(
+                    ego_center.x - self._map_radius,
+                    ego_center.y - self._map_radius,
+                    ego_center.x + self._map_radius,
+                    ego_center.y + self._map_radius,
+                ),
+            )
 
         # save and dump features
         MetricCache(
@@ -265,7 +414,9 @@ class MetricCacheProcessor:
             observation,
             self._pdm_closed._centerline,
             list(self._pdm_closed._route_lane_dict.keys()),
-            self._pdm_closed._drivable_area_map,
+            drivable_area_map,
+            trajectory_states,
+            self._proposal_sampling,
         ).dump()
 
         # return metadata
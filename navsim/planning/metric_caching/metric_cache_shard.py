@@ -0,0 +1,279 @@
+from __future__ import annotations
+
+import json
+import lzma
+import os
+import pickle
+import struct
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Tuple, Type
+
+from navsim.planning.metric_caching.metric_cache import MetricCache
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+# file layout of a shard:
+#   header: magic, format version, codec name
+#   records: compressed pickles of metric caches, back-to-back
+#   index: json of token, offset, length, and relative file name of each record
+#   footer: offset and length of the index, magic
+SHARD_FILE_SUFFIX = ".mcshard"
+SHARD_DIR_NAME = "shards"
+
+_MAGIC = b"NAVSIMMC"
+_VERSION = 1
+_HEADER = struct.Struct("<8sI8s")
+_FOOTER = struct.Struct("<QQ8s")
+
+
+def _get_codec(codec: str) -> Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]:
+    """
+    Retrieves compression and decompression function of a codec.
+    :param codec: name of codec, i.e. zstd, lz4 or lzma
+    :return: tuple of compress and decompress function
+    """
+    if codec == "zstd":
+        assert zstandard is not None, "MetricCacheShard: Codec zstd requires the zstandard package!"
+        # module-level functions, since (de)compressor objects are not thread-safe
+        return (lambda buffer: zstandard.compress(buffer, 3)), zstandard.decompress
+    if codec == "lz4":
+        assert lz4_frame is not None, "MetricCacheShard: Codec lz4 requires the lz4 package!"
+        return lz4_frame.compress, lz4_frame.decompress
+    if codec == "lzma":
+        return (lambda buffer: lzma.compress(buffer, preset=0)), lzma.decompress
+    raise ValueError(f"MetricCacheShard: Unknown codec {codec}!")
+
+
+def get_default_codec() -> str:
+    """
+    Retrieves the fastest available codec, falls back to lzma of the legacy metric cache.
+    :return: name of codec
+    """
+    if zstandard is not None:
+        return "zstd"
+    if lz4_frame is not None:
+        return "lz4"
+    return "lzma"
+
+
+class MetricCacheShardWriter:
+    """
+    Writes metric caches of a log into a single shard file with an offset index, for random access by token.
+    The shard is written to a temporary file and moved to its path on close, thus incomplete shards are never read.
+    """
+
+    def __init__(self, shard_path: Path, codec: Optional[str] = None):
+        """
+        Constructor of MetricCacheShardWriter
+        :param shard_path: path of the shard file
+        :param codec: compression of records (zstd, lz4 or lzma), defaults to fastest available
+        """
+        self._shard_path = Path(shard_path)
+        self._codec = codec or get_default_codec()
+        self._compress, _ = _get_codec(self._codec)
+
+        self._shard_path.parent.mkdir(parents=True, exist_ok=True)
+        file_descriptor, self._temp_path = tempfile.mkstemp(
+            dir=self._shard_path.parent, suffix=f"{SHARD_FILE_SUFFIX}.tmp"
+        )
+        self._file: BinaryIO = os.fdopen(file_descriptor, "wb")
+        self._file.write(_HEADER.pack(_MAGIC, _VERSION, self._codec.encode()))
+        self._index: Dict[str, Tuple[int, int, str]] = {}
+
+    def __enter__(self) -> MetricCacheShardWriter:
+        """Enters context of the writer."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        """Closes the shard, or removes the incomplete shard on exceptions."""
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+            os.remove(self._temp_path)
+
+    def __len__(self) -> int:
+        """
+        Number of records written to the shard
+        :return: int
+        """
+        return len(self._index)
+
+    def add_pickle(self, token: str, pickle_object: bytes, file_name: str = "") -> None:
+        """
+        Adds a pickled metric cache to the shard, e.g. decompressed from a legacy cache file.
+        :param token: scene token
+        :param pickle_object: pickled MetricCache object
+        :param file_name: relative path of the legacy cache file (for unpacking), defaults to empty
+        """
+        assert token not in self._index, f"MetricCacheShard: Token {token} already in shard!"
+        record = self._compress(pickle_object)
+        self._index[token] = (self._file.tell(), len(record), file_name)
+        self._file.write(record)
+
+    def add(self, token: str, metric_cache: MetricCache, file_name: str = "") -> None:
+        """
+        Adds a metric cache to the shard.
+        :param token: scene token
+        :param metric_cache: MetricCache object
+        :param file_name: relative path of the legacy cache file (for unpacking), defaults to empty
+        """
+        self.add_pickle(token, pickle.dumps(metric_cache, protocol=pickle.HIGHEST_PROTOCOL), file_name)
+
+    def close(self) -> None:
+        """Writes index and footer, and moves the shard to its path."""
+        tokens = list(self._index.keys())
+        index = json.dumps(
+            {
+                "tokens": tokens,
+                "offsets": [self._index[token][0] for token in tokens],
+                "lengths": [self._index[token][1] for token in tokens],
+                "file_names": [self._index[token][2] for token in tokens],
+            }
+        ).encode()
+        index_offset = self._file.tell()
+        self._file.write(index)
+        self._file.write(_FOOTER.pack(index_offset, len(index), _MAGIC))
+        self._file.close()
+        os.replace(self._temp_path, self._shard_path)
+
+
+class MetricCacheShardReader:
+    """
+    Random access to metric caches of a shard file, i.e. a single positional read per token.
+    Reads are thread-safe. The file handle is opened lazily, thus readers can be pickled (e.g. for dataloader workers).
+    """
+
+    def __init__(self, shard_path: Path):
+        """
+        Constructor of MetricCacheShardReader
+        :param shard_path: path of the shard file
+        """
+        self._shard_path = Path(shard_path)
+
+        with open(self._shard_path, "rb") as f:
+            magic, version, codec = _HEADER.unpack(f.read(_HEADER.size))
+            assert magic == _MAGIC, f"MetricCacheShard: {self._shard_path} is not a metric cache shard!"
+            assert version == _VERSION, f"MetricCacheShard: Unsupported shard version {version}!"
+
+            f.seek(-_FOOTER.size, os.SEEK_END)
+            index_offset, index_length, magic = _FOOTER.unpack(f.read(_FOOTER.size))
+            assert magic == _MAGIC, f"MetricCacheShard: {self._shard_path} is incomplete!"
+            f.seek(index_offset)
+            index = json.loads(f.read(index_length))
+
+        self._codec: str = codec.rstrip(b"\x00").decode()
+        self._index: Dict[str, Tuple[int, int]] = {
+            token: (offset, length)
+            for token, offset, length in zip(index["tokens"], index["offsets"], index["lengths"])
+        }
+        self._file_names: List[str] = index["file_names"]
+
+        # lazy loaded
+        self._decompress: Optional[Callable[[bytes], bytes]] = None
+        self._file: Optional[BinaryIO] = None
+        self._lock = threading.Lock()
+
+    def __reduce__(self) -> Tuple[Type[MetricCacheShardReader], Tuple[Any, ...]]:
+        """Helper for pickling (without file handle)."""
+        return self.__class__, (self._shard_path,)
+
+    def __del__(self) -> None:
+        """Closes the file handle."""
+        if getattr(self, "_file", None) is not None:
+            self._file.close()
+
+    def __len__(self) -> int:
+        """
+        Number of records in the shard
+        :return: int
+        """
+        return len(self._index)
+
+    def __contains__(self, token: str) -> bool:
+        """
+        Checks whether token is in the shard
+        :param token: scene token
+        :return: boolean
+        """
+        return token in self._index
+
+    @property
+    def shard_path(self) -> Path:
+        """
+        Getter for path of the shard file
+        :return: path
+        """
+        return self._shard_path
+
+    @property
+    def codec(self) -> str:
+        """
+        Getter for compression of records
+        :return: name of codec
+        """
+        return self._codec
+
+    @property
+    def tokens(self) -> List[str]:
+        """
+        Getter for tokens in the shard
+        :return: list of scene tokens
+        """
+        return list(self._index.keys())
+
+    @property
+    def file_names(self) -> Dict[str, str]:
+        """
+        Getter for relative paths of the legacy cache files
+        :return: dictionary of relative paths per token
+        """
+        return dict(zip(self._index.keys(), self._file_names))
+
+    def get_pickle(self, token: str) -> bytes:
+        """
+        Reads the pickled metric cache of a token.
+        :param token: scene token
+        :return: pickled MetricCache object
+        """
+        if self._file is None:
+            with self._lock:
+                if self._file is None:
+                    _, self._decompress = _get_codec(self._codec)
+                    self._file = open(self._shard_path, "rb")
+
+        # positional read, i.e. no shared file position between threads
+        offset, length = self._index[token]
+        return self._decompress(os.pread(self._file.fileno(), length, offset))
+
+    def get(self, token: str) -> MetricCache:
+        """
+        Reads the metric cache of a token.
+        :param token: scene token
+        :return: MetricCache object
+        """
+        return pickle.loads(self.get_pickle(token))
+
+
+def load_metric_cache_shards(shard_dir: Path) -> Dict[str, MetricCacheShardReader]:
+    """
+    Opens all shards of a directory.
+    :param shard_dir: directory of shard files
+    :return: dictionary of shard readers per token
+    """
+    shard_readers: Dict[str, MetricCacheShardReader] = {}
+    for shard_path in sorted(Path(shard_dir).glob(f"*{SHARD_FILE_SUFFIX}")):
+        shard_reader = MetricCacheShardReader(shard_path)
+        for token in shard_reader.tokens:
+            shard_readers[token] = shard_reader
+    return shard_readers
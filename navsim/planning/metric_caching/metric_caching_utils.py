@@ -6,6 +6,7 @@ import numpy as np
 import numpy.typing as npt
 
 from scipy.interpolate import interp1d
+from navsim.planning.simulation.planner.pdm_planner.utils.pdm_enums import SE2Index
 from navsim.planning.simulation.planner.pdm_planner.utils.pdm_geometry_utils import (
     normalize_angle,
 )
@@ -50,3 +51,55 @@ class StateInterpolator:
             return interpolated_state
             
         return None
+
+
+def interpolate_state_arrays(
+    time_s: npt.NDArray[np.float64],
+    states: npt.NDArray[np.float64],
+    valid: npt.NDArray[np.bool_],
+    interpolation_time_s: npt.NDArray[np.float64],
+) -> Tuple[npt.NDArray[np.float64], npt.NDArray[np.bool_]]:
+    """
+    Batched equivalent of StateInterpolator, i.e. interpolates all tracks at all times in a single pass.
+    Each track is interpolated between its valid samples, with unwrapped heading as in StateInterpolator.
+    :param time_s: [s] time of samples, shape (S,)
+    :param states: states of (x, y, heading, ...) per track and sample, shape (N,S,D)
+    :param valid: whether track is observed at sample, each track at least once, shape (N,S)
+    :param interpolation_time_s: [s] time of interpolated states, shape (T,)
+    :return: interpolated states, shape (N,T,D), and whether time is within samples of track, shape (N,T)
+    """
+    num_tracks, num_samples = valid.shape
+    num_valid = valid.sum(axis=-1)
+    assert np.all(num_valid > 0), "interpolate_state_arrays: Tracks without valid samples!"
+
+    # move valid samples of each track to the front (in temporal order)
+    track_idcs = np.arange(num_tracks)[:, None]
+    sample_idcs = np.argsort(~valid, axis=-1, kind="stable")
+    is_knot = np.arange(num_samples)[None] < num_valid[:, None]
+    knot_times = np.where(is_knot, time_s[sample_idcs], np.inf)
+    knot_states = states[track_idcs, sample_idcs]
+    knot_states[..., SE2Index.HEADING] = np.unwrap(knot_states[..., SE2Index.HEADING], axis=-1)
+
+    # linear interpolation between neighboring samples (as in scipy's interp1d)
+    upper_idcs = (knot_times[:, :, None] < interpolation_time_s[None, None]).sum(axis=1)
+    upper_idcs = np.clip(upper_idcs, 1, np.maximum(num_valid - 1, 1)[:, None])
+    lower_idcs = upper_idcs - 1
+    lower_times, upper_times = knot_times[track_idcs, lower_idcs], knot_times[track_idcs, upper_idcs]
+    lower_states, upper_states = knot_states[track_idcs, lower_idcs], knot_states[track_idcs, upper_idcs]
+
+    with np.errstate(invalid="ignore"):
+        slopes = (upper_states - lower_states) / (upper_times - lower_times)[..., None]
+        interpolated_states = slopes * (interpolation_time_s[None] - lower_times)[..., None] + lower_states
+
+    interpolated_states[..., SE2Index.HEADING] = normalize_angle(interpolated_states[..., SE2Index.HEADING])
+
+    # tracks with a single sample keep their state
+    single_sample = num_valid == 1
+    interpolated_states[single_sample] = knot_states[single_sample, :1]
+
+    start_times = knot_times[:, 0]
+    end_times = knot_times[np.arange(num_tracks), num_valid - 1]
+    interpolated_valid = (start_times[:, None] <= interpolation_time_s[None]) & (
+        interpolation_time_s[None] <= end_times[:, None]
+    )
+    return interpolated_states, interpolated_valid
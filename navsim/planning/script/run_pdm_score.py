@@ -11,8 +11,6 @@ from typing import Any, Dict, List, Union, Tuple
 from dataclasses import asdict
 from datetime import datetime
 import logging
-import lzma
-import pickle
 import os
 import uuid
 
@@ -23,6 +21,7 @@ from navsim.planning.script.builders.worker_pool_builder import build_worker
 from navsim.common.dataloader import MetricCacheLoader
 from navsim.agents.abstract_agent import AbstractAgent
 from navsim.evaluate.pdm_score import pdm_score
+from navsim.evaluate.pdm_score_cache import PDMSimulationCache
 from navsim.planning.simulation.planner.pdm_planner.simulation.pdm_simulator import (
     PDMSimulator
 )
@@ -125,17 +124,28 @@ def run_pdm_score(args: List[Dict[str, Union[List[str], DictConfig]]]) -> List[D
         sensor_config=agent.get_sensor_config(),
     )
 
+    simulation_cache = None
+    if cfg.get("simulation_cache_path") is not None:
+        simulation_cache = PDMSimulationCache.from_simulator(
+            Path(cfg.simulation_cache_path), simulator, simulator.proposal_sampling
+        )
+
     tokens_to_evaluate = list(set(scene_loader.tokens) & set(metric_cache_loader.tokens))
     pdm_results: List[Dict[str, Any]] = []
-    for idx, (token) in enumerate(tokens_to_evaluate):
+
+    # decode upcoming metric caches in background threads, while scoring the current token
+    metric_cache_iterator = metric_cache_loader.iter_from_tokens(
+        tokens_to_evaluate,
+        num_workers=cfg.get("metric_cache_workers", 4),
+        num_prefetch=cfg.get("metric_cache_prefetch", 8),
+    )
+    for idx, (token, metric_cache_future) in enumerate(metric_cache_iterator):
         logger.info(
             f"Processing scenario {idx + 1} / {len(tokens_to_evaluate)} in thread_id={thread_id}, node_id={node_id}"
         )
         score_row: Dict[str, Any] = {"token": token, "valid": True}
         try:
-            metric_cache_path = metric_cache_loader.metric_cache_paths[token]
-            with lzma.open(metric_cache_path, "rb") as f:
-                metric_cache: MetricCache = pickle.load(f)
+            metric_cache: MetricCache = metric_cache_future.result()
             
             use_future_frames = agent.config.use_fut_frames if hasattr(agent.config, 'use_fut_frames') else False
             agent_input = scene_loader.get_agent_input_from_token(token, use_fut_frames=use_future_frames)
@@ -151,6 +161,8 @@ def run_pdm_score(args: List[Dict[str, Union[List[str], DictConfig]]]) -> List[D
                 future_sampling=simulator.proposal_sampling,
                 simulator=simulator,
                 scorer=scorer,
+                simulation_cache=simulation_cache,
+                token=token,
             )
             score_row.update(asdict(pdm_result))
         except Exception as e:
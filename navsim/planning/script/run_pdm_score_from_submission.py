@@ -41,6 +41,8 @@ def main(cfg: DictConfig) -> None:
         simulator=simulator,
         scorer=scorer,
         metric_cache_path=metric_cache_path,
+        metric_cache_workers=cfg.get("metric_cache_workers", 4),
+        metric_cache_prefetch=cfg.get("metric_cache_prefetch", 8),
     )
 
 def run_pdm_score(
@@ -48,6 +50,8 @@ def run_pdm_score(
     simulator: PDMSimulator,
     scorer: PDMScorer,
     metric_cache_path: Path,
+    metric_cache_workers: int = 4,
+    metric_cache_prefetch: int = 8,
 ) -> None:
     """
     Function to evaluate an agent with the PDM-Score
@@ -55,6 +59,8 @@ def run_pdm_score(
     :param data_path: pathlib path to navsim logs
     :param metric_cache_path: pathlib path to metric cache
     :param save_path: pathlib path to folder where scores are stored as .csv
+    :param metric_cache_workers: number of threads decoding metric caches ahead of scoring
+    :param metric_cache_prefetch: maximum number of metric caches decoded ahead of scoring
     """    
     logger.info("Building SceneLoader")
     metric_cache_loader = MetricCacheLoader(metric_cache_path)
@@ -62,11 +68,17 @@ def run_pdm_score(
         agent_output: Dict[str, Trajectory] = pickle.load(f)["predictions"]
     
     score_rows: List[Dict[str, Any]] = []
-    for token in tqdm(metric_cache_loader.tokens, desc="Compute PDM-Score"):
+    # decode upcoming metric caches in background threads, while scoring the current token
+    metric_cache_iterator = metric_cache_loader.iter_from_tokens(
+        metric_cache_loader.tokens, num_workers=metric_cache_workers, num_prefetch=metric_cache_prefetch
+    )
+    for token, metric_cache_future in tqdm(
+        metric_cache_iterator, total=len(metric_cache_loader), desc="Compute PDM-Score"
+    ):
         score_row: Dict[str, Any] = {"token": token, "valid": True}
 
         try:
-            metric_cache = metric_cache_loader.get_from_token(token)
+            metric_cache = metric_cache_future.result()
             trajectory = agent_output[token]
             pdm_result = pdm_score(
                 metric_cache=metric_cache,
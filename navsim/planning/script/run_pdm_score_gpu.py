@@ -11,8 +11,6 @@ from typing import Any, Dict, List, Union, Tuple
 from dataclasses import asdict
 from datetime import datetime
 import logging
-import lzma
-import pickle
 import os
 import uuid
 
@@ -136,9 +134,7 @@ def run_pdm_score(args: List[Dict[str, Union[List[str], DictConfig]]], device: t
         )
         score_row: Dict[str, Any] = {"token": token, "valid": True}
         try:
-            metric_cache_path = metric_cache_loader.metric_cache_paths[token]
-            with lzma.open(metric_cache_path, "rb") as f:
-                metric_cache: MetricCache = pickle.load(f)
+            metric_cache: MetricCache = metric_cache_loader.get_from_token(token)
 
             agent_input = scene_loader.get_agent_input_from_token(token)
             if agent.requires_scene:
@@ -106,7 +106,7 @@ class AbstractPDMPlanner(AbstractPlanner, ABC):
         )
         roadblock_window = roadblocks[start_idx : start_idx + search_depth]
 
-        graph_search = Dijkstra(current_lane, list(self._route_lane_dict.keys()))
+        graph_search = Dijkstra(current_lane, list(self._route_lane_dict.keys()), self._map_api)
         route_plan, path_found = graph_search.search(roadblock_window[-1])
 
         centerline_discrete_path: List[StateSE2] = []
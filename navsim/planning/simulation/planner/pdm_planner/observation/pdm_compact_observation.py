@@ -0,0 +1,271 @@
+from __future__ import annotations
+
+from typing import Any, List, Optional, Tuple, Type
+
+import numpy as np
+import numpy.typing as npt
+import shapely.creation
+from nuplan.common.actor_state.tracked_objects_types import AGENT_TYPES
+
+from navsim.planning.simulation.planner.pdm_planner.observation.pdm_observation import (
+    PDMObservation,
+    PDMTrackArrays,
+)
+from navsim.planning.simulation.planner.pdm_planner.observation.pdm_occupancy_map import (
+    PDMOccupancyMap,
+)
+from navsim.planning.simulation.planner.pdm_planner.utils.pdm_enums import SE2Index
+
+# box representation of the compact observation (x, y, heading, length, width)
+BOX_SIZE = 5
+BOX_LENGTH_IDX, BOX_WIDTH_IDX = 3, 4
+
+# stopped speed threshold of nuPlan's is_track_stopped
+STOPPED_SPEED_THRESHOLD = 5e-02  # [m/s]
+
+
+def boxes_to_corners(boxes: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
+    """
+    Converts oriented boxes to corners in nuPlan's order (FL, RL, RR, FR).
+    :param boxes: array of (x, y, heading, length, width), shape (...,5)
+    :return: corner coordinates, shape (...,4,2)
+    """
+    centers = boxes[..., : SE2Index.HEADING]
+    cos, sin = np.cos(boxes[..., SE2Index.HEADING]), np.sin(boxes[..., SE2Index.HEADING])
+    half_length = boxes[..., BOX_LENGTH_IDX] / 2.0
+    half_width = boxes[..., BOX_WIDTH_IDX] / 2.0
+
+    longitudinal = np.stack([cos, sin], axis=-1) * half_length[..., None]
+    lateral = np.stack([-sin, cos], axis=-1) * half_width[..., None]
+
+    return np.stack(
+        [
+            centers + longitudinal + lateral,
+            centers - longitudinal + lateral,
+            centers - longitudinal - lateral,
+            centers + longitudinal - lateral,
+        ],
+        axis=-2,
+    )
+
+
+def corners_to_boxes(corners: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
+    """
+    Converts corners in nuPlan's order (FL, RL, RR, FR) to oriented boxes.
+    :param corners: corner coordinates, shape (...,4,2)
+    :return: array of (x, y, heading, length, width), shape (...,5)
+    """
+    front_left, rear_left, front_right = corners[..., 0, :], corners[..., 1, :], corners[..., 3, :]
+    longitudinal = front_left - rear_left
+
+    boxes = np.zeros(corners.shape[:-2] + (BOX_SIZE,), dtype=np.float64)
+    boxes[..., : SE2Index.HEADING] = corners.mean(axis=-2)
+    boxes[..., SE2Index.HEADING] = np.arctan2(longitudinal[..., 1], longitudinal[..., 0])
+    boxes[..., BOX_LENGTH_IDX] = np.linalg.norm(longitudinal, axis=-1)
+    boxes[..., BOX_WIDTH_IDX] = np.linalg.norm(front_left - front_right, axis=-1)
+    return boxes
+
+
+class PDMCompactObservation:
+    """
+    Struct-of-arrays representation of PDMObservation, e.g. for compact metric caches.
+    Tracks are stored column-wise, i.e. the column index is the integer id of a track token.
+    Provides the interface of PDMObservation used for scoring. Occupancy maps are rebuilt lazily.
+    """
+
+    def __init__(
+        self,
+        tokens: List[str],
+        types: npt.NDArray[np.int8],
+        velocities: npt.NDArray[np.float64],
+        headings: npt.NDArray[np.float64],
+        boxes: npt.NDArray[np.float32],
+        valid: npt.NDArray[np.bool_],
+        origin: npt.NDArray[np.float64],
+        global_to_local_idcs: List[int],
+        collided_track_ids: List[str],
+        red_light_token: str = "red_light",
+    ):
+        """
+        Constructor of PDMCompactObservation
+        :param tokens: unique track tokens, shape (N,)
+        :param types: value of TrackedObjectType of each track, shape (N,)
+        :param velocities: [m/s] initial velocity of each track, zero for non-agents, shape (N,2)
+        :param headings: [rad] initial heading of each track, shape (N,)
+        :param boxes: (x, y, heading, length, width) relative to origin for each time-step, shape (T,N,5)
+        :param valid: whether track is observed at time-step, shape (T,N)
+        :param origin: global (x,y) coordinates of box origin, shape (2,)
+        :param global_to_local_idcs: time index of boxes for each simulation iteration [10Hz]
+        :param collided_track_ids: past collided track tokens
+        :param red_light_token: red light token indicator, defaults to "red_light"
+        """
+        assert (
+            boxes.shape[:2] == valid.shape and boxes.shape[-1] == BOX_SIZE
+        ), "PDMCompactObservation: Boxes must have shape (T,N,5) and match valid mask!"
+        assert (
+            len(tokens) == len(types) == len(velocities) == len(headings) == boxes.shape[1]
+        ), "PDMCompactObservation: Number of tracks does not match!"
+
+        self._tokens = tokens
+        self._types = types
+        self._velocities = velocities
+        self._headings = headings
+        self._boxes = boxes
+        self._valid = valid
+        self._origin = origin
+        self._global_to_local_idcs = global_to_local_idcs
+        self._collided_track_ids = collided_track_ids
+        self._red_light_token = red_light_token
+
+        # lazy loaded
+        self._occupancy_maps: List[Optional[PDMOccupancyMap]] = [None] * len(valid)
+        self._track_arrays: Optional[PDMTrackArrays] = None
+
+    def __reduce__(self) -> Tuple[Type[PDMCompactObservation], Tuple[Any, ...]]:
+        """Helper for pickling (without lazy loaded spatial indices)."""
+        return self.__class__, (
+            self._tokens,
+            self._types,
+            self._velocities,
+            self._headings,
+            self._boxes,
+            self._valid,
+            self._origin,
+            self._global_to_local_idcs,
+            self._collided_track_ids,
+            self._red_light_token,
+        )
+
+    @classmethod
+    def from_observation(
+        cls, observation: PDMObservation, origin: Optional[npt.NDArray[np.float64]] = None
+    ) -> PDMCompactObservation:
+        """
+        Converts an observation with box geometries of tracked objects (e.g. in the metric cache).
+        :param observation: PDM's observation class
+        :param origin: global (x,y) origin of the compact boxes, defaults to center of first box
+        :return: PDMCompactObservation object
+        """
+        track_arrays = observation.track_arrays
+        occupancy_maps = observation.occupancy_maps
+        num_tracks = len(track_arrays)
+
+        boxes = np.zeros((len(occupancy_maps), num_tracks, BOX_SIZE), dtype=np.float64)
+        valid = np.zeros((len(occupancy_maps), num_tracks), dtype=np.bool_)
+        for local_idx, occupancy_map in enumerate(occupancy_maps):
+            track_idcs = observation.get_track_indices(
+                observation._global_to_local_idcs.index(local_idx)
+            )
+            corners = occupancy_map.corners
+            assert np.all(track_idcs >= 0) and np.isfinite(corners).all(), (
+                "PDMCompactObservation: Only box geometries of tracked objects are supported!"
+            )
+            boxes[local_idx, track_idcs] = corners_to_boxes(corners)
+            valid[local_idx, track_idcs] = True
+
+        if origin is None:
+            origin = boxes[valid][0, : SE2Index.HEADING] if valid.any() else np.zeros(2)
+        boxes[..., : SE2Index.HEADING] -= origin
+        boxes[~valid] = 0.0
+
+        unique_objects = observation.unique_objects
+        return PDMCompactObservation(
+            tokens=list(track_arrays.tokens),
+            types=np.array(
+                [unique_objects[token].tracked_object_type.value for token in track_arrays.tokens],
+                dtype=np.int8,
+            ),
+            velocities=track_arrays.velocities,
+            headings=track_arrays.headings,
+            boxes=boxes.astype(np.float32),
+            valid=valid,
+            origin=np.asarray(origin, dtype=np.float64),
+            global_to_local_idcs=list(observation._global_to_local_idcs),
+            collided_track_ids=list(observation.collided_track_ids),
+            red_light_token=observation.red_light_token,
+        )
+
+    def __getitem__(self, time_idx) -> PDMOccupancyMap:
+        """
+        Retrieves occupancy map for time_idx and adapt temporal resolution (lazy loaded).
+        :param time_idx: index for future simulation iterations [10Hz]
+        :return: occupancy map
+        """
+        assert (
+            0 <= time_idx < len(self._global_to_local_idcs)
+        ), f"PDMCompactObservation: index {time_idx} out of range!"
+
+        local_idx = self._global_to_local_idcs[time_idx]
+        if self._occupancy_maps[local_idx] is None:
+            track_idcs = np.flatnonzero(self._valid[local_idx])
+            corners = self.get_corners(local_idx)[track_idcs]
+            self._occupancy_maps[local_idx] = PDMOccupancyMap(
+                [self._tokens[track_idx] for track_idx in track_idcs],
+                shapely.creation.polygons(corners),
+                corners=corners,
+            )
+        return self._occupancy_maps[local_idx]
+
+    def __len__(self) -> int:
+        """
+        Number of simulation iterations covered by the observation
+        :return: int
+        """
+        return len(self._global_to_local_idcs)
+
+    @property
+    def collided_track_ids(self) -> List[str]:
+        """
+        Getter for past collided track tokens.
+        :return: list of tokens
+        """
+        return self._collided_track_ids
+
+    @property
+    def red_light_token(self) -> str:
+        """
+        Getter for red light token indicator
+        :return: string
+        """
+        return self._red_light_token
+
+    @property
+    def track_arrays(self) -> PDMTrackArrays:
+        """
+        Getter for array representation of unique tracked objects (lazy loaded)
+        :return: PDMTrackArrays dataclass
+        """
+        if self._track_arrays is None:
+            velocities = self._velocities.astype(np.float64)
+            self._track_arrays = PDMTrackArrays(
+                tokens=self._tokens,
+                velocities=velocities,
+                headings=self._headings.astype(np.float64),
+                # non-agents have zero velocity, thus are considered stopped as in is_track_stopped
+                is_stopped=np.linalg.norm(velocities, axis=-1) <= STOPPED_SPEED_THRESHOLD,
+                is_agent_type=np.isin(
+                    self._types, [object_type.value for object_type in AGENT_TYPES]
+                ),
+            )
+        return self._track_arrays
+
+    def get_track_indices(self, time_idx: int) -> npt.NDArray[np.int64]:
+        """
+        Retrieves index into track_arrays for each geometry in the occupancy map of time_idx.
+        :param time_idx: index for future simulation iterations [10Hz]
+        :return: integer array
+        """
+        local_idx = self._global_to_local_idcs[time_idx]
+        return np.flatnonzero(self._valid[local_idx]).astype(np.int64)
+
+    def get_corners(self, local_idx: int) -> npt.NDArray[np.float64]:
+        """
+        Computes global corner coordinates of all tracks at a time-step of the compact arrays.
+        :param local_idx: time index of the compact arrays
+        :return: corners in nuPlan's order (FL, RL, RR, FR), shape (N,4,2), invalid tracks are NaN
+        """
+        boxes = self._boxes[local_idx].astype(np.float64)
+        boxes[:, : SE2Index.HEADING] += self._origin
+        corners = boxes_to_corners(boxes)
+        corners[~self._valid[local_idx]] = np.nan
+        return corners
@@ -1,5 +1,4 @@
-import copy
-from typing import Dict, Tuple
+from typing import Dict, List, Tuple
 
 import numpy as np
 import numpy.typing as npt
@@ -15,6 +14,7 @@ from navsim.planning.simulation.planner.pdm_planner.utils.pdm_enums import (
 )
 from navsim.planning.simulation.planner.pdm_planner.utils.pdm_geometry_utils import (
     normalize_angle,
+    translate_lon_and_lat,
 )
 
 MAX_DYNAMIC_OBJECTS: Dict[TrackedObjectType, int] = {
@@ -27,24 +27,36 @@ MAX_STATIC_OBJECTS: int = 50
 
 
 class PDMObjectManager:
-    """Class that stores and sorts tracked objects around the ego-vehicle."""
+    """
+    Class that stores and sorts tracked objects around the ego-vehicle.
+    Objects are stored in preallocated arrays of bounding-box coordinates and velocities.
+    """
 
-    def __init__(
-        self,
-    ):
-        """Constructor of PDMObjectManager."""
+    def __init__(self, capacity: int = 256):
+        """
+        Constructor of PDMObjectManager.
+        :param capacity: initial number of objects in the buffers (grows on demand), defaults to 256
+        """
 
         # all objects
         self._unique_objects: Dict[str, TrackedObject] = {}
 
-        # dynamic objects
-        self._dynamic_object_tokens = {key: [] for key in MAX_DYNAMIC_OBJECTS.keys()}
-        self._dynamic_object_coords = {key: [] for key in MAX_DYNAMIC_OBJECTS.keys()}
-        self._dynamic_object_dxy = {key: [] for key in MAX_DYNAMIC_OBJECTS.keys()}
+        # buffers of added objects, i.e. first self._num_objects entries are valid
+        self._num_objects: int = 0
+        self._tokens: List[str] = []
+        self._types: npt.NDArray[np.int64] = np.zeros(capacity, dtype=np.int64)
+        self._is_agent: npt.NDArray[np.bool_] = np.zeros(capacity, dtype=np.bool_)
+        self._coords: npt.NDArray[np.float64] = np.zeros(
+            (capacity, len(BBCoordsIndex), 2), dtype=np.float64
+        )
+        self._dxy: npt.NDArray[np.float64] = np.zeros((capacity, 2), dtype=np.float64)
 
-        # static objects
-        self._static_object_tokens = []
-        self._static_object_coords = []
+    def __len__(self) -> int:
+        """
+        Number of added objects
+        :return: int
+        """
+        return self._num_objects
 
     @property
     def unique_objects(self) -> Dict[str, TrackedObject]:
@@ -59,45 +71,82 @@ class PDMObjectManager:
         Add object to manager and sort category (dynamic/static)
         :param object: any tracked object
         """
-        self._unique_objects[object.track_token] = object
-
-        coords_list = [
-            [corner.x, corner.y] for corner in copy.deepcopy(object.box.all_corners())
-        ]
-        coords_list.append([object.center.x, object.center.y])
+        self.add_objects([object])
 
-        coords: np.ndarray = np.array(coords_list, dtype=np.float64)
-
-        if object.tracked_object_type in AGENT_TYPES:
-            velocity = object.velocity
-            velocity_angle = np.arctan2(velocity.y, velocity.x)
-            agent_drives_forward = (
-                np.abs(normalize_angle(object.center.heading - velocity_angle))
-                < np.pi / 2
-            )
-
-            track_heading = (
-                object.center.heading
-                if agent_drives_forward
-                else normalize_angle(object.center.heading + np.pi)
-            )
+    def add_objects(self, objects: List[TrackedObject]) -> None:
+        """
+        Adds objects to the manager in one vectorized pass, e.g. all tracked objects of an observation.
+        :param objects: list of tracked objects
+        """
+        num_objects = len(objects)
+        if num_objects == 0:
+            return
+
+        self._unique_objects.update((object.track_token, object) for object in objects)
+        self._reserve(self._num_objects + num_objects)
+
+        start, end = self._num_objects, self._num_objects + num_objects
+        self._tokens.extend(object.track_token for object in objects)
+        self._types[start:end] = [object.tracked_object_type.value for object in objects]
+        is_agent = np.array(
+            [object.tracked_object_type in AGENT_TYPES for object in objects], dtype=np.bool_
+        )
+        self._is_agent[start:end] = is_agent
+
+        # (x, y, heading, length, width) of bounding boxes
+        boxes = np.array(
+            [
+                (
+                    object.center.x,
+                    object.center.y,
+                    object.center.heading,
+                    object.box.length,
+                    object.box.width,
+                )
+                for object in objects
+            ],
+            dtype=np.float64,
+        )
+        centers, headings = boxes[:, :2], boxes[:, 2]
+        half_lengths, half_widths = boxes[:, 3] / 2.0, boxes[:, 4] / 2.0
 
-            dxy = np.array(
-                [
-                    np.cos(track_heading) * velocity.magnitude(),
-                    np.sin(track_heading) * velocity.magnitude(),
-                ],
-                dtype=np.float64,
-            ).T  # x,y velocity [m/s]
+        coords = self._coords[start:end]
+        coords[:, BBCoordsIndex.FRONT_LEFT] = translate_lon_and_lat(
+            centers, headings, half_lengths, half_widths
+        )
+        coords[:, BBCoordsIndex.REAR_LEFT] = translate_lon_and_lat(
+            centers, headings, -half_lengths, half_widths
+        )
+        coords[:, BBCoordsIndex.REAR_RIGHT] = translate_lon_and_lat(
+            centers, headings, -half_lengths, -half_widths
+        )
+        coords[:, BBCoordsIndex.FRONT_RIGHT] = translate_lon_and_lat(
+            centers, headings, half_lengths, -half_widths
+        )
+        coords[:, BBCoordsIndex.CENTER] = centers
+
+        # x,y velocity [m/s] along the track heading, zero for static objects
+        velocities = np.array(
+            [
+                (object.velocity.x, object.velocity.y) if agent else (0.0, 0.0)
+                for object, agent in zip(objects, is_agent)
+            ],
+            dtype=np.float64,
+        )
+        velocity_angles = np.arctan2(velocities[:, 1], velocities[:, 0])
+        agents_drive_forward = (
+            np.abs(normalize_angle(headings - velocity_angles)) < np.pi / 2
+        )
+        track_headings = np.where(
+            agents_drive_forward, headings, normalize_angle(headings + np.pi)
+        )
+        speeds = np.hypot(velocities[:, 0], velocities[:, 1])
 
-            self._add_dynamic_object(
-                object.tracked_object_type, object.track_token, coords, dxy
-            )
+        dxy = self._dxy[start:end]
+        dxy[:, 0] = np.cos(track_headings) * speeds
+        dxy[:, 1] = np.sin(track_headings) * speeds
 
-        else:
-            self._add_static_object(
-                object.tracked_object_type, object.track_token, coords
-            )
+        self._num_objects = end
 
     def get_nearest_objects(self, position: Point2D) -> Tuple:
         """
@@ -118,7 +167,7 @@ class PDMObjectManager:
                 dynamic_object_dxy_,
             ) = self._get_nearest_dynamic_objects(position, dynamic_object_type)
 
-            if dynamic_object_coords_.ndim != 3:
+            if len(dynamic_object_tokens_) == 0:
                 continue
 
             dynamic_object_tokens.extend(dynamic_object_tokens_)
@@ -148,38 +197,44 @@ class PDMObjectManager:
             dynamic_object_dxy,
         )
 
-    def _add_dynamic_object(
-        self,
-        type: TrackedObjectType,
-        token: str,
-        coords: npt.NDArray[np.float64],
-        dxy: npt.NDArray[np.float64],
-    ) -> None:
-        """
-        Adds dynamic obstacle to the manager.
-        :param type: Object type (vehicle, pedestrian, etc.)
-        :param token: Temporally consistent object identifier
-        :param coords: Bounding-box coordinates
-        :param dxy: velocity (x,y) [m/s]
-        """
-        self._dynamic_object_tokens[type].append(token)
-        self._dynamic_object_coords[type].append(coords)
-        self._dynamic_object_dxy[type].append(dxy)
-
-    def _add_static_object(
-        self,
-        type: TrackedObjectType,
-        token: str,
-        coords: npt.NDArray[np.float64],
-    ) -> None:
-        """
-        Adds static obstacle to manager.
-        :param type: Object type (e.g. generic, traffic cone, etc.), currently ignored
-        :param token: Temporally consistent object identifier
-        :param coords: Bounding-box coordinates
-        """
-        self._static_object_tokens.append(token)
-        self._static_object_coords.append(coords)
+    def _reserve(self, capacity: int) -> None:
+        """
+        Grows the buffers to hold at least the requested number of objects.
+        :param capacity: minimum number of objects
+        """
+        current_capacity = len(self._types)
+        if capacity <= current_capacity:
+            return
+
+        new_capacity = max(capacity, 2 * current_capacity)
+        for name in ["_types", "_is_agent", "_coords", "_dxy"]:
+            buffer = getattr(self, name)
+            new_buffer = np.zeros((new_capacity,) + buffer.shape[1:], dtype=buffer.dtype)
+            new_buffer[: self._num_objects] = buffer[: self._num_objects]
+            setattr(self, name, new_buffer)
+
+    def _get_nearest_idcs(
+        self, position: Point2D, object_idcs: npt.NDArray[np.int64], k: int
+    ) -> npt.NDArray[np.int64]:
+        """
+        Selects the k nearest objects, sorted by distance of the bounding-box center.
+        :param position: global map position
+        :param object_idcs: indices of candidate objects in the buffers
+        :param k: maximum number of objects
+        :return: indices of nearest objects in the buffers
+        """
+        position_coords = position.array[None, ...]  # shape: (1,2)
+        position_to_center_dist = (
+            (self._coords[object_idcs, BBCoordsIndex.CENTER] - position_coords) ** 2.0
+        ).sum(axis=-1) ** 0.5
+
+        # partial selection of k nearest, i.e. only those are sorted
+        if len(object_idcs) > k:
+            nearest = np.argpartition(position_to_center_dist, k - 1)[:k]
+            object_idcs = object_idcs[nearest]
+            position_to_center_dist = position_to_center_dist[nearest]
+
+        return object_idcs[np.argsort(position_to_center_dist)]
 
     def _get_nearest_dynamic_objects(
         self, position: Point2D, type: TrackedObjectType
@@ -190,31 +245,14 @@ class PDMObjectManager:
         :param type: Object type to sort
         :return: Tuple of tokens, coords, and velocity of nearest objects.
         """
-        position_coords = position.array[None, ...]  # shape: (1,2)
-
-        object_tokens = self._dynamic_object_tokens[type]
-        object_coords = np.array(self._dynamic_object_coords[type], dtype=np.float64)
-        object_dxy = np.array(self._dynamic_object_dxy[type], dtype=np.float64)
-
-        if len(object_tokens) > 0:
-            # add axis if single object found
-            if object_coords.ndim == 1:
-                object_coords = object_coords[None, ...]
-                object_dxy = object_dxy[None, ...]
+        object_idcs = np.flatnonzero(self._types[: self._num_objects] == type.value)
+        object_idcs = self._get_nearest_idcs(position, object_idcs, MAX_DYNAMIC_OBJECTS[type])
 
-            position_to_center_dist = (
-                (object_coords[..., BBCoordsIndex.CENTER, :] - position_coords) ** 2.0
-            ).sum(axis=-1) ** 0.5
-
-            object_argsort = np.argsort(position_to_center_dist)
-
-            object_tokens = [object_tokens[i] for i in object_argsort][
-                : MAX_DYNAMIC_OBJECTS[type]
-            ]
-            object_coords = object_coords[object_argsort][: MAX_DYNAMIC_OBJECTS[type]]
-            object_dxy = object_dxy[object_argsort][: MAX_DYNAMIC_OBJECTS[type]]
-
-        return (object_tokens, object_coords, object_dxy)
+        return (
+            [self._tokens[idx] for idx in object_idcs],
+            self._coords[object_idcs],
+            self._dxy[object_idcs],
+        )
 
     def _get_nearest_static_objects(
         self, position: Point2D, type: TrackedObjectType
@@ -225,25 +263,7 @@ class PDMObjectManager:
         :param type: type of static obstacle (currently ignored)
         :return: tuple of tokens and coords of nearest objects
         """
-        position_coords = position.array[None, ...]  # shape: (1,2)
-
-        object_tokens = self._static_object_tokens
-        object_coords = np.array(self._static_object_coords, dtype=np.float64)
-
-        if len(object_tokens) > 0:
-            # add axis if single object found
-            if object_coords.ndim == 1:
-                object_coords = object_coords[None, ...]
-
-            position_to_center_dist = (
-                (object_coords[..., BBCoordsIndex.CENTER, :] - position_coords) ** 2.0
-            ).sum(axis=-1) ** 0.5
-
-            object_argsort = np.argsort(position_to_center_dist)
-
-            object_tokens = [object_tokens[i] for i in object_argsort][
-                :MAX_STATIC_OBJECTS
-            ]
-            object_coords = object_coords[object_argsort][:MAX_STATIC_OBJECTS]
+        object_idcs = np.flatnonzero(~self._is_agent[: self._num_objects])
+        object_idcs = self._get_nearest_idcs(position, object_idcs, MAX_STATIC_OBJECTS)
 
-        return (object_tokens, object_coords)
+        return ([self._tokens[idx] for idx in object_idcs], self._coords[object_idcs])
@@ -1,10 +1,13 @@
+from dataclasses import dataclass
 from typing import Dict, List, Optional, Tuple
 
 import numpy as np
+import numpy.typing as npt
 import shapely.creation
+from nuplan.common.actor_state.agent import Agent
 from nuplan.common.actor_state.ego_state import EgoState
 from nuplan.common.actor_state.tracked_objects import TrackedObject
-from nuplan.common.actor_state.tracked_objects_types import TrackedObjectType
+from nuplan.common.actor_state.tracked_objects_types import AGENT_TYPES, TrackedObjectType
 from nuplan.common.maps.abstract_map_objects import LaneGraphEdgeMapObject
 
 from nuplan.planning.scenario_builder.abstract_scenario import AbstractScenario
@@ -13,6 +16,7 @@ from nuplan.common.maps.maps_datatypes import (
     TrafficLightStatusData,
     TrafficLightStatusType,
 )
+from nuplan.planning.simulation.observation.idm.utils import is_track_stopped
 from nuplan.planning.simulation.observation.observation_type import Observation
 from nuplan.planning.simulation.trajectory.trajectory_sampling import TrajectorySampling
 from shapely.geometry import Polygon
@@ -21,6 +25,7 @@ from navsim.planning.simulation.planner.pdm_planner.observation.pdm_object_manag
     PDMObjectManager,
 )
 from navsim.planning.simulation.planner.pdm_planner.observation.pdm_occupancy_map import (
+    PDMCompositeOccupancyMap,
     PDMOccupancyMap,
 )
 from navsim.planning.simulation.planner.pdm_planner.utils.pdm_enums import (
@@ -29,9 +34,54 @@ from navsim.planning.simulation.planner.pdm_planner.utils.pdm_enums import (
 from nuplan.planning.simulation.observation.observation_type import DetectionsTracks
 
 
+@dataclass
+class PDMTrackArrays:
+    """Array representation of the unique tracked objects in an observation."""
+
+    tokens: List[str]
+    velocities: npt.NDArray[np.float64]  # [m/s] (tracks, 2), zero for non-agents
+    headings: npt.NDArray[np.float64]  # [rad] (tracks,)
+    is_stopped: npt.NDArray[np.bool_]  # (tracks,), see nuPlan's is_track_stopped
+    is_agent_type: npt.NDArray[np.bool_]  # (tracks,), type in AGENT_TYPES
+
+    def __len__(self) -> int:
+        """
+        Number of tracked objects
+        :return: int
+        """
+        return len(self.tokens)
+
+
+@dataclass
+class PDMObjectForecast:
+    """Constant-velocity forecast of dynamic objects, kept as arrays until occupancy maps are built."""
+
+    tokens: List[str]
+    coords: npt.NDArray[np.float64]  # closed bounding-box rings at sample zero (objects, 5, 2)
+    dxy: npt.NDArray[np.float64]  # [m/s] (objects, 2)
+
+    def get_polygons(self, delta_t: float) -> npt.NDArray[np.object_]:
+        """
+        Creates polygons of objects at a future time.
+        :param delta_t: time ahead of sample zero [s]
+        :return: array of polygons
+        """
+        if len(self.tokens) == 0:
+            return np.array([], dtype=np.object_)
+        return shapely.creation.polygons(self.coords + delta_t * self.dxy[:, None])
+
+
 class PDMObservation:
     """PDM's observation class for forecasted occupancy maps."""
 
+    # lazy loaded array representation of tracks (class-level default for previously pickled instances)
+    _track_arrays: Optional[PDMTrackArrays] = None
+    _track_indices: Optional[List[npt.NDArray[np.int64]]] = None
+
+    # forecast of occupancy maps not yet built (class-level default for previously pickled instances)
+    _static_map: Optional[PDMOccupancyMap] = None
+    _forecast: Optional[PDMObjectForecast] = None
+
     def __init__(
         self,
         trajectory_sampling: TrajectorySampling,
@@ -89,7 +139,16 @@ class PDMObservation:
         ), f"PDMObservation: index {time_idx} out of range!"
 
         local_idx = self._global_to_local_idcs[time_idx]
-        return self._occupancy_maps[local_idx]
+        return self._get_occupancy_map(local_idx)
+
+    @property
+    def occupancy_maps(self) -> List[PDMOccupancyMap]:
+        """
+        Getter for occupancy maps of all forecast samples (builds lazy loaded maps)
+        :return: list of occupancy maps
+        """
+        assert self._initialized, "PDMObservation: Has not been updated yet!"
+        return [self._get_occupancy_map(local_idx) for local_idx in range(len(self._occupancy_maps))]
 
     @property
     def collided_track_ids(self) -> List[str]:
@@ -117,6 +176,71 @@ class PDMObservation:
         assert self._initialized, "PDMObservation: Has not been updated yet!"
         return self._unique_objects
 
+    @property
+    def track_arrays(self) -> PDMTrackArrays:
+        """
+        Getter for array representation of unique tracked objects (lazy loaded)
+        :return: PDMTrackArrays dataclass
+        """
+        assert self._initialized, "PDMObservation: Has not been updated yet!"
+
+        if self._track_arrays is None:
+            tracked_objects = list(self._unique_objects.values())
+            velocities = np.zeros((len(tracked_objects), 2), dtype=np.float64)
+            for track_idx, tracked_object in enumerate(tracked_objects):
+                if isinstance(tracked_object, Agent):
+                    velocities[track_idx] = tracked_object.velocity.array
+
+            self._track_arrays = PDMTrackArrays(
+                tokens=list(self._unique_objects.keys()),
+                velocities=velocities,
+                headings=np.array(
+                    [tracked_object.box.center.heading for tracked_object in tracked_objects],
+                    dtype=np.float64,
+                ),
+                is_stopped=np.array(
+                    [is_track_stopped(tracked_object) for tracked_object in tracked_objects],
+                    dtype=np.bool_,
+                ),
+                is_agent_type=np.array(
+                    [
+                        tracked_object.tracked_object_type in AGENT_TYPES
+                        for tracked_object in tracked_objects
+                    ],
+                    dtype=np.bool_,
+                ),
+            )
+
+        return self._track_arrays
+
+    def get_track_indices(self, time_idx: int) -> npt.NDArray[np.int64]:
+        """
+        Retrieves index into track_arrays for each geometry in the occupancy map of time_idx (lazy loaded).
+        :param time_idx: index for future simulation iterations [10Hz]
+        :return: integer array, -1 for geometries without tracked object (e.g. red lights)
+        """
+        assert self._initialized, "PDMObservation: Has not been updated yet!"
+
+        if self._track_indices is None:
+            token_to_track_idx = {
+                token: track_idx for track_idx, token in enumerate(self.track_arrays.tokens)
+            }
+            self._track_indices = [
+                np.array(
+                    [
+                        -1
+                        if self._red_light_token in token
+                        else token_to_track_idx.get(token, -1)
+                        for token in self._get_tokens(local_idx)
+                    ],
+                    dtype=np.int64,
+                )
+                for local_idx in range(len(self._occupancy_maps))
+            ]
+
+        local_idx = self._global_to_local_idcs[time_idx]
+        return self._track_indices[local_idx]
+
     def update(
         self,
         ego_state: EgoState,
@@ -133,7 +257,6 @@ class PDMObservation:
         :param map_api: map object of nuPlan
         """
 
-        self._occupancy_maps: List[PDMOccupancyMap] = []
         object_manager = self._get_object_manager(ego_state, observation)
 
         (
@@ -175,52 +298,41 @@ class PDMObservation:
                 ..., BBCoordsIndex.FRONT_LEFT, :
             ]
         else:
-            dynamic_object_polygons = np.array([], dtype=np.object_)
             dynamic_object_tokens = []
 
         traffic_light_polygons = np.array(traffic_light_polygons, dtype=np.object_)
 
-        for sample in np.arange(
-            0,
-            self._observation_samples + self._observation_sample_res,
-            self._observation_sample_res,
-        ):
-            if has_dynamic_object:
-                delta_t = float(sample) * self._sample_interval
-                dynamic_object_coords_t = (
-                    dynamic_object_coords + delta_t * dynamic_object_dxy[:, None]
-                )
-                dynamic_object_polygons = shapely.creation.polygons(dynamic_object_coords_t)
-
-            all_polygons = np.concatenate(
-                [
-                    static_object_polygons,
-                    dynamic_object_polygons,
-                    traffic_light_polygons,
-                ],
-                axis=0,
-            )
+        # single str-tree of static objects and red lights, shared by all samples
+        self._static_map = PDMOccupancyMap(
+            static_object_tokens + traffic_light_tokens,
+            np.concatenate([static_object_polygons, traffic_light_polygons], axis=0),
+        )
+        self._forecast = PDMObjectForecast(
+            dynamic_object_tokens, dynamic_object_coords, dynamic_object_dxy
+        )
 
-            occupancy_map = PDMOccupancyMap(
-                static_object_tokens + dynamic_object_tokens + traffic_light_tokens,
-                all_polygons,
-            )
-            self._occupancy_maps.append(occupancy_map)
+        # occupancy maps are built on first access, see _get_occupancy_map
+        num_samples = len(
+            range(0, self._observation_samples + self._observation_sample_res, self._observation_sample_res)
+        )
+        self._occupancy_maps: List[Optional[PDMOccupancyMap]] = [None] * num_samples
 
         # save collided objects to ignore in the future
         ego_polygon: Polygon = ego_state.car_footprint.geometry
-        intersecting_obstacles = self._occupancy_maps[0].intersects(ego_polygon)
+        intersecting_obstacles = self._get_occupancy_map(0).intersects(ego_polygon)
         new_collided_track_ids = []
 
         for intersecting_obstacle in intersecting_obstacles:
             if self._red_light_token in intersecting_obstacle:
-                within = ego_polygon.within(self._occupancy_maps[0][intersecting_obstacle])
+                within = ego_polygon.within(self._get_occupancy_map(0)[intersecting_obstacle])
                 if not within:
                     continue
             new_collided_track_ids.append(intersecting_obstacle)
 
         self._collided_track_ids = self._collided_track_ids + new_collided_track_ids
         self._unique_objects = object_manager.unique_objects
+        self._track_arrays = None
+        self._track_indices = None
         self._initialized = True
 
     def update_replay(self, scenario: AbstractScenario, iteration_index: int) -> None:
@@ -248,8 +360,12 @@ class PDMObservation:
         ), f"Expected observation length {self._observation_samples + 1}, but got {len(occupancy_maps)}"
 
         self._occupancy_maps: List[PDMOccupancyMap] = occupancy_maps
+        self._static_map = None
+        self._forecast = None
         self._collided_track_ids = []
         self._unique_objects = unique_objects
+        self._track_arrays = None
+        self._track_indices = None
         self._initialized = True
 
     def update_detections_tracks(self, detection_tracks: List[DetectionsTracks]) -> None:
@@ -274,10 +390,39 @@ class PDMObservation:
         ), f"Expected observation length {self._observation_samples + 1}, but got {len(occupancy_maps)}"
 
         self._occupancy_maps: List[PDMOccupancyMap] = occupancy_maps
+        self._static_map = None
+        self._forecast = None
         self._collided_track_ids = []
         self._unique_objects = unique_objects
+        self._track_arrays = None
+        self._track_indices = None
         self._initialized = True
 
+    def _get_occupancy_map(self, local_idx: int) -> PDMOccupancyMap:
+        """
+        Retrieves occupancy map of a forecast sample, built from the forecast on first access.
+        :param local_idx: index of forecast sample
+        :return: occupancy map
+        """
+        if self._occupancy_maps[local_idx] is None:
+            delta_t = float(local_idx * self._observation_sample_res) * self._sample_interval
+            self._occupancy_maps[local_idx] = PDMCompositeOccupancyMap(
+                self._static_map,
+                self._forecast.tokens,
+                self._forecast.get_polygons(delta_t),
+            )
+        return self._occupancy_maps[local_idx]
+
+    def _get_tokens(self, local_idx: int) -> List[str]:
+        """
+        Retrieves tokens of the occupancy map of a forecast sample, without building the map.
+        :param local_idx: index of forecast sample
+        :return: list of tokens
+        """
+        if self._occupancy_maps[local_idx] is None:
+            return self._static_map.tokens + self._forecast.tokens
+        return self._occupancy_maps[local_idx].tokens
+
     def _get_object_manager(
         self, ego_state: EgoState, observation: Observation
     ) -> PDMObjectManager:
@@ -288,19 +433,28 @@ class PDMObservation:
         :return: PDMObjectManager class
         """
         object_manager = PDMObjectManager()
+        collided_track_ids = set(self._collided_track_ids)
 
-        for object in observation.tracked_objects:
-            if (
-                (object.tracked_object_type == TrackedObjectType.EGO)
-                or (
-                    self._map_radius
-                    and ego_state.center.distance_to(object.center) > self._map_radius
-                )
-                or (object.track_token in self._collided_track_ids)
-            ):
-                continue
+        objects = [
+            object
+            for object in observation.tracked_objects
+            if object.tracked_object_type != TrackedObjectType.EGO
+            and object.track_token not in collided_track_ids
+        ]
+
+        if self._map_radius and len(objects) > 0:
+            object_centers = np.array(
+                [(object.center.x, object.center.y) for object in objects], dtype=np.float64
+            )
+            distances = np.hypot(
+                object_centers[:, 0] - ego_state.center.x,
+                object_centers[:, 1] - ego_state.center.y,
+            )
+            objects = [
+                object for object, distance in zip(objects, distances) if distance <= self._map_radius
+            ]
 
-            object_manager.add_object(object)
+        object_manager.add_objects(objects)
 
         return object_manager
 
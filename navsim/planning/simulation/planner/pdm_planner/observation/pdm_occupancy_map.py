@@ -1,12 +1,13 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Tuple, Type
+from typing import Any, Dict, List, Optional, Tuple, Type
 
 import numpy as np
 import numpy.typing as npt
 from nuplan.planning.simulation.occupancy_map.abstract_occupancy_map import Geometry
 from nuplan.common.maps.maps_datatypes import SemanticMapLayer
 
+import shapely
 import shapely.vectorized
 from shapely.strtree import STRtree
 from shapely.geometry import Point
@@ -15,6 +16,112 @@ from nuplan.common.actor_state.ego_state import EgoState
 from nuplan.common.actor_state.state_representation import Point2D
 from nuplan.common.maps.abstract_map import AbstractMap, MapObject
 
+from navsim.planning.simulation.planner.pdm_planner.observation.pdm_polygon_raster import (
+    PDMPolygonRaster,
+)
+from navsim.planning.simulation.planner.pdm_planner.utils.pdm_sat_utils import (
+    are_convex_quads,
+    convex_quads_distances,
+    convex_quads_intersect,
+    segments_to_quads,
+)
+
+# backends for box queries: separating axis theorem (numpy) or shapely (reference)
+OCCUPANCY_MAP_BACKENDS = ["sat", "shapely"]
+
+
+def _geometries_to_corners(geometries: npt.NDArray[np.object_]) -> npt.NDArray[np.float64]:
+    """
+    Extracts corners of box geometries, i.e. convex polygons with four corners.
+    :param geometries: array of geometries
+    :return: array of shape (geometries, 4, 2), NaN for other geometries
+    """
+    corners = np.full((len(geometries), 4, 2), np.nan, dtype=np.float64)
+
+    four_corner_mask = np.logical_and(
+        shapely.get_type_id(geometries) == shapely.GeometryType.POLYGON,
+        shapely.get_num_coordinates(geometries) == 5,
+    )
+    four_corner_mask[four_corner_mask] = (
+        shapely.get_num_interior_rings(geometries[four_corner_mask]) == 0
+    )
+    if four_corner_mask.any():
+        exterior_coords = shapely.get_coordinates(
+            shapely.get_exterior_ring(geometries[four_corner_mask])
+        ).reshape(-1, 5, 2)
+        corners[four_corner_mask] = exterior_coords[:, :4]
+
+    corners[~are_convex_quads(corners)] = np.nan
+    return corners
+
+
+def _get_query_order(str_tree: STRtree) -> npt.NDArray[np.int64]:
+    """
+    Ranks geometries of a str-tree by the order of query results, i.e. the traversal order of its leaves.
+    :param str_tree: shapely's str-tree
+    :return: rank of each geometry, shape (geometries,)
+    """
+    query_order = np.zeros(len(str_tree.geometries), dtype=np.int64)
+    leaf_idcs = str_tree.query(shapely.box(-np.inf, -np.inf, np.inf, np.inf))
+    query_order[leaf_idcs] = np.arange(len(leaf_idcs))
+    return query_order
+
+
+def _quads_intersect_geometries(
+    quads: npt.NDArray[np.float64],
+    corners: npt.NDArray[np.float64],
+    geometries: npt.NDArray[np.object_],
+    backend: str,
+    is_segment: bool = False,
+) -> npt.NDArray[np.bool_]:
+    """
+    Checks pairwise intersection of boxes (or segments) with geometries.
+    Uses the separating axis theorem for box geometries and shapely otherwise (or as reference backend).
+    :param quads: corners of boxes or segments as degenerate quadrilaterals, shape (N,4,2)
+    :param corners: corners of box geometries, NaN for other geometries, shape (N,4,2)
+    :param geometries: array of geometries, shape (N,)
+    :param backend: separating axis theorem ("sat") or shapely as reference ("shapely")
+    :param is_segment: whether quadrilaterals represent segments, defaults to False
+    :return: boolean array, shape (N,)
+    """
+    if backend == "sat":
+        is_box = ~np.isnan(corners).any(axis=(-1, -2))
+    else:
+        is_box = np.zeros(len(quads), dtype=np.bool_)
+
+    intersects = np.zeros(len(quads), dtype=np.bool_)
+    intersects[is_box] = convex_quads_intersect(quads[is_box], corners[is_box])
+    if not is_box.all():
+        query_geometries = (
+            shapely.linestrings(quads[~is_box][:, :2])
+            if is_segment
+            else shapely.creation.polygons(quads[~is_box])
+        )
+        intersects[~is_box] = shapely.intersects(query_geometries, geometries[~is_box])
+
+    return intersects
+
+
+def _concatenate_occupancy_maps(
+    occupancy_maps: List[PDMOccupancyMap],
+) -> Tuple[npt.NDArray[np.int64], npt.NDArray[np.object_], npt.NDArray[np.float64]]:
+    """
+    Concatenates geometries of several occupancy maps.
+    :param occupancy_maps: list of occupancy maps
+    :return: start index of each map (and total number), geometries, and corners of all maps
+    """
+    offsets = np.zeros(len(occupancy_maps) + 1, dtype=np.int64)
+    np.cumsum([len(occupancy_map) for occupancy_map in occupancy_maps], out=offsets[1:])
+    geometries = np.concatenate(
+        [np.zeros(0, dtype=np.object_)]
+        + [np.asarray(occupancy_map.geometries, dtype=np.object_) for occupancy_map in occupancy_maps]
+    )
+    corners = np.concatenate(
+        [np.zeros((0, 4, 2), dtype=np.float64)]
+        + [occupancy_map.corners for occupancy_map in occupancy_maps]
+    )
+    return offsets, geometries, corners
+
 
 class PDMOccupancyMap:
     """Occupancy map class of PDM, based on shapely's str-tree."""
@@ -24,12 +131,14 @@ class PDMOccupancyMap:
         tokens: List[str],
         geometries: npt.NDArray[np.object_],
         node_capacity: int = 10,
+        corners: Optional[npt.NDArray[np.float64]] = None,
     ):
         """
         Constructor of PDMOccupancyMap
         :param tokens: list of tracked tokens
         :param geometries: list/array of polygons
         :param node_capacity: max number of child nodes in str-tree, defaults to 10
+        :param corners: optional corners of geometries (N,4,2), NaN for non-box geometries, lazy loaded if None
         """
         assert len(tokens) == len(
             geometries
@@ -44,6 +153,11 @@ class PDMOccupancyMap:
         self._token_to_idx: Dict[str, int] = {token: idx for idx, token in enumerate(tokens)}
         self._str_tree = STRtree(self._geometries, node_capacity)
 
+        # lazy loaded
+        self._centroids: Optional[npt.NDArray[np.float64]] = None
+        self._corners: Optional[npt.NDArray[np.float64]] = corners
+        self._query_order: Optional[npt.NDArray[np.int64]] = None
+
     def __reduce__(self) -> Tuple[Type[PDMOccupancyMap], Tuple[Any, ...]]:
         """Helper for pickling."""
         return self.__class__, (self._tokens, self._geometries, self._node_capacity)
@@ -79,6 +193,202 @@ class PDMOccupancyMap:
         """
         return self._token_to_idx
 
+    @property
+    def geometries(self) -> npt.NDArray[np.object_]:
+        """
+        Getter for geometries in occupancy map
+        :return: array of geometries
+        """
+        return self._str_tree.geometries
+
+    @property
+    def centroids(self) -> npt.NDArray[np.float64]:
+        """
+        Getter for centroid coordinates of geometries (lazy loaded)
+        :return: array of shape (geometries, 2)
+        """
+        if self._centroids is None:
+            centroids = shapely.centroid(self.geometries)
+            self._centroids = np.stack(
+                [shapely.get_x(centroids), shapely.get_y(centroids)], axis=-1
+            ).reshape(-1, 2)
+        return self._centroids
+
+    @property
+    def corners(self) -> npt.NDArray[np.float64]:
+        """
+        Getter for corners of box geometries (lazy loaded from convex polygons with four corners)
+        :return: array of shape (geometries, 4, 2), NaN for other geometries
+        """
+        if self._corners is None:
+            self._corners = _geometries_to_corners(self.geometries)
+        return self._corners
+
+    @property
+    def query_order(self) -> npt.NDArray[np.int64]:
+        """
+        Getter for the order of geometries in query results (lazy loaded), e.g. to sort array-based queries
+        :return: rank of each geometry, shape (geometries,)
+        """
+        if self._query_order is None:
+            self._query_order = _get_query_order(self._str_tree)
+        return self._query_order
+
+    def query_boxes(
+        self, boxes: npt.NDArray[np.float64], backend: str = "sat"
+    ) -> npt.NDArray[np.int64]:
+        """
+        Searches for geometries intersecting with oriented boxes
+        :param boxes: corners of boxes, shape (N,4,2)
+        :param backend: separating axis theorem ("sat") or shapely as reference ("shapely")
+        :return: indices of boxes and geometries, shape (2,K) as in query
+        """
+        box_idcs, geometry_idcs = PDMOccupancyMap.query_boxes_batch(
+            [self], boxes, np.zeros(len(boxes), dtype=np.int64), backend=backend
+        )
+        return np.stack([box_idcs, geometry_idcs], axis=0)
+
+    def segments_intersect(
+        self,
+        segments: npt.NDArray[np.float64],
+        geometry_idcs: npt.NDArray[np.int64],
+        backend: str = "sat",
+    ) -> npt.NDArray[np.bool_]:
+        """
+        Checks pairwise whether segments intersect with geometries of the occupancy map
+        :param segments: start and end points of segments, shape (N,2,2)
+        :param geometry_idcs: index of geometry for each segment, shape (N,)
+        :param backend: separating axis theorem ("sat") or shapely as reference ("shapely")
+        :return: boolean array, shape (N,)
+        """
+        return PDMOccupancyMap.segments_intersect_batch(
+            [self], segments, np.zeros(len(segments), dtype=np.int64), geometry_idcs, backend=backend
+        )
+
+    def boxes_distances(
+        self,
+        boxes: npt.NDArray[np.float64],
+        geometry_idcs: npt.NDArray[np.int64],
+        backend: str = "sat",
+    ) -> npt.NDArray[np.float64]:
+        """
+        Calculates pairwise distances of oriented boxes to geometries of the occupancy map
+        :param boxes: corners of boxes, shape (N,4,2)
+        :param geometry_idcs: index of geometry for each box, shape (N,)
+        :param backend: separating axis theorem ("sat") or shapely as reference ("shapely")
+        :return: distance array, zero for intersecting pairs, shape (N,)
+        """
+        assert backend in OCCUPANCY_MAP_BACKENDS, f"PDMOccupancyMap: Unknown backend {backend}!"
+
+        corners = self.corners[geometry_idcs]
+        if backend == "sat":
+            is_box = ~np.isnan(corners).any(axis=(-1, -2))
+        else:
+            is_box = np.zeros(len(boxes), dtype=np.bool_)
+
+        distances = np.zeros(len(boxes), dtype=np.float64)
+        distances[is_box] = convex_quads_distances(boxes[is_box], corners[is_box])
+        if not is_box.all():
+            distances[~is_box] = shapely.distance(
+                shapely.creation.polygons(boxes[~is_box]),
+                self.geometries[geometry_idcs[~is_box]],
+            )
+
+        return distances
+
+    @staticmethod
+    def query_boxes_batch(
+        occupancy_maps: List[PDMOccupancyMap],
+        boxes: npt.NDArray[np.float64],
+        map_idcs: npt.NDArray[np.int64],
+        geometry_masks: Optional[List[npt.NDArray[np.bool_]]] = None,
+        backend: str = "sat",
+        max_chunk_size: int = 2**20,
+    ) -> Tuple[npt.NDArray[np.int64], npt.NDArray[np.int64]]:
+        """
+        Searches for geometries intersecting with oriented boxes, where each box is queried in one of several maps.
+        Candidates are pre-filtered with axis-aligned bounding boxes before the exact tests of all maps at once.
+        :param occupancy_maps: list of occupancy maps
+        :param boxes: corners of boxes, shape (N,4,2)
+        :param map_idcs: index of the occupancy map of each box, shape (N,)
+        :param geometry_masks: optional boolean mask of queried geometries per map, defaults to all geometries
+        :param backend: separating axis theorem ("sat") or shapely as reference ("shapely")
+        :param max_chunk_size: maximum number of box-geometry pairs pre-filtered at once
+        :return: indices of boxes and geometries (within the map of the box) of intersections
+        """
+        assert backend in OCCUPANCY_MAP_BACKENDS, f"PDMOccupancyMap: Unknown backend {backend}!"
+
+        offsets, geometries, corners = _concatenate_occupancy_maps(occupancy_maps)
+        if geometry_masks is None:
+            flat_mask = np.ones(len(geometries), dtype=np.bool_)
+        else:
+            flat_mask = np.concatenate([np.zeros(0, dtype=np.bool_)] + list(geometry_masks))
+        assert len(flat_mask) == len(geometries), "PDMOccupancyMap: Geometry masks do not match maps!"
+
+        # table of queried geometries per map (flat index), padded with -1
+        flat_idcs = np.flatnonzero(flat_mask)
+        flat_map_idcs = np.searchsorted(offsets, flat_idcs, side="right") - 1
+        counts = np.bincount(flat_map_idcs, minlength=len(occupancy_maps))
+        slots = np.arange(len(flat_idcs)) - np.repeat(np.cumsum(counts) - counts, counts)
+        geometry_table = np.full((len(occupancy_maps), counts.max(initial=0)), -1, dtype=np.int64)
+        geometry_table[flat_map_idcs, slots] = flat_idcs
+
+        bounds = np.concatenate([shapely.bounds(geometries).reshape(-1, 4), np.full((1, 4), np.nan)])
+        bounds_table = bounds[geometry_table]  # NaN for padding, i.e. never overlapping
+
+        # pre-filter pairs with axis-aligned bounding boxes
+        boxes_min, boxes_max = boxes.min(axis=-2), boxes.max(axis=-2)
+        candidate_box_idcs, candidate_flat_idcs = [], []
+        chunk_size = max(max_chunk_size // max(geometry_table.shape[-1], 1), 1)
+        for start_idx in range(0, len(boxes), chunk_size):
+            chunk_bounds = bounds_table[map_idcs[start_idx : start_idx + chunk_size]]
+            overlapping = np.logical_and(
+                np.all(boxes_min[start_idx : start_idx + chunk_size, None] <= chunk_bounds[..., 2:], axis=-1),
+                np.all(chunk_bounds[..., :2] <= boxes_max[start_idx : start_idx + chunk_size, None], axis=-1),
+            )  # (chunk, geometries)
+            box_idcs, slot_idcs = np.nonzero(overlapping)
+            candidate_box_idcs.append(box_idcs + start_idx)
+            candidate_flat_idcs.append(geometry_table[map_idcs[box_idcs + start_idx], slot_idcs])
+
+        box_idcs = np.concatenate([np.zeros(0, dtype=np.int64)] + candidate_box_idcs).astype(np.int64)
+        flat_idcs = np.concatenate([np.zeros(0, dtype=np.int64)] + candidate_flat_idcs).astype(np.int64)
+
+        intersecting = _quads_intersect_geometries(
+            boxes[box_idcs], corners[flat_idcs], geometries[flat_idcs], backend
+        )
+        box_idcs, flat_idcs = box_idcs[intersecting], flat_idcs[intersecting]
+
+        return box_idcs, flat_idcs - offsets[map_idcs[box_idcs]]
+
+    @staticmethod
+    def segments_intersect_batch(
+        occupancy_maps: List[PDMOccupancyMap],
+        segments: npt.NDArray[np.float64],
+        map_idcs: npt.NDArray[np.int64],
+        geometry_idcs: npt.NDArray[np.int64],
+        backend: str = "sat",
+    ) -> npt.NDArray[np.bool_]:
+        """
+        Checks pairwise whether segments intersect with geometries of several occupancy maps
+        :param occupancy_maps: list of occupancy maps
+        :param segments: start and end points of segments, shape (N,2,2)
+        :param map_idcs: index of the occupancy map of each segment, shape (N,)
+        :param geometry_idcs: index of geometry (within the map) for each segment, shape (N,)
+        :param backend: separating axis theorem ("sat") or shapely as reference ("shapely")
+        :return: boolean array, shape (N,)
+        """
+        assert backend in OCCUPANCY_MAP_BACKENDS, f"PDMOccupancyMap: Unknown backend {backend}!"
+
+        offsets, geometries, corners = _concatenate_occupancy_maps(occupancy_maps)
+        flat_idcs = offsets[map_idcs] + geometry_idcs
+        return _quads_intersect_geometries(
+            segments_to_quads(segments),
+            corners[flat_idcs],
+            geometries[flat_idcs],
+            backend,
+            is_segment=True,
+        )
+
     def intersects(self, geometry: Geometry) -> List[str]:
         """
         Searches for intersecting geometries in the occupancy map
@@ -98,6 +408,127 @@ class PDMOccupancyMap:
         return self._str_tree.query(geometry, predicate=predicate)
 
 
+class PDMCompositeOccupancyMap(PDMOccupancyMap):
+    """
+    Occupancy map of static geometries shared across time-steps (e.g. static objects and red lights)
+    and geometries of a single time-step (e.g. forecasted dynamic objects).
+    Only geometries of the time-step are indexed per map, the static map is queried with its own str-tree.
+    Indices and tokens list the static geometries first, i.e. as a single PDMOccupancyMap of all geometries.
+    """
+
+    def __init__(
+        self,
+        static_map: PDMOccupancyMap,
+        tokens: List[str],
+        geometries: npt.NDArray[np.object_],
+        node_capacity: int = 10,
+    ):
+        """
+        Constructor of PDMCompositeOccupancyMap
+        :param static_map: occupancy map of geometries shared across time-steps
+        :param tokens: list of tracked tokens of the time-step
+        :param geometries: list/array of polygons of the time-step
+        :param node_capacity: max number of child nodes in str-tree, defaults to 10
+        """
+        assert len(tokens) == len(
+            geometries
+        ), f"PDMCompositeOccupancyMap: Tokens/Geometries ({len(tokens)}/{len(geometries)}) have unequal length!"
+
+        # attribute
+        self._static_map = static_map
+        self._dynamic_tokens = tokens
+        self._dynamic_geometries = geometries
+        self._node_capacity = node_capacity
+
+        # loaded during initialization
+        self._tokens = static_map.tokens + list(tokens)
+        self._geometries = np.concatenate(
+            [static_map.geometries, np.asarray(geometries, dtype=np.object_)], axis=0
+        )
+        self._token_to_idx: Dict[str, int] = {token: idx for idx, token in enumerate(self._tokens)}
+        self._str_tree = STRtree(self._dynamic_geometries, node_capacity)
+
+        # lazy loaded
+        self._centroids: Optional[npt.NDArray[np.float64]] = None
+        self._corners: Optional[npt.NDArray[np.float64]] = None
+        self._query_order: Optional[npt.NDArray[np.int64]] = None
+
+    def __reduce__(self) -> Tuple[Type[PDMCompositeOccupancyMap], Tuple[Any, ...]]:
+        """Helper for pickling (static map is shared between time-steps)."""
+        return self.__class__, (
+            self._static_map,
+            self._dynamic_tokens,
+            self._dynamic_geometries,
+            self._node_capacity,
+        )
+
+    @property
+    def static_map(self) -> PDMOccupancyMap:
+        """
+        Getter for occupancy map of static geometries
+        :return: PDMOccupancyMap
+        """
+        return self._static_map
+
+    @property
+    def geometries(self) -> npt.NDArray[np.object_]:
+        """
+        Getter for geometries in occupancy map
+        :return: array of geometries
+        """
+        return self._geometries
+
+    @property
+    def corners(self) -> npt.NDArray[np.float64]:
+        """
+        Getter for corners of box geometries (lazy loaded, corners of static geometries are shared)
+        :return: array of shape (geometries, 4, 2), NaN for other geometries
+        """
+        if self._corners is None:
+            self._corners = np.concatenate(
+                [
+                    self._static_map.corners,
+                    _geometries_to_corners(self._str_tree.geometries),
+                ],
+                axis=0,
+            )
+        return self._corners
+
+    @property
+    def query_order(self) -> npt.NDArray[np.int64]:
+        """
+        Getter for the order of geometries in query results (lazy loaded), static geometries first
+        :return: rank of each geometry, shape (geometries,)
+        """
+        if self._query_order is None:
+            self._query_order = np.concatenate(
+                [
+                    self._static_map.query_order,
+                    _get_query_order(self._str_tree) + len(self._static_map),
+                ],
+                axis=0,
+            )
+        return self._query_order
+
+    def query(self, geometry: Geometry, predicate=None):
+        """
+        Function to query the str-trees of the static map and the time-step
+        :param geometry: geometries to query
+        :param predicate: see shapely, defaults to None
+        :return: query output, as of shapely's str-tree over all geometries
+        """
+        static_indices = self._static_map.query(geometry, predicate=predicate)
+        dynamic_indices = self._str_tree.query(geometry, predicate=predicate)
+
+        # offset indices of time-step by static geometries, i.e. geometry row for array input
+        if dynamic_indices.ndim == 1:
+            dynamic_indices += len(self._static_map)
+        else:
+            dynamic_indices[-1] += len(self._static_map)
+
+        return np.concatenate([static_indices, dynamic_indices], axis=-1)
+
+
 class PDMDrivableMap(PDMOccupancyMap):
     def __init__(
         self,
@@ -105,15 +536,28 @@ class PDMDrivableMap(PDMOccupancyMap):
         map_types: List[SemanticMapLayer],
         geometries: npt.NDArray[np.object_],
         node_capacity: int = 10,
+        raster: Optional[PDMPolygonRaster] = None,
     ):
+        """
+        Constructor of PDMDrivableMap
+        :param tokens: list of map object tokens
+        :param map_types: list of semantic map layers of polygons
+        :param geometries: list/array of polygons
+        :param node_capacity: max number of child nodes in str-tree, defaults to 10
+        :param raster: optional raster to accelerate point-in-polygon queries, defaults to None
+        """
         assert (
             len(tokens) == len(geometries) == len(map_types)
         ), f"PDMDrivableMap: Tokens/Geometries/Types ({len(tokens)}/{len(geometries)}/{len(map_types)}) have unequal length!"
+        assert raster is None or len(raster) == len(
+            geometries
+        ), "PDMDrivableMap: Raster does not match geometries!"
 
         super().__init__(tokens=tokens, geometries=geometries, node_capacity=node_capacity)
 
         # attribute
         self._map_types = map_types
+        self._raster = raster
 
     def __reduce__(self) -> Tuple[Type[PDMDrivableMap], Tuple[Any, ...]]:
         """Helper for pickling."""
@@ -121,7 +565,8 @@ class PDMDrivableMap(PDMOccupancyMap):
             self._tokens,
             self._map_types,
             self._geometries,
-            self._node_capacity
+            self._node_capacity,
+            self._raster,
         )
 
     @property
@@ -132,6 +577,26 @@ class PDMDrivableMap(PDMOccupancyMap):
         """
         return self._map_types
 
+    @property
+    def raster(self) -> Optional[PDMPolygonRaster]:
+        """
+        Getter for optional polygon raster
+        :return: PDMPolygonRaster or None
+        """
+        return self._raster
+
+    def build_raster(
+        self,
+        resolution: float = 1.0,
+        extent: Optional[Tuple[float, float, float, float]] = None,
+    ) -> None:
+        """
+        Rasterizes polygons to accelerate point-in-polygon queries (e.g. before storing in metric cache).
+        :param resolution: cell size [m], defaults to 1.0
+        :param extent: optional area to rasterize (xmin, ymin, xmax, ymax), defaults to polygon bounds
+        """
+        self._raster = PDMPolygonRaster.from_polygons(self._geometries, resolution, extent)
+
     @classmethod
     def from_simulation(
         cls, map_api: AbstractMap, ego_state: EgoState, map_radius: float = 50
@@ -216,15 +681,48 @@ class PDMDrivableMap(PDMOccupancyMap):
         input_shape = points.shape[:-1]
         flattened_points = points.reshape(-1, 2)
 
-        output = np.zeros((len(self._geometries), len(flattened_points)), dtype=bool)
-        for i, polygon in enumerate(self._geometries):
-            output[i] = shapely.vectorized.contains(
-                polygon, flattened_points[:, 0], flattened_points[:, 1]
-            )
+        if self._raster is not None:
+            output = self._raster.points_in_polygons(self.geometries, flattened_points)
+        else:
+            output = np.zeros((len(self._geometries), len(flattened_points)), dtype=bool)
+            for i in range(len(self._geometries)):
+                output[i] = shapely.vectorized.contains(
+                    self._geometries[i], flattened_points[:, 0], flattened_points[:, 1]
+                )
 
         output_shape = (len(self._geometries),) + input_shape
         return output.reshape(output_shape)
 
+    def points_in_layer(
+        self, points: npt.NDArray[np.float64], layer: SemanticMapLayer
+    ) -> npt.NDArray[np.bool_]:
+        """
+        Determines whether input-points are within any polygon of a map layer (vectorized is_in_layer)
+        :param points: input-points
+        :param layer: semantic map layer
+        :return: boolean array of input-points shape
+        """
+        assert points.shape[-1] == 2, "Points array must have shape (...,2) for x, y coordinates!"
+
+        input_shape = points.shape[:-1]
+        flattened_points = points.reshape(-1, 2)
+
+        layer_idcs = self.get_indices_of_map_type([layer])
+        if self._raster is not None:
+            layer_mask = np.zeros(len(self._geometries), dtype=bool)
+            layer_mask[layer_idcs] = True
+            output = self._raster.points_in_polygons(
+                self.geometries, flattened_points, polygon_mask=layer_mask
+            ).any(axis=0)
+        else:
+            output = np.zeros(len(flattened_points), dtype=bool)
+            for idx in layer_idcs:
+                output |= shapely.vectorized.contains(
+                    self._geometries[idx], flattened_points[:, 0], flattened_points[:, 1]
+                )
+
+        return output.reshape(input_shape)
+
     def is_in_layer(self, point: Point2D, layer: SemanticMapLayer) -> bool:
         """
         Checks if point is in map layer
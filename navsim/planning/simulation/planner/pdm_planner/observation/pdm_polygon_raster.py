@@ -0,0 +1,276 @@
+from __future__ import annotations
+
+from typing import List, Optional, Tuple
+
+import numpy as np
+import numpy.typing as npt
+import shapely
+import shapely.vectorized
+from nuplan.planning.simulation.occupancy_map.abstract_occupancy_map import Geometry
+
+
+def _within_distance(
+    geometry: Geometry, points: npt.NDArray[np.object_], distance: float
+) -> npt.NDArray[np.bool_]:
+    """
+    Checks whether points are within a distance to a geometry.
+    :param geometry: shapely geometry
+    :param points: array of shapely points
+    :param distance: maximum distance [m]
+    :return: boolean array
+    """
+    # NOTE: dwithin on prepared geometries is considerably faster, but unavailable in older shapely versions
+    if hasattr(shapely, "dwithin"):
+        shapely.prepare(geometry)
+        return shapely.dwithin(geometry, points, distance)
+    return shapely.distance(geometry, points) <= distance
+
+
+def _build_csr(
+    num_cells: int, cell_idcs: npt.NDArray[np.int64], polygon_idcs: npt.NDArray[np.int64]
+) -> Tuple[npt.NDArray[np.int64], npt.NDArray[np.int64]]:
+    """
+    Builds CSR lists of polygon indices per cell.
+    :param num_cells: number of cells of the grid
+    :param cell_idcs: flat cell index of each (cell, polygon) pair
+    :param polygon_idcs: polygon index of each (cell, polygon) pair
+    :return: index pointer and polygon indices of CSR lists
+    """
+    order = np.argsort(cell_idcs, kind="stable")
+    indptr = np.zeros(num_cells + 1, dtype=np.int64)
+    np.cumsum(np.bincount(cell_idcs, minlength=num_cells), out=indptr[1:])
+    return indptr, polygon_idcs[order].astype(np.int64)
+
+
+def _gather_csr(
+    indptr: npt.NDArray[np.int64], indices: npt.NDArray[np.int64], cell_idcs: npt.NDArray[np.int64]
+) -> Tuple[npt.NDArray[np.int64], npt.NDArray[np.int64]]:
+    """
+    Gathers CSR lists of several cells into (query, polygon) pairs.
+    :param indptr: index pointer of CSR lists
+    :param indices: polygon indices of CSR lists
+    :param cell_idcs: flat cell index of each query
+    :return: query index and polygon index of each pair
+    """
+    starts, counts = indptr[cell_idcs], indptr[cell_idcs + 1] - indptr[cell_idcs]
+    query_idcs = np.repeat(np.arange(len(cell_idcs)), counts)
+    offsets = np.arange(len(query_idcs)) - np.repeat(np.cumsum(counts) - counts, counts)
+    return query_idcs, indices[np.repeat(starts, counts) + offsets]
+
+
+class PDMPolygonRaster:
+    """
+    Raster of polygons to accelerate point-in-polygon queries.
+    A single grid is shared by all polygons. Each cell lists the polygons covering the cell entirely (interior)
+    and the polygons whose boundary crosses the cell, as CSR lists over the flat cell index.
+    Queries gather the lists of each point's cell, only (point, polygon) pairs of boundary cells and points
+    outside the grid require exact tests.
+    """
+
+    # grid of rasters pickled with previous versions is unavailable, i.e. all queries use exact tests
+    _grid_shape: Optional[npt.NDArray[np.int64]] = None
+
+    def __init__(
+        self,
+        resolution: float,
+        polygon_bounds: npt.NDArray[np.float64],
+        origin: npt.NDArray[np.float64],
+        grid_shape: npt.NDArray[np.int64],
+        interior_indptr: npt.NDArray[np.int64],
+        interior_indices: npt.NDArray[np.int64],
+        boundary_indptr: npt.NDArray[np.int64],
+        boundary_indices: npt.NDArray[np.int64],
+    ):
+        """
+        Constructor of PDMPolygonRaster
+        :param resolution: cell size [m]
+        :param polygon_bounds: bounding boxes of polygons (xmin, ymin, xmax, ymax), shape (P,4)
+        :param origin: lower-left corner of the grid, shape (2,)
+        :param grid_shape: number of cells along x and y, shape (2,)
+        :param interior_indptr: index pointer of polygons covering each cell, shape (cells+1,)
+        :param interior_indices: polygon indices covering the cells
+        :param boundary_indptr: index pointer of polygon boundaries crossing each cell, shape (cells+1,)
+        :param boundary_indices: polygon indices with boundary in the cells
+        """
+        self._resolution = resolution
+        self._polygon_bounds = polygon_bounds
+        self._origin = origin
+        self._grid_shape = grid_shape
+        self._interior_indptr = interior_indptr
+        self._interior_indices = interior_indices
+        self._boundary_indptr = boundary_indptr
+        self._boundary_indices = boundary_indices
+
+    def __len__(self) -> int:
+        """
+        Number of rasterized polygons
+        :return: int
+        """
+        return len(self._polygon_bounds)
+
+    @property
+    def resolution(self) -> float:
+        """
+        Getter for cell size of raster
+        :return: resolution [m]
+        """
+        return self._resolution
+
+    @classmethod
+    def from_polygons(
+        cls,
+        polygons: List[Geometry],
+        resolution: float = 1.0,
+        extent: Optional[Tuple[float, float, float, float]] = None,
+    ) -> PDMPolygonRaster:
+        """
+        Rasterizes polygons into a shared grid of interior and boundary cells.
+        :param polygons: list/array of polygons
+        :param resolution: cell size [m], defaults to 1.0
+        :param extent: optional area to rasterize (xmin, ymin, xmax, ymax), defaults to polygon bounds
+        :return: PDMPolygonRaster object
+        """
+        assert resolution > 0.0, "PDMPolygonRaster: Resolution must be positive!"
+
+        polygon_bounds = shapely.bounds(np.array(polygons, dtype=np.object_)).reshape(-1, 4)
+        if extent is None:
+            valid_bounds = polygon_bounds[np.isfinite(polygon_bounds).all(axis=-1)]
+            extent = (
+                (*valid_bounds[:, :2].min(axis=0), *valid_bounds[:, 2:].max(axis=0))
+                if len(valid_bounds) > 0
+                else (0.0, 0.0, 0.0, 0.0)
+            )
+        origin = np.array(extent[:2], dtype=np.float64)
+        grid_shape = np.ceil((np.array(extent[2:]) - origin) / resolution)
+        grid_shape = np.clip(np.nan_to_num(grid_shape), 0, None).astype(np.int64)
+        num_cells = int(grid_shape.prod())
+
+        # cells are interior/exterior if the boundary is farther than the half cell diagonal
+        half_diagonal = resolution * np.sqrt(2) / 2 * (1.0 + 1e-6)
+
+        interior_cells, interior_polygons, boundary_cells, boundary_polygons = [], [], [], []
+        for idx, polygon in enumerate(polygons):
+            # cells overlapping the polygon bounds, clipped to the grid
+            cell_min = np.floor((polygon_bounds[idx, :2] - origin) / resolution)
+            cell_max = np.floor((polygon_bounds[idx, 2:] - origin) / resolution)
+            if not (np.isfinite(cell_min).all() and np.isfinite(cell_max).all()):
+                continue
+            cell_min = np.clip(cell_min, 0, grid_shape).astype(np.int64)
+            cell_max = np.clip(cell_max + 1, 0, grid_shape).astype(np.int64)
+            if np.any(cell_max <= cell_min):
+                continue
+
+            cell_x, cell_y = np.meshgrid(
+                np.arange(cell_min[0], cell_max[0]), np.arange(cell_min[1], cell_max[1]), indexing="ij"
+            )
+            cell_x, cell_y = cell_x.ravel(), cell_y.ravel()
+            centers_x = origin[0] + (cell_x + 0.5) * resolution
+            centers_y = origin[1] + (cell_y + 0.5) * resolution
+
+            is_interior = shapely.vectorized.contains(polygon, centers_x, centers_y)
+            is_boundary = _within_distance(
+                polygon.boundary, shapely.points(centers_x, centers_y), half_diagonal
+            )
+            is_interior &= ~is_boundary
+
+            cell_idcs = cell_x * grid_shape[1] + cell_y
+            interior_cells.append(cell_idcs[is_interior])
+            interior_polygons.append(np.full(is_interior.sum(), idx, dtype=np.int64))
+            boundary_cells.append(cell_idcs[is_boundary])
+            boundary_polygons.append(np.full(is_boundary.sum(), idx, dtype=np.int64))
+
+        def _concatenate(arrays: List[npt.NDArray[np.int64]]) -> npt.NDArray[np.int64]:
+            return np.concatenate(arrays).astype(np.int64) if arrays else np.zeros(0, dtype=np.int64)
+
+        interior_indptr, interior_indices = _build_csr(
+            num_cells, _concatenate(interior_cells), _concatenate(interior_polygons)
+        )
+        boundary_indptr, boundary_indices = _build_csr(
+            num_cells, _concatenate(boundary_cells), _concatenate(boundary_polygons)
+        )
+
+        return PDMPolygonRaster(
+            resolution,
+            polygon_bounds,
+            origin,
+            grid_shape,
+            interior_indptr,
+            interior_indices,
+            boundary_indptr,
+            boundary_indices,
+        )
+
+    def points_in_polygons(
+        self,
+        polygons: npt.NDArray[np.object_],
+        points: npt.NDArray[np.float64],
+        polygon_mask: Optional[npt.NDArray[np.bool_]] = None,
+    ) -> npt.NDArray[np.bool_]:
+        """
+        Determines whether points are in the interior of polygons (equivalent to shapely's contains).
+        :param polygons: array of polygon geometries, used for exact tests
+        :param points: input-points, shape (N,2)
+        :param polygon_mask: optional boolean mask of polygons to test, others are False, defaults to all
+        :return: boolean array of shape (P,N)
+        """
+        output = np.zeros((len(self), len(points)), dtype=bool)
+        if polygon_mask is None:
+            polygon_mask = np.ones(len(self), dtype=bool)
+        points_x, points_y = points[:, 0], points[:, 1]
+
+        # flat cell index of each point, points outside the grid require exact tests
+        if self._grid_shape is not None:
+            cells_x = np.floor((points_x - self._origin[0]) / self._resolution)
+            cells_y = np.floor((points_y - self._origin[1]) / self._resolution)
+            in_grid = (
+                (cells_x >= 0)
+                & (cells_x < self._grid_shape[0])
+                & (cells_y >= 0)
+                & (cells_y < self._grid_shape[1])
+            )
+        else:
+            in_grid = np.zeros(len(points), dtype=bool)
+
+        exact_point_idcs, exact_polygon_idcs = [], []
+        grid_point_idcs = np.flatnonzero(in_grid)
+        if len(grid_point_idcs) > 0:
+            cell_idcs = (
+                cells_x[grid_point_idcs].astype(np.int64) * self._grid_shape[1]
+                + cells_y[grid_point_idcs].astype(np.int64)
+            )
+
+            # integer gather of polygons covering the cells
+            query_idcs, polygon_idcs = _gather_csr(
+                self._interior_indptr, self._interior_indices, cell_idcs
+            )
+            output[polygon_idcs, grid_point_idcs[query_idcs]] = True
+
+            query_idcs, polygon_idcs = _gather_csr(
+                self._boundary_indptr, self._boundary_indices, cell_idcs
+            )
+            exact_point_idcs.append(grid_point_idcs[query_idcs])
+            exact_polygon_idcs.append(polygon_idcs)
+
+        # points outside the grid are tested against polygons with overlapping bounds
+        outside_point_idcs = np.flatnonzero(~in_grid)
+        if len(outside_point_idcs) > 0:
+            x_min, y_min, x_max, y_max = self._polygon_bounds.T[..., None]
+            outside_x, outside_y = points_x[outside_point_idcs], points_y[outside_point_idcs]
+            polygon_idcs, query_idcs = np.nonzero(
+                (outside_x >= x_min) & (outside_x <= x_max) & (outside_y >= y_min) & (outside_y <= y_max)
+            )
+            exact_point_idcs.append(outside_point_idcs[query_idcs])
+            exact_polygon_idcs.append(polygon_idcs)
+
+        output[~polygon_mask] = False
+        if len(exact_point_idcs) > 0:
+            point_idcs = np.concatenate(exact_point_idcs)
+            polygon_idcs = np.concatenate(exact_polygon_idcs)
+            tested = polygon_mask[polygon_idcs]
+            point_idcs, polygon_idcs = point_idcs[tested], polygon_idcs[tested]
+            if len(point_idcs) > 0:
+                output[polygon_idcs, point_idcs] = shapely.contains_xy(
+                    polygons[polygon_idcs], points_x[point_idcs], points_y[point_idcs]
+                )
+
+        return output
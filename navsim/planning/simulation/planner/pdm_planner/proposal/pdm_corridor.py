@@ -0,0 +1,132 @@
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import numpy.typing as npt
+import shapely
+from shapely.geometry import Polygon
+from shapely.geometry.base import CAP_STYLE
+
+from navsim.planning.simulation.planner.pdm_planner.observation.pdm_occupancy_map import (
+    PDMCompositeOccupancyMap,
+    PDMOccupancyMap,
+)
+from navsim.planning.simulation.planner.pdm_planner.utils.pdm_path import PDMPath
+
+
+class PDMCorridor:
+    """
+    Driving corridor of a lateral path, i.e. the sub-path between two distances buffered by half the ego's width.
+    Polygons are cached per distance interval and shared by all proposals and time-steps of the path. Objects are
+    looked up with arrays over several occupancy maps at once, i.e. bounds and a vectorized intersection test.
+    """
+
+    def __init__(self, path: PDMPath, width: float):
+        """
+        Constructor of PDMCorridor
+        :param path: path of a lateral proposal
+        :param width: width of the corridor [m], e.g. ego's width
+        """
+        self._path = path
+        self._width = width
+
+        # lazy loaded, polygon of last queried distances
+        self._polygon: Optional[Polygon] = None
+        self._polygon_distances: Optional[Tuple[float, float]] = None
+
+    @property
+    def width(self) -> float:
+        """Getter for the width of the corridor [m]."""
+        return self._width
+
+    def get_polygon(self, start_distance: float, end_distance: float) -> Polygon:
+        """
+        Creates the corridor polygon between two distances (cached for the last distances).
+        :param start_distance: distance along the path to start [m]
+        :param end_distance: distance along the path to end [m]
+        :return: prepared polygon of the corridor
+        """
+        if self._polygon_distances != (start_distance, end_distance):
+            self._polygon = self._path.substring(start_distance, end_distance).buffer(
+                self._width / 2, cap_style=CAP_STYLE.square
+            )
+            shapely.prepare(self._polygon)
+            self._polygon_distances = (start_distance, end_distance)
+        return self._polygon
+
+    def query(
+        self,
+        occupancy_maps: List[PDMOccupancyMap],
+        start_distance: float,
+        end_distance: float,
+    ) -> List[npt.NDArray[np.int64]]:
+        """
+        Searches for geometries intersecting the corridor in several occupancy maps at once.
+        :param occupancy_maps: list of occupancy maps, e.g. of several time-steps
+        :param start_distance: distance along the path to start [m]
+        :param end_distance: distance along the path to end [m]
+        :return: indices of intersecting geometries for each occupancy map, in order of str-tree queries
+        """
+        polygon = self.get_polygon(start_distance, end_distance)
+
+        # geometries of static maps, shared by composite maps, are only checked once
+        parts, map_part_idcs = self._get_parts(occupancy_maps)
+        offsets = np.zeros(len(parts) + 1, dtype=np.int64)
+        np.cumsum([len(occupancy_map) - start_idx for occupancy_map, start_idx in parts], out=offsets[1:])
+        geometries = np.concatenate(
+            [np.zeros(0, dtype=np.object_)]
+            + [occupancy_map.geometries[start_idx:] for occupancy_map, start_idx in parts]
+        )
+
+        # intersection test of geometries within the bounds of the corridor
+        min_x, min_y, max_x, max_y = polygon.bounds
+        bounds = shapely.bounds(geometries).reshape(-1, 4)
+        candidate_idcs = np.flatnonzero(
+            (bounds[:, 0] <= max_x) & (bounds[:, 1] <= max_y) & (bounds[:, 2] >= min_x) & (bounds[:, 3] >= min_y)
+        )
+        intersecting = np.zeros(len(geometries), dtype=bool)
+        intersecting[candidate_idcs] = shapely.intersects(polygon, geometries[candidate_idcs])
+
+        # sort as str-tree queries, e.g. to select the same object among equally distant ones
+        intersecting_idcs: List[npt.NDArray[np.int64]] = []
+        for part_idcs in map_part_idcs:
+            geometry_idcs: List[npt.NDArray[np.int64]] = []
+            for part_idx in part_idcs:
+                occupancy_map, start_idx = parts[part_idx]
+                idcs = np.flatnonzero(intersecting[offsets[part_idx] : offsets[part_idx + 1]]) + start_idx
+                if len(idcs) > 1:
+                    idcs = idcs[np.argsort(occupancy_map.query_order[idcs])]
+                geometry_idcs.append(idcs)
+            intersecting_idcs.append(np.concatenate(geometry_idcs))
+
+        return intersecting_idcs
+
+    @staticmethod
+    def _get_parts(
+        occupancy_maps: List[PDMOccupancyMap],
+    ) -> Tuple[List[Tuple[PDMOccupancyMap, int]], List[List[int]]]:
+        """
+        Splits occupancy maps into parts of geometries, i.e. shared static maps and time-steps of composite maps.
+        :param occupancy_maps: list of occupancy maps
+        :return: parts as (occupancy map, start index of geometries), and indices of parts for each occupancy map
+        """
+        parts: List[Tuple[PDMOccupancyMap, int]] = []
+        part_to_idx: Dict[Tuple[int, int], int] = {}
+        map_part_idcs: List[List[int]] = []
+
+        for occupancy_map in occupancy_maps:
+            if isinstance(occupancy_map, PDMCompositeOccupancyMap):
+                static_map = occupancy_map.static_map
+                map_parts = [(static_map, 0), (occupancy_map, len(static_map))]
+            else:
+                map_parts = [(occupancy_map, 0)]
+
+            part_idcs: List[int] = []
+            for occupancy_map_part, start_idx in map_parts:
+                key = (id(occupancy_map_part), start_idx)
+                if key not in part_to_idx:
+                    part_to_idx[key] = len(parts)
+                    parts.append((occupancy_map_part, start_idx))
+                part_idcs.append(part_to_idx[key])
+            map_part_idcs.append(part_idcs)
+
+        return parts, map_part_idcs
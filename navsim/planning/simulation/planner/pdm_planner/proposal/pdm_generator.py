@@ -1,10 +1,9 @@
 import copy
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 import numpy as np
 import numpy.typing as npt
 from nuplan.common.actor_state.agent import Agent
-from nuplan.common.actor_state.car_footprint import CarFootprint
 from nuplan.common.actor_state.ego_state import EgoState
 from nuplan.common.actor_state.scene_object import SceneObject
 from nuplan.common.actor_state.state_representation import StateSE2, TimePoint
@@ -14,8 +13,6 @@ from nuplan.planning.simulation.trajectory.interpolated_trajectory import (
     InterpolatedTrajectory,
 )
 from nuplan.planning.simulation.trajectory.trajectory_sampling import TrajectorySampling
-from shapely.geometry import Point, Polygon
-from shapely.geometry.base import CAP_STYLE
 
 from navsim.planning.simulation.planner.pdm_planner.observation.pdm_observation import (
     PDMObservation,
@@ -24,9 +21,11 @@ from navsim.planning.simulation.planner.pdm_planner.proposal.pdm_proposal import
     PDMProposalManager,
 )
 from navsim.planning.simulation.planner.pdm_planner.utils.pdm_array_representation import (
+    state_array_to_coords_array,
     state_array_to_ego_states,
 )
 from navsim.planning.simulation.planner.pdm_planner.utils.pdm_enums import (
+    BBCoordsIndex,
     LeadingAgentIndex,
     StateIDMIndex,
     StateIndex,
@@ -75,7 +74,7 @@ class PDMGenerator:
         self._vehicle_parameters: Optional[VehicleParameters] = None
 
         # caches
-        self._driving_corridor_cache: Optional[Dict[int, Polygon]] = None
+        self._intersecting_objects_cache: Optional[Dict[Tuple[int, int], List[str]]] = None
         self._time_point_list: Optional[List[TimePoint]] = None
 
     def generate_proposals(
@@ -182,7 +181,7 @@ class PDMGenerator:
         )  # progress, velocity, rear-length
 
         # reset caches
-        self._driving_corridor_cache: Dict[int, Polygon] = {}
+        self._intersecting_objects_cache: Dict[Tuple[int, int], List[str]] = {}
 
         self._time_point_list: List[TimePoint] = []
         self._updated: bool = True
@@ -205,10 +204,10 @@ class PDMGenerator:
         # thus states are created for lateral_batch_idcs[0] and repeated
         dummy_proposal_idx = lateral_batch_idcs[0]
 
-        ego_position = Point(*self._initial_ego_state.rear_axle.point.array)
+        ego_position = self._initial_ego_state.rear_axle.point.array
 
-        ego_progress = self._proposal_manager[dummy_proposal_idx].linestring.project(
-            ego_position
+        ego_progress = float(
+            self._proposal_manager[dummy_proposal_idx].path.project_array(ego_position)
         )
         ego_velocity = self._initial_ego_state.dynamic_car_state.rear_axle_velocity_2d.x
 
@@ -289,48 +288,53 @@ class PDMGenerator:
             )
 
             # collect all leading vehicles ones for all proposals (run-time)
-            object_progress_dict: Dict[str, float] = {}
-            for object in intersecting_objects:
-                if object not in self._observation.collided_track_ids:
-                    object_progress = self._proposal_manager[
-                        dummy_proposal_idx
-                    ].linestring.project(self._observation[time_idx][object].centroid)
-                    object_progress_dict[object] = object_progress
+            leading_objects = [
+                object
+                for object in intersecting_objects
+                if object not in self._observation.collided_track_ids
+            ]
+            occupancy_map = self._observation[time_idx]
+            object_idcs = np.array(
+                [occupancy_map.token_to_idx[object] for object in leading_objects],
+                dtype=np.int64,
+            )
+            object_progress = np.asarray(
+                self._proposal_manager[dummy_proposal_idx].path.project_array(
+                    occupancy_map.centroids[object_idcs]
+                ),
+                dtype=np.float64,
+            ).reshape(-1)
+
+            # filter all objects ahead, for all proposals at once, shape (P, O)
+            current_ego_progress = self._state_idm_array[
+                lateral_batch_idcs, time_idx - 1, StateIDMIndex.PROGRESS
+            ]
+            agents_ahead = object_progress[None, :] > current_ego_progress[:, None]
+
+            # relative distances of ego boxes to objects ahead, shape (P, O)
+            relative_distances = np.full(agents_ahead.shape, np.inf, dtype=np.float64)
+            nearest_idcs = np.zeros(len(lateral_batch_idcs), dtype=np.int64)
+            batch_ahead_idcs, object_ahead_idcs = np.nonzero(agents_ahead)
+            if len(batch_ahead_idcs) > 0:
+                ego_boxes = self._get_ego_boxes(lateral_batch_idcs, time_idx - 1)
+                relative_distances[
+                    batch_ahead_idcs, object_ahead_idcs
+                ] = occupancy_map.boxes_distances(
+                    ego_boxes[batch_ahead_idcs], object_idcs[object_ahead_idcs]
+                )
+                nearest_idcs = np.argmin(relative_distances, axis=-1)
+            has_agents_ahead = agents_ahead.any(axis=-1)
 
             # select leading agent for each proposal individually
-            for proposal_idx in lateral_batch_idcs:
-                current_ego_progress = self._state_idm_array[
-                    proposal_idx, time_idx - 1, StateIDMIndex.PROGRESS
-                ]
-
-                # filter all objects ahead
-                agents_ahead: Dict[str, float] = {
-                    agent: progress
-                    for agent, progress in object_progress_dict.items()
-                    if progress > current_ego_progress
-                }
-
-                if len(agents_ahead) > 0:  # red light, object or agent ahead
-                    current_state_se2 = StateSE2(
-                        *self._state_array[
-                            proposal_idx, time_idx - 1, StateIndex.STATE_SE2
-                        ]
-                    )
-                    ego_polygon: Polygon = CarFootprint.build_from_rear_axle(
-                        current_state_se2, self._vehicle_parameters
-                    ).oriented_box.geometry
-
-                    relative_distances = [
-                        ego_polygon.distance(self._observation[time_idx][agent])
-                        for agent in agents_ahead.keys()
-                    ]
-
-                    argmin = np.argmin(relative_distances)
-                    nearest_agent = list(agents_ahead.keys())[argmin]
+            for batch_idx, proposal_idx in enumerate(lateral_batch_idcs):
+                if has_agents_ahead[batch_idx]:  # red light, object or agent ahead
+                    nearest_idx = nearest_idcs[batch_idx]
+                    nearest_agent = leading_objects[nearest_idx]
 
                     # add rel. distance for red light, object or agent
                     relative_distance = (
-                        current_ego_progress + relative_distances[argmin]
+                        current_ego_progress[batch_idx]
+                        + relative_distances[batch_idx, nearest_idx]
                     )
                     leading_agent_array[LeadingAgentIndex.PROGRESS] = relative_distance
 
@@ -339,7 +343,9 @@ class PDMGenerator:
                         leading_agent_array[
                             LeadingAgentIndex.VELOCITY
                         ] = self._get_leading_agent_velocity(
-                            current_state_se2.heading,
+                            self._state_array[
+                                proposal_idx, time_idx - 1, StateIndex.HEADING
+                            ],
                             self._observation.unique_objects[nearest_agent],
                         )
 
@@ -352,6 +358,21 @@ class PDMGenerator:
 
                 self._leading_agent_array[proposal_idx, time_idx] = leading_agent_array
 
+    def _get_ego_boxes(
+        self, proposal_idcs: List[int], time_idx: int
+    ) -> npt.NDArray[np.float64]:
+        """
+        Creates corners of ego's bounding box for several proposals at once.
+        :param proposal_idcs: list of proposal indices
+        :param time_idx: index of unrolling iteration
+        :return: corner coordinates, shape (P,4,2)
+        """
+        coords_array = state_array_to_coords_array(
+            self._state_array[proposal_idcs, time_idx][:, None],
+            self._vehicle_parameters,
+        )
+        return coords_array[:, 0, : BBCoordsIndex.CENTER]
+
     @staticmethod
     def _get_leading_agent_velocity(ego_heading: float, agent: SceneObject) -> float:
         """
@@ -377,42 +398,54 @@ class PDMGenerator:
     ) -> List[str]:
         """
         Returns and caches all intersecting objects for the proposals path and time-step.
+        Objects of all leading agent updates within the proposal horizon are queried at once.
         :param lateral_batch_idcs: list of proposal indices, sharing a path
         :param time_idx: index indicating the path of proposals
         :return: list of object tokens
         """
-        dummy_proposal_idx = lateral_batch_idcs[0]
-        driving_corridor: Polygon = self._get_driving_corridor(dummy_proposal_idx)
-        return self._observation[time_idx].intersects(driving_corridor)
-
-    def _get_driving_corridor(self, proposal_idx: int) -> Polygon:
-        """
-        Creates and caches driving corridor of ego-vehicle for each proposal path.
-        :param proposal_idx: index of a proposal
-        :return: linestring of max trajectory distance and ego's width
-        """
-        lateral_idx = self._proposal_manager[proposal_idx].lateral_idx
+        lateral_idx = self._proposal_manager[lateral_batch_idcs[0]].lateral_idx
+
+        if (lateral_idx, time_idx) not in self._intersecting_objects_cache.keys():
+            if time_idx <= self._proposal_sampling.num_poses:
+                time_idcs = list(
+                    range(
+                        self._leading_agent_update,
+                        self._proposal_sampling.num_poses + 1,
+                        self._leading_agent_update,
+                    )
+                )
+            else:
+                time_idcs = [time_idx]
 
-        if lateral_idx not in self._driving_corridor_cache.keys():
-            ego_distance = self._state_idm_array[
-                proposal_idx, 0, StateIDMIndex.PROGRESS
-            ]
-            trajectory_distance = (
-                ego_distance
-                + abs(self._proposal_manager.max_target_velocity)
-                * self._trajectory_sampling.num_poses
-                * self._sample_interval
-            )
-            linestring_ahead = self._proposal_manager[proposal_idx].path.substring(
-                ego_distance, trajectory_distance
-            )
-            expanded_path = linestring_ahead.buffer(
-                self._vehicle_parameters.width / 2, cap_style=CAP_STYLE.square
+            ego_distance, trajectory_distance = self._get_driving_corridor_interval(
+                lateral_batch_idcs[0]
             )
+            occupancy_maps = [self._observation[idx] for idx in time_idcs]
+            geometry_idcs = self._proposal_manager.get_corridor(
+                lateral_idx, self._vehicle_parameters.width
+            ).query(occupancy_maps, ego_distance, trajectory_distance)
+
+            for idx, occupancy_map, idcs in zip(time_idcs, occupancy_maps, geometry_idcs):
+                self._intersecting_objects_cache[(lateral_idx, idx)] = [
+                    occupancy_map.tokens[geometry_idx] for geometry_idx in idcs
+                ]
 
-            self._driving_corridor_cache[lateral_idx] = expanded_path
+        return self._intersecting_objects_cache[(lateral_idx, time_idx)]
 
-        return self._driving_corridor_cache[lateral_idx]
+    def _get_driving_corridor_interval(self, proposal_idx: int) -> Tuple[float, float]:
+        """
+        Calculates the distances along the proposals path of ego's driving corridor.
+        :param proposal_idx: index of a proposal
+        :return: start and end distance of max trajectory distance [m]
+        """
+        ego_distance = self._state_idm_array[proposal_idx, 0, StateIDMIndex.PROGRESS]
+        trajectory_distance = (
+            ego_distance
+            + abs(self._proposal_manager.max_target_velocity)
+            * self._trajectory_sampling.num_poses
+            * self._sample_interval
+        )
+        return ego_distance, trajectory_distance
 
     def _get_lateral_batch_dict(self) -> Dict[int, List[int]]:
         """
@@ -1,11 +1,14 @@
 from dataclasses import dataclass
-from typing import List
+from typing import Dict, List
 
 from shapely.geometry import LineString
 
 from navsim.planning.simulation.planner.pdm_planner.proposal.batch_idm_policy import (
     BatchIDMPolicy,
 )
+from navsim.planning.simulation.planner.pdm_planner.proposal.pdm_corridor import (
+    PDMCorridor,
+)
 from navsim.planning.simulation.planner.pdm_planner.utils.pdm_path import PDMPath
 
 
@@ -43,10 +46,14 @@ class PDMProposalManager:
         :param longitudinal_policies: IDM policy class (batch-wise)
         """
 
+        self._lateral_proposals: List[PDMPath] = lateral_proposals
         self._num_lateral_proposals: int = len(lateral_proposals)
         self._num_longitudinal_proposals: int = longitudinal_policies.num_policies
         self._longitudinal_policies: BatchIDMPolicy = longitudinal_policies
 
+        # lazy loaded, driving corridor per path (re-used over planner iterations)
+        self._corridors: Dict[int, PDMCorridor] = {}
+
         self._proposals: List[PDMProposal] = []
         proposal_idx = 0
 
@@ -81,6 +88,19 @@ class PDMProposalManager:
         """
         self._longitudinal_policies.update(speed_limit_mps)
 
+    def get_corridor(self, lateral_idx: int, width: float) -> PDMCorridor:
+        """
+        Returns the driving corridor of a path, created once per path and width (lazy loaded).
+        :param lateral_idx: index of the path
+        :param width: width of the corridor [m], e.g. ego's width
+        :return: PDMCorridor class
+        """
+        corridor = self._corridors.get(lateral_idx)
+        if corridor is None or corridor.width != width:
+            corridor = PDMCorridor(self._lateral_proposals[lateral_idx], width)
+            self._corridors[lateral_idx] = corridor
+        return corridor
+
     @property
     def num_lateral_proposals(self) -> int:
         return self._num_lateral_proposals
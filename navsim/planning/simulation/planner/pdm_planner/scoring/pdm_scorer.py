@@ -1,50 +1,58 @@
-import copy
 from dataclasses import dataclass
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 import numpy as np
 import numpy.typing as npt
+import shapely
 from nuplan.common.actor_state.vehicle_parameters import VehicleParameters, get_pacifica_parameters
 
-from nuplan.common.actor_state.state_representation import StateSE2
-from nuplan.common.actor_state.tracked_objects_types import AGENT_TYPES
 from nuplan.common.maps.abstract_map import AbstractMap
 from nuplan.common.maps.abstract_map_objects import LaneGraphEdgeMapObject
 from nuplan.common.maps.maps_datatypes import SemanticMapLayer
 from nuplan.planning.metrics.utils.collision_utils import CollisionType
-from nuplan.planning.simulation.observation.idm.utils import (
-    is_agent_ahead,
-    is_agent_behind,
-)
 from nuplan.planning.simulation.trajectory.trajectory_sampling import TrajectorySampling
-from shapely import Point, creation
 
 from navsim.planning.simulation.planner.pdm_planner.observation.pdm_observation import (
     PDMObservation,
 )
 from navsim.planning.simulation.planner.pdm_planner.observation.pdm_occupancy_map import (
     PDMDrivableMap,
+    PDMOccupancyMap,
 )
 from navsim.planning.simulation.planner.pdm_planner.scoring.pdm_comfort_metrics import (
     ego_is_comfortable,
 )
 from navsim.planning.simulation.planner.pdm_planner.scoring.pdm_scorer_utils import (
-    get_collision_type,
+    are_agents_ahead,
+    are_agents_behind,
+    get_collision_types,
+    get_infractions_before_ignored,
+    get_windowed_sums,
 )
 from navsim.planning.simulation.planner.pdm_planner.utils.pdm_array_representation import (
-    coords_array_to_polygon_array,
     state_array_to_coords_array,
 )
 from navsim.planning.simulation.planner.pdm_planner.utils.pdm_enums import (
     BBCoordsIndex,
     EgoAreaIndex,
     MultiMetricIndex,
+    SE2Index,
     StateIndex,
     WeightedMetricIndex,
 )
 from navsim.planning.simulation.planner.pdm_planner.utils.pdm_path import PDMPath
 import time
 
+# per-proposal metrics independent of other proposals, e.g. to cache and re-aggregate scores
+PROPOSAL_METRIC_NAMES = [
+    "multi_metrics",
+    "weighted_metrics",
+    "progress_raw",
+    "oncoming_progress",
+    "collision_time_idcs",
+    "ttc_time_idcs",
+]
+
 @dataclass
 class PDMScorerConfig:
     
@@ -60,6 +68,9 @@ class PDMScorerConfig:
     stopped_speed_threshold: float = 5e-03  # [m/s] (ttc)
     progress_distance_threshold: float = 0.1  # [m] (progress)
 
+    # geometry backend for collision checks, "sat" or "shapely" (reference)
+    collision_backend: str = "sat"
+
     @property
     def weighted_metrics_array(self) -> npt.NDArray[np.float64]:
         weighted_metrics = np.zeros(len(WeightedMetricIndex), dtype=np.float64)
@@ -86,22 +97,23 @@ class PDMScorer:
         self._config = config
         self._vehicle_parameters = vehicle_parameters
 
-        # lazy loaded
-        self._observation: Optional[PDMObservation] = None
-        self._centerline: Optional[PDMPath] = None
-        self._route_lane_ids: Optional[List[str]] = None
-        self._drivable_area_map: Optional[PDMDrivableMap] = None
+        # lazy loaded (one entry per scene)
+        self._observations: Optional[List[PDMObservation]] = None
+        self._centerlines: Optional[List[PDMPath]] = None
+        self._route_lane_ids: Optional[List[List[str]]] = None
+        self._drivable_area_maps: Optional[List[PDMDrivableMap]] = None
+        self._scene_offsets: Optional[npt.NDArray[np.int64]] = None
 
         self._num_proposals: Optional[int] = None
         self._states: Optional[npt.NDArray[np.float64]] = None
         self._ego_coords: Optional[npt.NDArray[np.float64]] = None
-        self._ego_polygons: Optional[npt.NDArray[np.object_]] = None
 
         self._ego_areas: Optional[npt.NDArray[np.bool_]] = None
 
         self._multi_metrics: Optional[npt.NDArray[np.float64]] = None
         self._weighted_metrics: Optional[npt.NDArray[np.float64]] = None
         self._progress_raw: Optional[npt.NDArray[np.float64]] = None
+        self._oncoming_progress: Optional[npt.NDArray[np.float64]] = None
 
         self._collision_time_idcs: Optional[npt.NDArray[np.float64]] = None
         self._ttc_time_idcs: Optional[npt.NDArray[np.float64]] = None
@@ -140,13 +152,44 @@ class PDMScorer:
         :return: array containing score of each proposal
         """
 
+        return self.score_proposals_batch(
+            states,
+            [len(states)],
+            [observation],
+            [centerline],
+            [route_lane_ids],
+            [drivable_area_map],
+        )
+
+    def score_proposals_batch(
+        self,
+        states: npt.NDArray[np.float64],
+        proposal_counts: List[int],
+        observations: List[PDMObservation],
+        centerlines: List[PDMPath],
+        route_lane_ids: List[List[str]],
+        drivable_area_maps: List[PDMDrivableMap],
+    ) -> npt.NDArray[np.float64]:
+        """
+        Scores proposals of several scenes stacked along the batch-dim.
+        Metrics run once on the full stack. Only look-ups in the map and centerline of each scene loop over
+        scenes, while collision and ttc checks query the tracks of all scenes at once. Progress is normalized per scene.
+        :param states: array representation of simulated proposals of all scenes
+        :param proposal_counts: number of consecutive proposals belonging to each scene
+        :param observations: PDM's observation class of each scene
+        :param centerlines: path of the centerline of each scene
+        :param route_lane_ids: list containing on-route lane ids of each scene
+        :param drivable_area_maps: Occupancy map of drivable are polygons of each scene
+        :return: array containing score of each proposal
+        """
         # initialize & lazy load class values
         self._reset(
             states,
-            observation,
-            centerline,
+            proposal_counts,
+            observations,
+            centerlines,
             route_lane_ids,
-            drivable_area_map,
+            drivable_area_maps,
         )
 
         # fill value ego-area array (used in multiple metrics)
@@ -155,32 +198,101 @@ class PDMScorer:
         # 1. multiplicative metrics
         self._calculate_no_at_fault_collision()
         self._calculate_drivable_area_compliance()
-        self._calculate_driving_direction_compliance()
+        self._calculate_oncoming_progress()
+        self._calculate_driving_direction_compliance(self._scene_offsets)
 
         # 2. weighted metrics
         self._calculate_progress()
         self._calculate_ttc()
         self._calculate_is_comfortable()
 
+        return self._aggregate_scores(self._scene_offsets)
+
+    def get_proposal_metrics(self) -> Dict[str, npt.NDArray]:
+        """
+        Returns per-proposal metrics of the last scoring call, which do not depend on other proposals.
+        :return: dictionary of metric names (see PROPOSAL_METRIC_NAMES) and proposal-first arrays
+        """
+        proposal_arrays = self._get_proposal_arrays()
+        return {name: proposal_arrays[f"_{name}"] for name in PROPOSAL_METRIC_NAMES}
+
+    def score_proposal_metrics(
+        self, proposal_metrics: Dict[str, npt.NDArray]
+    ) -> npt.NDArray[np.float64]:
+        """
+        Scores proposals of a single scene from precomputed per-proposal metrics (e.g. from a cache).
+        Metrics depending on all proposals of the scene (driving direction, progress) are re-computed.
+        :param proposal_metrics: dictionary of metric names and proposal-first arrays, see get_proposal_metrics
+        :return: array containing score of each proposal
+        """
+        assert set(proposal_metrics.keys()) == set(
+            PROPOSAL_METRIC_NAMES
+        ), "PDMScorer: Proposal metrics are incomplete!"
+
+        self._set_proposal_arrays(
+            {f"_{name}": array.copy() for name, array in proposal_metrics.items()}
+        )
+        self._calculate_driving_direction_compliance()
+
         return self._aggregate_scores()
 
-    def _aggregate_scores(self) -> npt.NDArray[np.float64]:
+    def _get_proposal_arrays(self) -> Dict[str, npt.NDArray]:
+        """
+        Collects all arrays with a proposal dimension. Metric arrays are transposed to be proposal-first.
+        :return: dictionary of attribute names and arrays
+        """
+        return {
+            "_states": self._states,
+            "_ego_coords": self._ego_coords,
+            "_ego_areas": self._ego_areas,
+            "_multi_metrics": self._multi_metrics.T,
+            "_weighted_metrics": self._weighted_metrics.T,
+            "_progress_raw": self._progress_raw,
+            "_oncoming_progress": self._oncoming_progress,
+            "_collision_time_idcs": self._collision_time_idcs,
+            "_ttc_time_idcs": self._ttc_time_idcs,
+        }
+
+    def _set_proposal_arrays(self, proposal_arrays: Dict[str, npt.NDArray]) -> None:
+        """
+        Sets arrays with a proposal dimension, e.g. views on the proposals of a single scene.
+        :param proposal_arrays: dictionary of attribute names and proposal-first arrays
+        """
+        for name, array in proposal_arrays.items():
+            if name in ["_multi_metrics", "_weighted_metrics"]:
+                array = array.T
+            setattr(self, name, array)
+        self._num_proposals = len(self._progress_raw)
+
+    def _aggregate_scores(
+        self, scene_offsets: Optional[npt.NDArray[np.int64]] = None
+    ) -> npt.NDArray[np.float64]:
         """
         Aggregates metrics with multiplicative and weighted average.
+        :param scene_offsets: start indices of each scene and total number of proposals, defaults to one scene
         :return: array containing score of each proposal
         """
+        if scene_offsets is None:
+            scene_offsets = np.array([0, self._num_proposals], dtype=np.int64)
 
         # accumulate multiplicative metrics
         multiplicate_sim_rewards = self._multi_metrics.prod(axis=0)
 
-        # normalize and fill progress values
+        # normalize and fill progress values (maximum progress of each scene)
         raw_progress = self._progress_raw * multiplicate_sim_rewards
-        max_raw_progress = np.max(raw_progress)
-        if max_raw_progress > self._config.progress_distance_threshold:
-            normalized_progress = raw_progress / max_raw_progress
-        else:
-            normalized_progress = np.ones(len(raw_progress), dtype=np.float64)
-            normalized_progress[multiplicate_sim_rewards == 0.0] = 0.0
+        max_raw_progress = np.repeat(
+            np.maximum.reduceat(raw_progress, scene_offsets[:-1]), np.diff(scene_offsets)
+        )
+        fallback_progress = np.ones(len(raw_progress), dtype=np.float64)
+        fallback_progress[multiplicate_sim_rewards == 0.0] = 0.0
+
+        above_threshold = max_raw_progress > self._config.progress_distance_threshold
+        normalized_progress = np.divide(
+            raw_progress,
+            max_raw_progress,
+            out=fallback_progress,
+            where=above_threshold,
+        )
         self._weighted_metrics[WeightedMetricIndex.PROGRESS] = normalized_progress
 
 
@@ -199,27 +311,41 @@ class PDMScorer:
     def _reset(
         self,
         states: npt.NDArray[np.float64],
-        observation: PDMObservation,
-        centerline: PDMPath,
-        route_lane_ids: List[str],
-        drivable_area_map: PDMDrivableMap,
+        proposal_counts: List[int],
+        observations: List[PDMObservation],
+        centerlines: List[PDMPath],
+        route_lane_ids: List[List[str]],
+        drivable_area_maps: List[PDMDrivableMap],
     ) -> None:
         """
         Resets metric values and lazy loads input classes.
-        :param states: array representation of simulated proposals
-        :param observation: PDM's observation class
-        :param centerline: path of the centerline
-        :param route_lane_ids: list containing on-route lane ids
-        :param drivable_area_map: Occupancy map of drivable are polygons
+        :param states: array representation of simulated proposals of all scenes
+        :param proposal_counts: number of consecutive proposals belonging to each scene
+        :param observations: PDM's observation class of each scene
+        :param centerlines: path of the centerline of each scene
+        :param route_lane_ids: list containing on-route lane ids of each scene
+        :param drivable_area_maps: Occupancy map of drivable are polygons of each scene
         """
         assert states.ndim == 3
         assert states.shape[1] == self.proposal_sampling.num_poses + 1
         assert states.shape[2] == StateIndex.size()
 
-        self._observation = observation
-        self._centerline = centerline
+        num_scenes = len(proposal_counts)
+        assert (
+            len(observations)
+            == len(centerlines)
+            == len(route_lane_ids)
+            == len(drivable_area_maps)
+            == num_scenes
+        ), "PDMScorer: Number of scenes does not match!"
+        assert all(count > 0 for count in proposal_counts), "PDMScorer: Scenes without proposals!"
+        assert sum(proposal_counts) == len(states), "PDMScorer: Proposal counts do not match states!"
+
+        self._observations = observations
+        self._centerlines = centerlines
         self._route_lane_ids = route_lane_ids
-        self._drivable_area_map = drivable_area_map
+        self._drivable_area_maps = drivable_area_maps
+        self._scene_offsets = np.concatenate([[0], np.cumsum(proposal_counts)]).astype(np.int64)
 
         self._num_proposals = states.shape[0]
 
@@ -229,9 +355,6 @@ class PDMScorer:
         # calculate coordinates of ego corners and center
         self._ego_coords = state_array_to_coords_array(states, self._vehicle_parameters)
 
-        # initialize all ego polygons from corners
-        self._ego_polygons = coords_array_to_polygon_array(self._ego_coords)
-
         # zero initialize all remaining arrays.
         self._ego_areas = np.zeros(
             (
@@ -248,6 +371,9 @@ class PDMScorer:
             (len(WeightedMetricIndex), self._num_proposals), dtype=np.float64
         )
         self._progress_raw = np.zeros(self._num_proposals, dtype=np.float64)
+        self._oncoming_progress = np.zeros(
+            (self._num_proposals, self.proposal_sampling.num_poses + 1), dtype=np.float64
+        )
 
         # initialize infraction arrays with infinity (meaning no infraction occurs)
         self._collision_time_idcs = np.zeros(self._num_proposals, dtype=np.float64)
@@ -260,15 +386,38 @@ class PDMScorer:
         Determines the area of proposals over time.
         Areas are (1) in multiple lanes, (2) non-drivable area, or (3) oncoming traffic
         """
+        for scene_idx, (start_idx, end_idx) in enumerate(
+            zip(self._scene_offsets[:-1], self._scene_offsets[1:])
+        ):
+            self._ego_areas[start_idx:end_idx] = self._get_ego_areas(
+                self._ego_coords[start_idx:end_idx],
+                self._drivable_area_maps[scene_idx],
+                self._route_lane_ids[scene_idx],
+            )
+
+    def _get_ego_areas(
+        self,
+        ego_coords: npt.NDArray[np.float64],
+        drivable_area_map: PDMDrivableMap,
+        route_lane_ids: List[str],
+    ) -> npt.NDArray[np.bool_]:
+        """
+        Determines the area of proposals of a single scene over time.
+        :param ego_coords: coordinates of ego corners and center, shape (proposals, horizon, 5, 2)
+        :param drivable_area_map: Occupancy map of drivable are polygons
+        :param route_lane_ids: list containing on-route lane ids
+        :return: boolean array, shape (proposals, horizon, len(EgoAreaIndex))
+        """
 
-        n_proposals, n_horizon, n_points, _ = self._ego_coords.shape
+        n_proposals, n_horizon, n_points, _ = ego_coords.shape
+        ego_areas = np.zeros((n_proposals, n_horizon, len(EgoAreaIndex)), dtype=np.bool_)
 
-        in_polygons = self._drivable_area_map.points_in_polygons(self._ego_coords)
+        in_polygons = drivable_area_map.points_in_polygons(ego_coords)
         in_polygons = in_polygons.transpose(
             1, 2, 0, 3
         )  # shape: n_proposals, n_horizon, n_polygons, n_points
 
-        drivable_area_idcs = self._drivable_area_map.get_indices_of_map_type(
+        drivable_area_idcs = drivable_area_map.get_indices_of_map_type(
             [
                 SemanticMapLayer.ROADBLOCK,
                 SemanticMapLayer.INTERSECTION,
@@ -277,14 +426,14 @@ class PDMScorer:
             ]
         )
 
-        drivable_lane_idcs = self._drivable_area_map.get_indices_of_map_type(
+        drivable_lane_idcs = drivable_area_map.get_indices_of_map_type(
             [SemanticMapLayer.LANE, SemanticMapLayer.LANE_CONNECTOR]
         )
 
         drivable_on_route_idcs: List[int] = [
             idx
             for idx in drivable_lane_idcs
-            if self._drivable_area_map.tokens[idx] in self._route_lane_ids
+            if drivable_area_map.tokens[idx] in route_lane_ids
         ]  # index mask for on-route lanes
 
         corners_in_polygon = in_polygons[..., :-1]  # ignore center coordinate
@@ -304,21 +453,23 @@ class PDMScorer:
         )
 
         multiple_lanes_mask = np.logical_and(batch_multiple_lanes_mask, batch_not_single_lanes_mask)
-        self._ego_areas[multiple_lanes_mask, EgoAreaIndex.MULTIPLE_LANES] = True
+        ego_areas[multiple_lanes_mask, EgoAreaIndex.MULTIPLE_LANES] = True
 
         # in_nondrivable_area: if at least one corner is not within any drivable polygon
         batch_nondrivable_area_mask = np.zeros((n_proposals, n_horizon), dtype=np.bool_)
         batch_nondrivable_area_mask = (
             corners_in_polygon[:, :, drivable_area_idcs].sum(axis=-2) > 0
         ).sum(axis=-1) < 4
-        self._ego_areas[batch_nondrivable_area_mask, EgoAreaIndex.NON_DRIVABLE_AREA] = True
+        ego_areas[batch_nondrivable_area_mask, EgoAreaIndex.NON_DRIVABLE_AREA] = True
 
         # in_oncoming_traffic: if center not in any drivable polygon that is on-route
         batch_oncoming_traffic_mask = np.zeros((n_proposals, n_horizon), dtype=np.bool_)
         batch_oncoming_traffic_mask = (
             center_in_polygon[..., drivable_on_route_idcs].sum(axis=-1) == 0
         )
-        self._ego_areas[batch_oncoming_traffic_mask, EgoAreaIndex.ONCOMING_TRAFFIC] = True
+        ego_areas[batch_oncoming_traffic_mask, EgoAreaIndex.ONCOMING_TRAFFIC] = True
+
+        return ego_areas
 
     def _calculate_no_at_fault_collision(self) -> None:
         """
@@ -326,65 +477,160 @@ class PDMScorer:
         """
         no_collision_scores = np.ones(self._num_proposals, dtype=np.float64)
 
-        proposal_collided_track_ids = {
-            proposal_idx: copy.deepcopy(self._observation.collided_track_ids)
-            for proposal_idx in range(self._num_proposals)
-        }
+        is_stopped, is_agent_type = self._get_track_attributes()
+        proposal_idcs, time_idcs, track_idcs, hit_centroids, hit_front_bumpers = self._get_track_hits(
+            self._ego_coords[:, :, : BBCoordsIndex.CENTER],
+            np.arange(self.proposal_sampling.num_poses + 1),
+            segments=self._ego_coords[:, :, [BBCoordsIndex.FRONT_LEFT, BBCoordsIndex.FRONT_RIGHT]],
+        )
 
-        for time_idx in range(self.proposal_sampling.num_poses + 1):
-            ego_polygons = self._ego_polygons[:, time_idx]
-            intersecting = self._observation[time_idx].query(ego_polygons, predicate="intersects")
+        if len(proposal_idcs) > 0:
+            # classify all collisions
+            collision_types = get_collision_types(
+                self._states[proposal_idcs, time_idcs],
+                hit_front_bumpers,
+                hit_centroids,
+                is_stopped[track_idcs],
+            )
+            collisions_at_stopped_track_or_active_front = np.isin(
+                collision_types,
+                [
+                    CollisionType.ACTIVE_FRONT_COLLISION.value,
+                    CollisionType.STOPPED_TRACK_COLLISION.value,
+                ],
+            )
+            collision_at_lateral = (
+                collision_types == CollisionType.ACTIVE_LATERAL_COLLISION.value
+            )
+            ego_in_multiple_lanes_or_nondrivable_area = self._ego_areas[
+                proposal_idcs, time_idcs
+            ][:, [EgoAreaIndex.MULTIPLE_LANES, EgoAreaIndex.NON_DRIVABLE_AREA]].any(axis=-1)
+
+            # 1. at fault collision (2. no at fault collisions ignore the track afterwards)
+            at_fault_mask = np.logical_or(
+                collisions_at_stopped_track_or_active_front,
+                np.logical_and(ego_in_multiple_lanes_or_nondrivable_area, collision_at_lateral),
+            )
+            at_fault_mask = get_infractions_before_ignored(
+                proposal_idcs, track_idcs, time_idcs, at_fault_mask
+            )
 
-            if len(intersecting) == 0:
-                continue
+            no_at_fault_collision_scores = np.where(
+                is_agent_type[track_idcs[at_fault_mask]], 0.0, 0.5
+            )
+            np.minimum.at(
+                no_collision_scores, proposal_idcs[at_fault_mask], no_at_fault_collision_scores
+            )
+            np.minimum.at(
+                self._collision_time_idcs,
+                proposal_idcs[at_fault_mask],
+                time_idcs[at_fault_mask].astype(np.float64),
+            )
 
-            for proposal_idx, geometry_idx in zip(intersecting[0], intersecting[1]):
-                token = self._observation[time_idx].tokens[geometry_idx]
-                if (self._observation.red_light_token in token) or (
-                    token in proposal_collided_track_ids[proposal_idx]
-                ):
-                    continue
+        self._multi_metrics[MultiMetricIndex.NO_COLLISION] = no_collision_scores
 
-                ego_in_multiple_lanes_or_nondrivable_area = (
-                    self._ego_areas[proposal_idx, time_idx, EgoAreaIndex.MULTIPLE_LANES]
-                    or self._ego_areas[proposal_idx, time_idx, EgoAreaIndex.NON_DRIVABLE_AREA]
-                )
+    def _get_track_attributes(self) -> Tuple[npt.NDArray[np.bool_], npt.NDArray[np.bool_]]:
+        """
+        Concatenates attributes of the tracked objects of all scenes, indexed as in _get_track_hits.
+        :return: boolean arrays whether tracks are stopped and of agent type
+        """
+        track_arrays = [observation.track_arrays for observation in self._observations]
+        is_stopped = np.concatenate(
+            [np.zeros(0, dtype=np.bool_)] + [arrays.is_stopped for arrays in track_arrays]
+        )
+        is_agent_type = np.concatenate(
+            [np.zeros(0, dtype=np.bool_)] + [arrays.is_agent_type for arrays in track_arrays]
+        )
+        return is_stopped, is_agent_type
 
-                tracked_object = self._observation.unique_objects[token]
+    def _get_track_hits(
+        self,
+        boxes: npt.NDArray[np.float64],
+        time_idcs: npt.NDArray[np.int64],
+        segments: Optional[npt.NDArray[np.float64]] = None,
+    ) -> Tuple[
+        npt.NDArray[np.int64],
+        npt.NDArray[np.int64],
+        npt.NDArray[np.int64],
+        npt.NDArray[np.float64],
+        Optional[npt.NDArray[np.bool_]],
+    ]:
+        """
+        Queries tracked objects intersecting with boxes of all proposals in the occupancy maps of their scene at once.
+        Ignores red lights and previously collided tracks.
+        :param boxes: array of box corners, shape (proposals, K, 4, 2)
+        :param time_idcs: index of occupancy map in observation for each box of a proposal, shape (K,)
+        :param segments: optional segments to check against intersected tracks, shape (proposals, K, 2, 2)
+        :return: proposal indices, box indices (along K), and track indices (into _get_track_attributes) of
+            intersections, centroid coordinates of the intersected tracks, and intersections of segments (or None)
+        """
+        unique_time_idcs, table_idcs = np.unique(time_idcs, return_inverse=True)
+        table_idcs = table_idcs.reshape(-1)
+
+        # occupancy maps of each scene and unique time index, with tracks of all scenes concatenated
+        occupancy_maps: List[PDMOccupancyMap] = []
+        geometry_masks, map_track_idcs = [], []
+        track_offset = 0
+        for observation in self._observations:
+            collided_track_ids = set(observation.collided_track_ids)
+            collided_track_mask = np.array(
+                [token in collided_track_ids for token in observation.track_arrays.tokens],
+                dtype=np.bool_,
+            )
+            for time_idx in unique_time_idcs:
+                track_idcs = observation.get_track_indices(time_idx)
+                valid_mask = track_idcs >= 0
+                valid_mask[valid_mask] = ~collided_track_mask[track_idcs[valid_mask]]
+
+                occupancy_maps.append(observation[time_idx])
+                geometry_masks.append(valid_mask)
+                map_track_idcs.append(track_idcs + track_offset)
+            track_offset += len(observation.track_arrays)
+
+        num_proposals, num_boxes = boxes.shape[:2]
+        scene_idcs = np.repeat(np.arange(len(self._observations)), np.diff(self._scene_offsets))
+        map_idcs = (scene_idcs[:, None] * len(unique_time_idcs) + table_idcs[None]).reshape(-1)
+
+        box_idcs, geometry_idcs = PDMOccupancyMap.query_boxes_batch(
+            occupancy_maps,
+            boxes.reshape(-1, 4, 2),
+            map_idcs,
+            geometry_masks=geometry_masks,
+            backend=self._config.collision_backend,
+        )
+        hit_map_idcs = map_idcs[box_idcs]
 
-                # classify collision
-                collision_type: CollisionType = get_collision_type(
-                    self._states[proposal_idx, time_idx],
-                    self._ego_polygons[proposal_idx, time_idx],
-                    tracked_object,
-                    self._observation[time_idx][token],
-                )
-                collisions_at_stopped_track_or_active_front: bool = collision_type in [
-                    CollisionType.ACTIVE_FRONT_COLLISION,
-                    CollisionType.STOPPED_TRACK_COLLISION,
-                ]
-                collision_at_lateral: bool = (
-                    collision_type == CollisionType.ACTIVE_LATERAL_COLLISION
-                )
+        # track index and centroid of each hit via the concatenated geometries of all maps
+        map_offsets = np.concatenate([[0], np.cumsum([len(idcs) for idcs in map_track_idcs])])
+        flat_idcs = map_offsets[hit_map_idcs] + geometry_idcs
+        track_idcs = np.concatenate(map_track_idcs)[flat_idcs]
 
-                # 1. at fault collision
-                if collisions_at_stopped_track_or_active_front or (
-                    ego_in_multiple_lanes_or_nondrivable_area and collision_at_lateral
-                ):
-                    no_at_fault_collision_score = (
-                        0.0 if tracked_object.tracked_object_type in AGENT_TYPES else 0.5
-                    )
-                    no_collision_scores[proposal_idx] = np.minimum(
-                        no_collision_scores[proposal_idx], no_at_fault_collision_score
-                    )
-                    self._collision_time_idcs[proposal_idx] = min(
-                        time_idx, self._collision_time_idcs[proposal_idx]
-                    )
-
-                else:  # 2. no at fault collision
-                    proposal_collided_track_ids[proposal_idx].append(token)
+        unique_flat_idcs, centroid_idcs = np.unique(flat_idcs, return_inverse=True)
+        centroids = shapely.centroid(
+            np.concatenate([occupancy_map.geometries for occupancy_map in occupancy_maps])[
+                unique_flat_idcs
+            ]
+        )
+        centroids = np.stack([shapely.get_x(centroids), shapely.get_y(centroids)], axis=-1)
+        centroids = centroids.reshape(-1, 2)[centroid_idcs.reshape(-1)]
+
+        segment_hits = None
+        if segments is not None:
+            segment_hits = PDMOccupancyMap.segments_intersect_batch(
+                occupancy_maps,
+                segments.reshape(-1, 2, 2)[box_idcs],
+                hit_map_idcs,
+                geometry_idcs,
+                backend=self._config.collision_backend,
+            )
 
-        self._multi_metrics[MultiMetricIndex.NO_COLLISION] = no_collision_scores
+        return (
+            box_idcs // num_boxes,
+            box_idcs % num_boxes,
+            track_idcs,
+            centroids,
+            segment_hits,
+        )
 
     def _calculate_drivable_area_compliance(self) -> None:
         """
@@ -395,45 +641,46 @@ class PDMScorer:
         drivable_area_compliance_scores[off_road_mask] = 0.0
         self._multi_metrics[MultiMetricIndex.DRIVABLE_AREA] = drivable_area_compliance_scores
 
-    def _calculate_driving_direction_compliance(self) -> None:
+    def _calculate_oncoming_progress(self) -> None:
         """
-        Re-implementation of nuPlan's driving direction compliance metric
+        Calculates the progress of proposals in oncoming traffic for each time-step.
         """
         center_coordinates = self._ego_coords[:, :, BBCoordsIndex.CENTER]
-        oncoming_progress = np.zeros(
-            (self._num_proposals, self.proposal_sampling.num_poses + 1),
-            dtype=np.float64,
-        )
-        oncoming_progress[:, 1:] = (
+        self._oncoming_progress[:, 1:] = (
             (center_coordinates[:, 1:] - center_coordinates[:, :-1]) ** 2.0
         ).sum(axis=-1) ** 0.5
 
         # mask out progress along the driving direction
         oncoming_traffic_masks = self._ego_areas[:, :, EgoAreaIndex.ONCOMING_TRAFFIC]
-        oncoming_progress[~oncoming_traffic_masks] = 0.0
-
-        # aggregate
-        driving_direction_compliance_scores = np.ones(self._num_proposals, dtype=np.float64)
+        self._oncoming_progress[~oncoming_traffic_masks] = 0.0
 
+    def _calculate_driving_direction_compliance(
+        self, scene_offsets: Optional[npt.NDArray[np.int64]] = None
+    ) -> None:
+        """
+        Re-implementation of nuPlan's driving direction compliance metric
+        :param scene_offsets: start indices of each scene and total number of proposals, defaults to one scene
+        """
         horizon = int(
             self._config.driving_direction_horizon / self.proposal_sampling.interval_length
         )
 
-        oncoming_progress_over_horizon = np.array(
-            [
-                sum(oncoming_progress[max(0, time_idx - horizon) : time_idx + 1])
-                for time_idx in range(len(oncoming_progress))
-            ],
-            dtype=np.float64,
+        # NOTE: the window slides along the first (proposal) axis, as in the original implementation.
+        # Windows do not extend over scene boundaries to keep batched and single-scene scoring identical.
+        oncoming_progress_over_horizon = get_windowed_sums(
+            self._oncoming_progress, horizon, scene_offsets
+        )
+        max_oncoming_progress = oncoming_progress_over_horizon.max(axis=-1)
+
+        driving_direction_compliance_scores = np.where(
+            max_oncoming_progress < self._config.driving_direction_compliance_threshold,
+            1.0,
+            np.where(
+                max_oncoming_progress < self._config.driving_direction_violation_threshold,
+                0.5,
+                0.0,
+            ),
         )
-
-        for proposal_idx, progress in enumerate(oncoming_progress_over_horizon.max(axis=-1)):
-            if progress < self._config.driving_direction_compliance_threshold:
-                driving_direction_compliance_scores[proposal_idx] = 1.0
-            elif progress < self._config.driving_direction_violation_threshold:
-                driving_direction_compliance_scores[proposal_idx] = 0.5
-            else:
-                driving_direction_compliance_scores[proposal_idx] = 0.0
 
         self._multi_metrics[MultiMetricIndex.DRIVING_DIRECTION] = (
             driving_direction_compliance_scores
@@ -446,14 +693,16 @@ class PDMScorer:
         """
 
         # calculate raw progress in meter
-        progress_in_meter = np.zeros(self._num_proposals, dtype=np.float64)
-        for proposal_idx in range(self._num_proposals):
-            start_point = Point(*self._ego_coords[proposal_idx, 0, BBCoordsIndex.CENTER])
-            end_point = Point(*self._ego_coords[proposal_idx, -1, BBCoordsIndex.CENTER])
-            progress = self._centerline.project([start_point, end_point])
-            progress_in_meter[proposal_idx] = progress[1] - progress[0]
+        progress = np.zeros((self._num_proposals, 2), dtype=np.float64)
+        for scene_idx, (start_idx, end_idx) in enumerate(
+            zip(self._scene_offsets[:-1], self._scene_offsets[1:])
+        ):
+            progress[start_idx:end_idx] = self._centerlines[scene_idx].project_array(
+                self._ego_coords[start_idx:end_idx, [0, -1], BBCoordsIndex.CENTER]
+            )
+        progress_in_meter = progress[:, 1] - progress[:, 0]
 
-        self._progress_raw = np.clip(progress_in_meter, a_min=0, a_max=None)
+        self._progress_raw[:] = np.clip(progress_in_meter, a_min=0, a_max=None)
 
     def _calculate_ttc(self):
         """
@@ -461,21 +710,15 @@ class PDMScorer:
         """
 
         ttc_scores = np.ones(self._num_proposals, dtype=np.float64)
-        temp_collided_track_ids = {
-            proposal_idx: copy.deepcopy(self._observation.collided_track_ids)
-            for proposal_idx in range(self._num_proposals)
-        }
 
         # calculate TTC for 1s in the future with less temporal resolution.
         future_time_idcs = np.arange(0, 10, 3)
         n_future_steps = len(future_time_idcs)
 
-        # create polygons for each ego position and 1s future projection
-        coords_exterior = self._ego_coords.copy()
-        coords_exterior[:, :, BBCoordsIndex.CENTER, :] = coords_exterior[
-            :, :, BBCoordsIndex.FRONT_LEFT, :
-        ]
-        coords_exterior_time_steps = np.repeat(coords_exterior[:, :, None], n_future_steps, axis=2)
+        # create boxes for each ego position and 1s future projection
+        boxes_time_steps = np.repeat(
+            self._ego_coords[:, :, None, : BBCoordsIndex.CENTER], n_future_steps, axis=2
+        )
 
         speeds = np.hypot(
             self._states[..., StateIndex.VELOCITY_X],
@@ -492,60 +735,58 @@ class PDMScorer:
 
         for idx, future_time_idx in enumerate(future_time_idcs):
             delta_t = float(future_time_idx) * self.proposal_sampling.interval_length
-            coords_exterior_time_steps[:, :, idx] = (
-                coords_exterior_time_steps[:, :, idx] + dxy_per_s[:, :, None] * delta_t
+            boxes_time_steps[:, :, idx] = (
+                boxes_time_steps[:, :, idx] + dxy_per_s[:, :, None] * delta_t
             )
 
-        polygons = creation.polygons(coords_exterior_time_steps)
+        # check collision for each proposal and projection, boxes ordered by time and projection step
+        n_horizon = self.proposal_sampling.num_poses + 1
+        proposal_idcs, order_keys, track_idcs, centroids, _ = self._get_track_hits(
+            boxes_time_steps.reshape(self._num_proposals, n_horizon * n_future_steps, 4, 2),
+            (np.arange(n_horizon)[:, None] + future_time_idcs[None]).reshape(-1),
+        )
+        time_idcs = order_keys // n_future_steps
+
+        # ignore collisions of (close-to) stopped ego
+        moving_mask = speeds[proposal_idcs, time_idcs] >= self._config.stopped_speed_threshold
+        proposal_idcs, time_idcs = proposal_idcs[moving_mask], time_idcs[moving_mask]
+        order_keys = order_keys[moving_mask]
+        track_idcs = track_idcs[moving_mask]
+        centroids = centroids[moving_mask]
+
+        if len(proposal_idcs) > 0:
+            ego_rear_axles = self._states[proposal_idcs, time_idcs][:, StateIndex.STATE_SE2]
+            ego_in_multiple_lanes_or_nondrivable_area = self._ego_areas[
+                proposal_idcs, time_idcs
+            ][:, [EgoAreaIndex.MULTIPLE_LANES, EgoAreaIndex.NON_DRIVABLE_AREA]].any(axis=-1)
+
+            is_track_behind = are_agents_behind(ego_rear_axles, centroids)
+            ttc_infraction_mask = np.logical_or(
+                are_agents_ahead(ego_rear_axles, centroids),
+                np.logical_and(ego_in_multiple_lanes_or_nondrivable_area, ~is_track_behind),
+            )
 
-        # check collision for each proposal and projection
-        for time_idx in range(self.proposal_sampling.num_poses + 1):
-            for step_idx, future_time_idx in enumerate(future_time_idcs):
-                current_time_idx = time_idx + future_time_idx
-                polygons_at_time_step = polygons[:, time_idx, step_idx]
-                intersecting = self._observation[current_time_idx].query(
-                    polygons_at_time_step, predicate="intersects"
+            # TODO: fix ego_area for intersection
+            intersection_check_mask = np.logical_and(~ttc_infraction_mask, ~is_track_behind)
+            scene_idcs = np.searchsorted(self._scene_offsets, proposal_idcs, side="right") - 1
+            for scene_idx in np.unique(scene_idcs[intersection_check_mask]):
+                scene_check_mask = np.logical_and(intersection_check_mask, scene_idcs == scene_idx)
+                ttc_infraction_mask[scene_check_mask] = self._drivable_area_maps[
+                    scene_idx
+                ].points_in_layer(
+                    ego_rear_axles[scene_check_mask][:, [SE2Index.X, SE2Index.Y]],
+                    layer=SemanticMapLayer.INTERSECTION,
                 )
 
-                if len(intersecting) == 0:
-                    continue
-
-                for proposal_idx, geometry_idx in zip(intersecting[0], intersecting[1]):
-                    token = self._observation[current_time_idx].tokens[geometry_idx]
-                    if (
-                        (self._observation.red_light_token in token)
-                        or (token in temp_collided_track_ids[proposal_idx])
-                        or (speeds[proposal_idx, time_idx] < self._config.stopped_speed_threshold)
-                    ):
-                        continue
-
-                    ego_in_multiple_lanes_or_nondrivable_area = (
-                        self._ego_areas[proposal_idx, time_idx, EgoAreaIndex.MULTIPLE_LANES]
-                        or self._ego_areas[proposal_idx, time_idx, EgoAreaIndex.NON_DRIVABLE_AREA]
-                    )
-                    ego_rear_axle: StateSE2 = StateSE2(
-                        *self._states[proposal_idx, time_idx, StateIndex.STATE_SE2]
-                    )
-
-                    centroid = self._observation[current_time_idx][token].centroid
-                    track_heading = self._observation.unique_objects[token].box.center.heading
-                    track_state = StateSE2(centroid.x, centroid.y, track_heading)
-                    # TODO: fix ego_area for intersection
-                    if is_agent_ahead(ego_rear_axle, track_state) or (
-                        (
-                            ego_in_multiple_lanes_or_nondrivable_area
-                            or self._drivable_area_map.is_in_layer(
-                                ego_rear_axle.point, layer=SemanticMapLayer.INTERSECTION
-                            )
-                        )
-                        and not is_agent_behind(ego_rear_axle, track_state)
-                    ):
-                        ttc_scores[proposal_idx] = np.minimum(ttc_scores[proposal_idx], 0.0)
-                        self._ttc_time_idcs[proposal_idx] = min(
-                            time_idx, self._ttc_time_idcs[proposal_idx]
-                        )
-                    else:
-                        temp_collided_track_ids[proposal_idx].append(token)
+            ttc_infraction_mask = get_infractions_before_ignored(
+                proposal_idcs, track_idcs, order_keys, ttc_infraction_mask
+            )
+            ttc_scores[proposal_idcs[ttc_infraction_mask]] = 0.0
+            np.minimum.at(
+                self._ttc_time_idcs,
+                proposal_idcs[ttc_infraction_mask],
+                time_idcs[ttc_infraction_mask].astype(np.float64),
+            )
 
         self._weighted_metrics[WeightedMetricIndex.TTC] = ttc_scores
 
@@ -1,3 +1,5 @@
+from typing import Optional
+
 import numpy as np
 import numpy.typing as npt
 from nuplan.common.actor_state.state_representation import StateSE2
@@ -10,6 +12,7 @@ from nuplan.planning.simulation.observation.idm.utils import (
 from shapely import LineString, Polygon
 
 from navsim.planning.simulation.planner.pdm_planner.utils.pdm_enums import (
+    SE2Index,
     StateIndex,
 )
 
@@ -69,3 +72,155 @@ def get_collision_type(
         collision_type = CollisionType.ACTIVE_LATERAL_COLLISION
 
     return collision_type
+
+
+def get_agent_relative_angles(
+    ego_poses: npt.NDArray[np.float64], agent_points: npt.NDArray[np.float64]
+) -> npt.NDArray[np.float64]:
+    """
+    Vectorized version of nuPlan's get_agent_relative_angle.
+    :param ego_poses: array of ego poses (x,y,θ), shape (..., 3)
+    :param agent_points: array of agent positions (x,y), shape (..., 2)
+    :return: relative angles in radians (NaN if agent and ego position coincide)
+    """
+    agent_vectors = agent_points - ego_poses[..., [SE2Index.X, SE2Index.Y]]
+    agent_norms = np.sqrt((agent_vectors**2).sum(axis=-1))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        normalized_agent_vectors = agent_vectors / agent_norms[..., None]
+        dot_products = (
+            np.cos(ego_poses[..., SE2Index.HEADING]) * normalized_agent_vectors[..., 0]
+            + np.sin(ego_poses[..., SE2Index.HEADING]) * normalized_agent_vectors[..., 1]
+        )
+        return np.arccos(dot_products)
+
+
+def are_agents_ahead(
+    ego_poses: npt.NDArray[np.float64],
+    agent_points: npt.NDArray[np.float64],
+    angle_tolerance: float = 30,
+) -> npt.NDArray[np.bool_]:
+    """
+    Vectorized version of nuPlan's is_agent_ahead.
+    :param ego_poses: array of ego poses (x,y,θ), shape (..., 3)
+    :param agent_points: array of agent positions (x,y), shape (..., 2)
+    :param angle_tolerance: tolerance to consider if agent is ahead [deg]
+    :return: boolean array
+    """
+    with np.errstate(invalid="ignore"):
+        return get_agent_relative_angles(ego_poses, agent_points) < np.deg2rad(angle_tolerance)
+
+
+def are_agents_behind(
+    ego_poses: npt.NDArray[np.float64],
+    agent_points: npt.NDArray[np.float64],
+    angle_tolerance: float = 150,
+) -> npt.NDArray[np.bool_]:
+    """
+    Vectorized version of nuPlan's is_agent_behind.
+    :param ego_poses: array of ego poses (x,y,θ), shape (..., 3)
+    :param agent_points: array of agent positions (x,y), shape (..., 2)
+    :param angle_tolerance: tolerance to consider if agent is behind [deg]
+    :return: boolean array
+    """
+    with np.errstate(invalid="ignore"):
+        return get_agent_relative_angles(ego_poses, agent_points) > np.deg2rad(angle_tolerance)
+
+
+def get_collision_types(
+    states: npt.NDArray[np.float64],
+    front_bumper_intersects: npt.NDArray[np.bool_],
+    tracked_object_centroids: npt.NDArray[np.float64],
+    tracked_object_stopped: npt.NDArray[np.bool_],
+    stopped_speed_threshold: float = 5e-02,
+) -> npt.NDArray[np.int64]:
+    """
+    Vectorized version of get_collision_type, classifying a batch of ego-track collisions at once.
+    :param states: ego state arrays, shape (collisions, states)
+    :param front_bumper_intersects: whether ego's front edge intersects the track, shape (collisions,)
+    :param tracked_object_centroids: centroids of tracked object polygons, shape (collisions, 2)
+    :param tracked_object_stopped: whether tracked objects are stopped, shape (collisions,)
+    :param stopped_speed_threshold: Threshold for 0 speed due to noise.
+    :return: array of CollisionType values
+    """
+    ego_speeds = np.hypot(states[:, StateIndex.VELOCITY_X], states[:, StateIndex.VELOCITY_Y])
+    is_ego_stopped = ego_speeds <= stopped_speed_threshold
+    is_track_behind = are_agents_behind(states[:, StateIndex.STATE_SE2], tracked_object_centroids)
+
+    collision_types = np.full(
+        len(states), CollisionType.ACTIVE_LATERAL_COLLISION.value, dtype=np.int64
+    )
+    undecided_mask = np.ones(len(states), dtype=np.bool_)
+    for collision_type, collision_mask in [
+        (CollisionType.STOPPED_EGO_COLLISION, is_ego_stopped),
+        (CollisionType.STOPPED_TRACK_COLLISION, tracked_object_stopped),
+        (CollisionType.ACTIVE_REAR_COLLISION, is_track_behind),
+        (CollisionType.ACTIVE_FRONT_COLLISION, front_bumper_intersects),
+    ]:
+        collision_mask = np.logical_and(undecided_mask, collision_mask)
+        collision_types[collision_mask] = collision_type.value
+        undecided_mask[collision_mask] = False
+
+    return collision_types
+
+
+def get_infractions_before_ignored(
+    proposal_idcs: npt.NDArray[np.int64],
+    track_idcs: npt.NDArray[np.int64],
+    order_keys: npt.NDArray[np.int64],
+    infraction_mask: npt.NDArray[np.bool_],
+) -> npt.NDArray[np.bool_]:
+    """
+    Resolves the sequential bookkeeping of the scoring loops, where a track is ignored for a proposal
+    after the first non-infraction hit. Hits of identical (proposal, track) with equal order keys are
+    considered simultaneous.
+    :param proposal_idcs: proposal index of each hit
+    :param track_idcs: track index of each hit
+    :param order_keys: temporal order of each hit
+    :param infraction_mask: whether hit is an infraction
+    :return: boolean mask of infractions occurring before the track is ignored
+    """
+    if len(proposal_idcs) == 0:
+        return np.zeros(0, dtype=np.bool_)
+
+    num_tracks = track_idcs.max() + 1
+    _, pair_idcs = np.unique(
+        proposal_idcs.astype(np.int64) * num_tracks + track_idcs, return_inverse=True
+    )
+    pair_idcs = pair_idcs.reshape(-1)
+
+    first_ignored_keys = np.full(pair_idcs.max() + 1, np.iinfo(np.int64).max, dtype=np.int64)
+    np.minimum.at(first_ignored_keys, pair_idcs[~infraction_mask], order_keys[~infraction_mask])
+
+    return np.logical_and(infraction_mask, order_keys < first_ignored_keys[pair_idcs])
+
+
+def get_windowed_sums(
+    values: npt.NDArray[np.float64],
+    window: int,
+    segment_offsets: Optional[npt.NDArray[np.int64]] = None,
+) -> npt.NDArray[np.float64]:
+    """
+    Computes sliding-window sums along the first axis, i.e. output[i] is the sum of
+    values[max(start, i - window) : i + 1], where start is the first index of the segment of i.
+    Entries of each window are added in index order (one vectorized addition per window offset),
+    thus sums are identical to summing each window sequentially, unlike differences of cumulative sums.
+    :param values: input array, shape (N, ...)
+    :param window: number of preceding entries included in each sum
+    :param segment_offsets: start indices of segments and total length, defaults to one segment
+    :return: array of windowed sums, shape (N, ...)
+    """
+    num_values = len(values)
+    if segment_offsets is None:
+        segment_offsets = np.array([0, num_values], dtype=np.int64)
+
+    indices = np.arange(num_values)
+    segment_starts = np.repeat(segment_offsets[:-1], np.diff(segment_offsets))
+
+    windowed_sums = np.zeros(values.shape, dtype=np.float64)
+    for shift in range(min(window, max(num_values - 1, 0)), -1, -1):
+        source_idcs = indices - shift
+        in_window = source_idcs >= segment_starts
+        windowed_sums[in_window] += values[source_idcs[in_window]]
+
+    return windowed_sums
@@ -1,4 +1,5 @@
 import copy
+from typing import Optional
 
 import numpy as np
 import numpy.typing as npt
@@ -55,12 +56,18 @@ class BatchKinematicBicycleModel:
         self._accel_time_constant = accel_time_constant
         self._steering_angle_time_constant = steering_angle_time_constant
 
-    def get_state_dot(self, states: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
+    def get_state_dot(
+        self,
+        states: npt.NDArray[np.float64],
+        wheel_bases: Optional[npt.NDArray[np.float64]] = None,
+    ) -> npt.NDArray[np.float64]:
         """
         Calculates the changing rate of state array representation.
         :param states: array describing the state of the ego-vehicle
+        :param wheel_bases: optional wheel base of each state, defaults to wheel base of vehicle parameters
         :return: change rate across several state values
         """
+        wheel_bases = self._vehicle.wheel_base if wheel_bases is None else wheel_bases
         state_dots = np.zeros(states.shape, dtype=np.float64)
 
         longitudinal_speeds = states[:, StateIndex.VELOCITY_X]
@@ -74,7 +81,7 @@ class BatchKinematicBicycleModel:
         state_dots[:, StateIndex.HEADING] = (
             longitudinal_speeds
             * np.tan(states[:, StateIndex.STEERING_ANGLE])
-            / self._vehicle.wheel_base
+            / wheel_bases
         )
 
         state_dots[:, StateIndex.VELOCITY_2D] = states[:, StateIndex.ACCELERATION_2D]
@@ -137,14 +144,17 @@ class BatchKinematicBicycleModel:
         states: npt.NDArray[np.float64],
         command_states: npt.NDArray[np.float64],
         sampling_time: TimePoint,
+        wheel_bases: Optional[npt.NDArray[np.float64]] = None,
     ) -> npt.NDArray[np.float64]:
         """
         Propagates ego state array forward with motion model.
         :param states: state array representation of the ego-vehicle
         :param command_states: command array representation of controller
         :param sampling_time: time to propagate [s]
+        :param wheel_bases: optional wheel base of each state, defaults to wheel base of vehicle parameters
         :return: updated tate array representation of the ego-vehicle
         """
+        wheel_bases = self._vehicle.wheel_base if wheel_bases is None else wheel_bases
 
         assert len(states) == len(
             command_states
@@ -154,7 +164,7 @@ class BatchKinematicBicycleModel:
         output_state = copy.deepcopy(states)
 
         # Compute state derivatives
-        state_dot = self.get_state_dot(propagating_state)
+        state_dot = self.get_state_dot(propagating_state, wheel_bases)
 
         output_state[:, StateIndex.X] = forward_integrate(
             states[:, StateIndex.X], state_dot[:, StateIndex.X], sampling_time
@@ -194,7 +204,7 @@ class BatchKinematicBicycleModel:
         output_state[:, StateIndex.ANGULAR_VELOCITY] = (
             output_state[:, StateIndex.VELOCITY_X]
             * np.tan(output_state[:, StateIndex.STEERING_ANGLE])
-            / self._vehicle.wheel_base
+            / wheel_bases
         )
 
         output_state[:, StateIndex.ACCELERATION_2D] = state_dot[
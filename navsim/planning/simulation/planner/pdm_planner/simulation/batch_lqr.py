@@ -283,20 +283,7 @@ class BatchLQRTracker:
         :return: The reference velocity [m/s] and curvature profile [rad] to track.
         """
 
-        poses = self._proposal_states[..., StateIndex.STATE_SE2]
-
-        if self._velocity_profile is None or self._curvature_profile is None:
-            (
-                self._velocity_profile,
-                acceleration_profile,
-                self._curvature_profile,
-                curvature_rate_profile,
-            ) = get_velocity_curvature_profiles_with_derivatives_from_poses(
-                discretization_time=self._discretization_time,
-                poses=poses,
-                jerk_penalty=self._jerk_penalty,
-                curvature_rate_penalty=self._curvature_rate_penalty,
-            )
+        self.get_reference_profiles()
 
         batch_size, num_poses = self._velocity_profile.shape
         reference_idx = min(
@@ -320,6 +307,32 @@ class BatchLQRTracker:
 
         return reference_velocities, reference_curvature_profiles
 
+    def get_reference_profiles(
+        self,
+    ) -> Tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+        """
+        Fits velocity and curvature profiles of the loaded proposals (lazy loaded).
+        :return: velocity [m/s] and curvature [rad] profiles, each of shape (batch, num_poses-1)
+        """
+        assert (
+            self._initialized
+        ), "BatchLQRTracker: Run update first to load proposal states!"
+
+        if self._velocity_profile is None or self._curvature_profile is None:
+            (
+                self._velocity_profile,
+                acceleration_profile,
+                self._curvature_profile,
+                curvature_rate_profile,
+            ) = get_velocity_curvature_profiles_with_derivatives_from_poses(
+                discretization_time=self._discretization_time,
+                poses=self._proposal_states[..., StateIndex.STATE_SE2],
+                jerk_penalty=self._jerk_penalty,
+                curvature_rate_penalty=self._curvature_rate_penalty,
+            )
+
+        return self._velocity_profile, self._curvature_profile
+
     def _stopping_controller(
         self,
         initial_velocities: npt.NDArray[np.float64],
@@ -1,7 +1,9 @@
+from functools import lru_cache
 from typing import Tuple
-import torch
+
 import numpy as np
 import numpy.typing as npt
+from scipy.linalg import cho_factor, cho_solve
 
 from navsim.planning.simulation.planner.pdm_planner.utils.pdm_geometry_utils import (
     normalize_angle,
@@ -19,6 +21,53 @@ INITIAL_CURVATURE_PENALTY = 1e-10
 batch_matmul = lambda a, b: np.einsum("bij, bjk -> bik", a, b)
 
 
+def _reverse_cumsum(values: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
+    """
+    Computes the cumulative sum from the end of the last axis, i.e. output[..., i] = sum(values[..., i:]).
+    :param values: input array
+    :return: reverse cumulative sum with same shape as input
+    """
+    return np.cumsum(values[..., ::-1], axis=-1)[..., ::-1]
+
+
+def _get_integration_weights(num_displacements: int, discretization_time: float) -> npt.NDArray[np.float64]:
+    """
+    Returns weights of initial value and derivatives in the least squares design matrices.
+    Each displacement j equals (w_0 * initial + sum_{1 <= i <= j} w_i * derivative_{i-1}) in direction of travel.
+    :param num_displacements: number of displacements M
+    :param discretization_time: [s] Time discretization used for integration.
+    :return: weights (dt, dt^2, ..., dt^2) of shape (M,)
+    """
+    weights = np.full(num_displacements, discretization_time**2, dtype=np.float64)
+    weights[0] = discretization_time
+    return weights
+
+
+@lru_cache(maxsize=16)
+def _get_velocity_fit_factorization(
+    num_displacements: int, discretization_time: float, jerk_penalty: float
+) -> Tuple[npt.NDArray[np.float64], bool]:
+    """
+    Cholesky factorization of the regularized normal equations (A^T A + jerk_penalty * R^T R) of the velocity fit.
+    Since each displacement is projected on the unit heading vector, A^T A is independent of the poses.
+    :param num_displacements: number of displacements M
+    :param discretization_time: [s] Time discretization used for integration.
+    :param jerk_penalty: A regularization parameter used to penalize acceleration differences.
+    :return: factorization of shape (M, M), see scipy's cho_factor
+    """
+    weights = _get_integration_weights(num_displacements, discretization_time)
+
+    # (A^T A)_cd = w_c * w_d * number of displacements j >= max(c, d)
+    indices = np.arange(num_displacements)
+    num_rows = num_displacements - np.maximum(indices[:, None], indices[None, :])
+    A_T_A = weights[:, None] * weights[None, :] * num_rows
+
+    banded_matrix = _make_banded_difference_matrix(num_displacements - 2)
+    R: npt.NDArray[np.float64] = np.block([np.zeros((len(banded_matrix), 1)), banded_matrix])
+
+    return cho_factor(A_T_A + jerk_penalty * (R.T @ R))
+
+
 def _generate_profile_from_initial_condition_and_derivatives(
     initial_condition: npt.NDArray[np.float64],
     derivatives: npt.NDArray[np.float64],
@@ -102,57 +151,26 @@ def _fit_initial_velocity_and_acceleration_profile(
     num_displacements = xy_displacements.shape[1]  # aka M in the docstring
     assert heading_profile.shape[0] == xy_displacements.shape[0]
 
-    batch_size = heading_profile.shape[0]
-    # Core problem: minimize_x ||y-Ax||_2
-    y = xy_displacements.reshape(
-        batch_size, -1
-    )  # Flatten to a vector, [delta x_0, delta y_0, ...]
-
+    # Core problem: minimize_x ||y-Ax||_2 + jerk_penalty * ||Rx||_2, solved with normal equations
+    # A^T y accumulates the displacements projected on the heading, weighted by the integration weights.
     headings = np.array(heading_profile, dtype=np.float64)
-    A_column = np.zeros(y.shape, dtype=np.float64)
-    A_column[:, 0::2] = np.cos(headings)
-    A_column[:, 1::2] = np.sin(headings)
-
-    A = np.repeat(
-        A_column[..., None] * discretization_time**2, num_displacements, axis=2
+    projected_displacements = (
+        np.cos(headings) * xy_displacements[..., 0] + np.sin(headings) * xy_displacements[..., 1]
     )
-    A[..., 0] = A_column * discretization_time
-
-    upper_triangle_mask = np.triu(
-        np.ones((num_displacements, num_displacements), dtype=bool), k=1
+    A_T_y = _get_integration_weights(num_displacements, discretization_time) * _reverse_cumsum(
+        projected_displacements
     )
-    upper_triangle_mask = np.repeat(upper_triangle_mask, 2, axis=0)
-    A[:, upper_triangle_mask] = 0.0
 
-    # Regularization using jerk penalty, i.e. difference of acceleration values.
-    # If there are M displacements, then we have M - 1 acceleration values.
-    # That means we have M - 2 jerk values, thus we make a banded difference matrix of that size.
-    banded_matrix = _make_banded_difference_matrix(num_displacements - 2)
-    R: npt.NDArray[np.float64] = np.block(
-        [np.zeros((len(banded_matrix), 1)), banded_matrix]
+    factorization = _get_velocity_fit_factorization(
+        num_displacements, float(discretization_time), float(jerk_penalty)
     )
-    R = np.repeat(R[None, ...], batch_size, axis=0)
-
-    A_T, R_T = np.transpose(A, (0, 2, 1)), np.transpose(R, (0, 2, 1))
-
-    # Convert matrices to torch tensors
-    A_T = torch.tensor(A_T, dtype=torch.float64)
-    R_T = torch.tensor(R_T, dtype=torch.float64)
-    y = torch.tensor(y, dtype=torch.float64)
-
-    # Compute regularized least squares solution using torch
-    A_T_A = torch.bmm(A_T, A_T.transpose(1, 2))
-    R_T_R = torch.bmm(R_T, R_T.transpose(1, 2))
-    regularization_term = jerk_penalty * R_T_R
-    pinv_matrix = torch.inverse(A_T_A + regularization_term)
-    intermediate_solution = torch.bmm(pinv_matrix, A_T)
-    x = torch.bmm(intermediate_solution, y.unsqueeze(2)).squeeze(2)
+    x = cho_solve(factorization, A_T_y.T).T
 
     # Extract profile from solution.
     initial_velocity = x[:, 0]
     acceleration_profile = x[:, 1:]
 
-    return initial_velocity.numpy(), acceleration_profile.numpy()
+    return initial_velocity, acceleration_profile
 
 
 def _fit_initial_curvature_and_curvature_rate_profile(
@@ -181,18 +199,19 @@ def _fit_initial_curvature_and_curvature_rate_profile(
         initial_curvature_penalty > 0.0
     ), "Should have a positive initial_curvature_penalty."
 
-    # Core problem: minimize_x ||y-Ax||_2
+    # Core problem: minimize_x ||y-Ax||_2 + ||Q^(1/2) x||_2, solved with normal equations
+    # Row j of A is velocity_j * (dt, dt^2, ..., dt^2, 0, ..., 0) with j+1 non-zero entries.
     y = heading_displacements
     batch_dim, dim = y.shape
+    weights = _get_integration_weights(dim, discretization_time)
 
-    A: npt.NDArray[np.float64] = np.repeat(
-        np.tri(dim, dtype=np.float64)[None, ...], batch_dim, axis=0
-    )  # lower triangular matrix
-
-    A[:, :, 0] = velocity_profile * discretization_time
-
-    velocity = velocity_profile * discretization_time**2
-    A[:, 1:, 1:] *= velocity[:, None, 1:].transpose(0, 2, 1)
+    # (A^T A)_cd = w_c * w_d * sum_{j >= max(c, d)} velocity_j^2, and (A^T y)_c = w_c * sum_{j >= c} velocity_j * y_j
+    indices = np.arange(dim)
+    squared_velocity_sums = _reverse_cumsum(velocity_profile**2)
+    A_T_A = (weights[:, None] * weights[None, :]) * squared_velocity_sums[
+        :, np.maximum(indices[:, None], indices[None, :])
+    ]
+    A_T_y = weights * _reverse_cumsum(velocity_profile * y)
 
     # Regularization on curvature rate.  We add a small but nonzero weight on initial curvature too.
     # This is since the corresponding row of the A matrix might be zero if initial speed is 0, leading to singularity.
@@ -200,24 +219,14 @@ def _fit_initial_curvature_and_curvature_rate_profile(
     Q: npt.NDArray[np.float64] = curvature_rate_penalty * np.eye(dim)
     Q[0, 0] = initial_curvature_penalty
 
-    # Convert matrices to torch tensors
-    A = torch.tensor(A, dtype=torch.float64)
-    Q = torch.tensor(Q, dtype=torch.float64)
-    y = torch.tensor(y, dtype=torch.float64)
-
-    # Compute regularized least squares solution using torch
-    A_T = A.transpose(1, 2)
-    A_T_A = torch.bmm(A_T, A)
-    regularization_term = Q
-    pinv_matrix = torch.inverse(A_T_A + regularization_term)
-    intermediate = torch.bmm(pinv_matrix, A_T)
-    x = torch.bmm(intermediate, y.unsqueeze(2)).squeeze(2)
+    # batched solve of the symmetric positive definite system (LU, numpy has no batched triangular solve)
+    x = np.linalg.solve(A_T_A + Q, A_T_y[..., None])[..., 0]
 
     # Extract profile from solution.
     initial_curvature = x[:, 0]
     curvature_rate_profile = x[:, 1:]
 
-    return initial_curvature.numpy(), curvature_rate_profile.numpy()
+    return initial_curvature, curvature_rate_profile
 
 
 def get_velocity_curvature_profiles_with_derivatives_from_poses(
@@ -0,0 +1,258 @@
+import logging
+from typing import Optional
+
+import numpy as np
+import numpy.typing as npt
+
+from navsim.planning.simulation.planner.pdm_planner.simulation.batch_kinematic_bicycle import (
+    BatchKinematicBicycleModel,
+)
+from navsim.planning.simulation.planner.pdm_planner.simulation.batch_lqr import (
+    BatchLQRTracker,
+    LateralStateIndex,
+)
+from navsim.planning.simulation.planner.pdm_planner.utils.pdm_enums import StateIndex
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+logger = logging.getLogger(__name__)
+
+# state indices as module constants (compile-time constants for numba)
+_X = StateIndex.X
+_Y = StateIndex.Y
+_HEADING = StateIndex.HEADING
+_VELOCITY_X = StateIndex.VELOCITY_X
+_VELOCITY_Y = StateIndex.VELOCITY_Y
+_ACCELERATION_X = StateIndex.ACCELERATION_X
+_ACCELERATION_Y = StateIndex.ACCELERATION_Y
+_STEERING_ANGLE = StateIndex.STEERING_ANGLE
+_STEERING_RATE = StateIndex.STEERING_RATE
+_ANGULAR_VELOCITY = StateIndex.ANGULAR_VELOCITY
+_ANGULAR_ACCELERATION = StateIndex.ANGULAR_ACCELERATION
+
+
+def _rollout(
+    initial_states: npt.NDArray[np.float64],
+    reference_poses: npt.NDArray[np.float64],
+    velocity_profiles: npt.NDArray[np.float64],
+    curvature_profiles: npt.NDArray[np.float64],
+    num_steps: int,
+    tracker_discretization_time: float,
+    tracking_horizon: int,
+    tracker_wheel_base: float,
+    q_longitudinal: float,
+    r_longitudinal: float,
+    q_lateral: npt.NDArray[np.float64],
+    r_lateral: float,
+    stopping_proportional_gain: float,
+    stopping_velocity: float,
+    sampling_time: float,
+    motion_wheel_bases: npt.NDArray[np.float64],
+    max_steering_angle: float,
+    accel_time_constant: float,
+    steering_angle_time_constant: float,
+) -> npt.NDArray[np.float64]:
+    """
+    Rollout of BatchLQRTracker and BatchKinematicBicycleModel over the whole horizon with array-only math.
+    Operations match the step-wise implementation, s.t. the function is valid numpy and numba code.
+    :param initial_states: initial ego state array for each proposal, shape (B,S)
+    :param reference_poses: poses of proposals to track, shape (B,T+1,3)
+    :param velocity_profiles: fitted reference velocity profiles of proposals, shape (B,P)
+    :param curvature_profiles: fitted reference curvature profiles of proposals, shape (B,P)
+    :param num_steps: number of simulation steps T
+    :param tracker_discretization_time: [s] discretization time of the LQR dynamics
+    :param tracking_horizon: number of discrete steps of the LQR objective
+    :param tracker_wheel_base: [m] wheel base of the LQR lateral dynamics
+    :param q_longitudinal: weight of velocity error
+    :param r_longitudinal: weight of acceleration input
+    :param q_lateral: diagonal weights of lateral, heading and steering angle errors, shape (3,)
+    :param r_lateral: weight of steering rate input
+    :param stopping_proportional_gain: proportional gain of the stopping controller
+    :param stopping_velocity: [m/s] velocity below which the stopping controller is used
+    :param sampling_time: [s] propagation time of the motion model
+    :param motion_wheel_bases: [m] wheel base of the motion model for each proposal, shape (B,)
+    :param max_steering_angle: [rad] maximum absolute steering angle of the motion model
+    :param accel_time_constant: [s] low pass filter time constant for acceleration
+    :param steering_angle_time_constant: [s] low pass filter time constant for steering angle
+    :return: simulated states, shape (B,T+1,S)
+    """
+    batch_size, state_size = initial_states.shape
+    num_profile_poses = velocity_profiles.shape[1]
+
+    simulated_states = np.zeros((batch_size, num_steps + 1, state_size), dtype=np.float64)
+    simulated_states[:, 0] = initial_states
+
+    zeros = np.zeros(batch_size, dtype=np.float64)
+    longitudinal_input = tracking_horizon * tracker_discretization_time
+    longitudinal_inverse = -1 / (
+        longitudinal_input * q_longitudinal * longitudinal_input + r_longitudinal
+    )
+    accel_filter = sampling_time / (sampling_time + accel_time_constant)
+    steering_filter = sampling_time / (sampling_time + steering_angle_time_constant)
+
+    for time_idx in range(1, num_steps + 1):
+        current_idx = time_idx - 1
+        x = simulated_states[:, current_idx, _X]
+        y = simulated_states[:, current_idx, _Y]
+        heading = simulated_states[:, current_idx, _HEADING]
+        velocity = simulated_states[:, current_idx, _VELOCITY_X]
+        accel = simulated_states[:, current_idx, _ACCELERATION_X]
+        steering_angle = simulated_states[:, current_idx, _STEERING_ANGLE]
+        angular_velocity = simulated_states[:, current_idx, _ANGULAR_VELOCITY]
+
+        # 1. Tracker: initial tracking errors in Frenet frame
+        x_errors = x - reference_poses[:, current_idx, 0]
+        y_errors = y - reference_poses[:, current_idx, 1]
+        heading_references = reference_poses[:, current_idx, 2]
+        lateral_errors = -x_errors * np.sin(heading_references) + y_errors * np.cos(
+            heading_references
+        )
+        heading_differences = heading - heading_references
+        heading_errors = np.arctan2(np.sin(heading_differences), np.cos(heading_differences))
+
+        reference_idx = min(current_idx + tracking_horizon, num_profile_poses - 1)
+        reference_velocities = velocity_profiles[:, reference_idx]
+
+        should_stop = np.logical_and(
+            reference_velocities <= stopping_velocity, velocity <= stopping_velocity
+        )
+
+        # longitudinal LQR (or stopping P-controller)
+        lqr_accel = (
+            longitudinal_inverse * longitudinal_input * q_longitudinal * (velocity - reference_velocities)
+        )
+        stopping_accel = -stopping_proportional_gain * (velocity - reference_velocities)
+        accel_cmds = np.where(should_stop, stopping_accel, lqr_accel)
+
+        # lateral LQR, accumulates A @ x + B @ u + g over tracking horizon (unit upper triangular A)
+        a_01, a_02, a_12 = zeros.copy(), zeros.copy(), zeros.copy()
+        b_0, b_1, b_2 = zeros.copy(), zeros.copy(), zeros.copy()
+        g_0, g_1 = zeros.copy(), zeros.copy()
+        velocity_increment = zeros.copy()
+        for horizon_idx in range(tracking_horizon):
+            velocity_k = velocity + velocity_increment
+            velocity_increment = velocity_increment + accel_cmds * tracker_discretization_time
+            curvature_k = curvature_profiles[:, min(current_idx + horizon_idx, reference_idx)]
+
+            m_01 = velocity_k * tracker_discretization_time
+            m_12 = velocity_k * tracker_discretization_time / tracker_wheel_base
+            affine_1 = -velocity_k * curvature_k * tracker_discretization_time
+
+            a_01, a_02, a_12 = a_01 + m_01, a_02 + m_01 * a_12, a_12 + m_12
+            b_0, b_1, b_2 = b_0 + m_01 * b_1, b_1 + m_12 * b_2, b_2 + tracker_discretization_time
+            g_0, g_1 = g_0 + m_01 * g_1, g_1 + affine_1
+
+        error_0 = lateral_errors + a_01 * heading_errors + a_02 * steering_angle + g_0
+        error_1 = heading_errors + a_12 * steering_angle + g_1
+        error_2 = steering_angle.copy()
+        error_1 = np.arctan2(np.sin(error_1), np.cos(error_1))
+        error_2 = np.arctan2(np.sin(error_2), np.cos(error_2))
+
+        bq_0 = b_0 * q_lateral[LateralStateIndex.LATERAL_ERROR]
+        bq_1 = b_1 * q_lateral[LateralStateIndex.HEADING_ERROR]
+        bq_2 = b_2 * q_lateral[LateralStateIndex.STEERING_ANGLE]
+        lateral_inverse = -1 / (bq_0 * b_0 + bq_1 * b_1 + bq_2 * b_2 + r_lateral)
+        lateral_tail = bq_0 * error_0 + bq_1 * error_1 + bq_2 * error_2
+        steering_rate_cmds = np.where(should_stop, zeros, lateral_inverse * lateral_tail)
+
+        # 2. Motion model: low pass filter of commands
+        ideal_steering_angle = sampling_time * steering_rate_cmds + steering_angle
+        updated_accel = accel_filter * (accel_cmds - accel) + accel
+        updated_steering_angle = (
+            steering_filter * (ideal_steering_angle - steering_angle) + steering_angle
+        )
+        updated_steering_rate = (updated_steering_angle - steering_angle) / sampling_time
+
+        # forward euler integration of kinematic bicycle model
+        heading_rate = velocity * np.tan(steering_angle) / motion_wheel_bases
+        next_heading = heading + heading_rate * sampling_time
+        next_velocity = velocity + updated_accel * sampling_time
+        next_steering_angle = np.clip(
+            steering_angle + updated_steering_rate * sampling_time,
+            -max_steering_angle,
+            max_steering_angle,
+        )
+        next_angular_velocity = next_velocity * np.tan(next_steering_angle) / motion_wheel_bases
+
+        simulated_states[:, time_idx, _X] = x + velocity * np.cos(heading) * sampling_time
+        simulated_states[:, time_idx, _Y] = y + velocity * np.sin(heading) * sampling_time
+        simulated_states[:, time_idx, _HEADING] = np.remainder(next_heading + np.pi, 2 * np.pi) - np.pi
+        simulated_states[:, time_idx, _VELOCITY_X] = next_velocity
+        simulated_states[:, time_idx, _VELOCITY_Y] = 0.0
+        simulated_states[:, time_idx, _ACCELERATION_X] = updated_accel
+        simulated_states[:, time_idx, _ACCELERATION_Y] = 0.0
+        simulated_states[:, time_idx, _STEERING_ANGLE] = next_steering_angle
+        simulated_states[:, time_idx, _STEERING_RATE] = updated_steering_rate
+        simulated_states[:, time_idx, _ANGULAR_VELOCITY] = next_angular_velocity
+        simulated_states[:, time_idx, _ANGULAR_ACCELERATION] = (
+            next_angular_velocity - angular_velocity
+        ) / sampling_time
+
+    return simulated_states
+
+
+# optional just-in-time compilation, falls back to numpy
+_rollout_jit = numba.njit(cache=True)(_rollout) if numba is not None else None
+_numba_fallback_logged = False
+
+
+def batch_rollout(
+    tracker: BatchLQRTracker,
+    motion_model: BatchKinematicBicycleModel,
+    initial_states: npt.NDArray[np.float64],
+    num_steps: int,
+    sampling_time: float,
+    wheel_bases: Optional[npt.NDArray[np.float64]] = None,
+    use_numba: bool = True,
+) -> npt.NDArray[np.float64]:
+    """
+    Simulates proposals loaded in the tracker over the whole horizon with a fused tracker and motion model rollout.
+    :param tracker: LQR tracker, updated with proposal states
+    :param motion_model: kinematic bicycle model
+    :param initial_states: initial ego state array for each proposal, shape (B,S)
+    :param num_steps: number of simulation steps
+    :param sampling_time: [s] propagation time of the motion model per step
+    :param wheel_bases: optional wheel base of each proposal, defaults to wheel base of the motion model
+    :param use_numba: whether to use the just-in-time compiled rollout if numba is installed, defaults to True
+    :return: simulated states, shape (B,num_steps+1,S)
+    """
+    velocity_profiles, curvature_profiles = tracker.get_reference_profiles()
+    reference_poses = tracker._proposal_states[..., StateIndex.STATE_SE2]
+    if wheel_bases is None:
+        wheel_bases = np.full(len(initial_states), motion_model._vehicle.wheel_base)
+
+    global _numba_fallback_logged
+    if use_numba and _rollout_jit is None and not _numba_fallback_logged:
+        logger.warning("numba is not installed, the fused rollout falls back to numpy (considerably slower).")
+        _numba_fallback_logged = True
+
+    rollout = _rollout_jit if (use_numba and _rollout_jit is not None) else _rollout
+    simulated_states = rollout(
+        np.ascontiguousarray(initial_states, dtype=np.float64),
+        np.ascontiguousarray(reference_poses, dtype=np.float64),
+        np.ascontiguousarray(velocity_profiles, dtype=np.float64),
+        np.ascontiguousarray(curvature_profiles, dtype=np.float64),
+        num_steps,
+        float(tracker._discretization_time),
+        int(tracker._tracking_horizon),
+        float(tracker._wheel_base),
+        float(tracker._q_longitudinal),
+        float(tracker._r_longitudinal),
+        np.ascontiguousarray(np.diag(tracker._q_lateral), dtype=np.float64),
+        float(tracker._r_lateral[0, 0]),
+        float(tracker._stopping_proportional_gain),
+        float(tracker._stopping_velocity),
+        float(sampling_time),
+        np.ascontiguousarray(wheel_bases, dtype=np.float64),
+        float(motion_model._max_steering_angle),
+        float(motion_model._accel_time_constant),
+        float(motion_model._steering_angle_time_constant),
+    )
+    assert np.all(
+        np.isfinite(simulated_states[..., StateIndex.HEADING])
+    ), "batch_rollout: Simulated heading is not finite!"
+
+    return simulated_states
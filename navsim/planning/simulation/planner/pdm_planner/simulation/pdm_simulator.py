@@ -1,3 +1,5 @@
+from typing import List, Optional
+
 import numpy as np
 import numpy.typing as npt
 from nuplan.common.actor_state.ego_state import EgoState
@@ -13,24 +15,34 @@ from navsim.planning.simulation.planner.pdm_planner.simulation.batch_kinematic_b
 from navsim.planning.simulation.planner.pdm_planner.simulation.batch_lqr import (
     BatchLQRTracker,
 )
+from navsim.planning.simulation.planner.pdm_planner.simulation.batch_rollout import (
+    batch_rollout,
+)
 from navsim.planning.simulation.planner.pdm_planner.utils.pdm_array_representation import (
     ego_state_to_state_array,
 )
 
+SIMULATION_BACKENDS = ["fused", "iterative"]
+
 
 class PDMSimulator:
     """
     Re-implementation of nuPlan's simulation pipeline. Enables batch-wise simulation.
     """
 
-    def __init__(self, proposal_sampling: TrajectorySampling):
+    def __init__(self, proposal_sampling: TrajectorySampling, backend: str = "fused", use_numba: bool = True):
         """
         Constructor of PDMSimulator.
         :param proposal_sampling: Sampling parameters for proposals
+        :param backend: whole-horizon rollout ("fused") or step-wise simulation as reference ("iterative")
+        :param use_numba: whether to compile the fused rollout with numba (if installed), defaults to True
         """
+        assert backend in SIMULATION_BACKENDS, f"PDMSimulator: Unknown backend {backend}!"
 
         # time parameters
         self.proposal_sampling = proposal_sampling
+        self._backend = backend
+        self._use_numba = use_numba
 
         # simulation objects
         self._motion_model = BatchKinematicBicycleModel()
@@ -46,21 +58,84 @@ class PDMSimulator:
         :return: simulated proposal states as array
         """
 
-        # TODO: find cleaner way to load parameters
-        # set parameters of motion model and tracker
-        self._motion_model._vehicle = initial_ego_state.car_footprint.vehicle_parameters
+        return self.simulate_proposals_batch(states, [len(states)], [initial_ego_state])
+
+    def simulate_proposals_batch(
+        self,
+        states: npt.NDArray[np.float64],
+        proposal_counts: List[int],
+        initial_ego_states: List[EgoState],
+    ) -> npt.NDArray[np.float64]:
+        """
+        Simulate proposals of several scenes stacked along the batch-dim in a single pass.
+        Each proposal starts from the ego state and uses the vehicle parameters of its scene.
+        :param states: proposal states of all scenes as array
+        :param proposal_counts: number of consecutive proposals belonging to each scene
+        :param initial_ego_states: ego-vehicle state at current iteration of each scene
+        :return: simulated proposal states as array
+        """
+        assert len(proposal_counts) == len(
+            initial_ego_states
+        ), "PDMSimulator: Number of scenes does not match!"
+        assert sum(proposal_counts) == len(states), "PDMSimulator: Proposal counts do not match states!"
+
+        initial_states = np.repeat(
+            np.stack([ego_state_to_state_array(ego_state) for ego_state in initial_ego_states]),
+            proposal_counts,
+            axis=0,
+        )
+        wheel_bases = np.repeat(
+            [ego_state.car_footprint.vehicle_parameters.wheel_base for ego_state in initial_ego_states],
+            proposal_counts,
+        ).astype(np.float64)
+        return self.simulate_state_arrays(states, initial_states, wheel_bases)
+
+    def simulate_state_arrays(
+        self,
+        states: npt.NDArray[np.float64],
+        initial_states: npt.NDArray[np.float64],
+        wheel_bases: Optional[npt.NDArray[np.float64]] = None,
+    ) -> npt.NDArray[np.float64]:
+        """
+        Simulate proposals over batch-dim, where each proposal starts from its own initial state.
+        Enables stacking proposals of several scenes into a single simulation pass.
+        :param states: proposal states as array
+        :param initial_states: initial ego state array for each proposal
+        :param wheel_bases: optional wheel base of each proposal, defaults to vehicle parameters of the motion model
+        :return: simulated proposal states as array
+        """
+        assert len(states) == len(
+            initial_states
+        ), "Batch size of states and initial_states does not match!"
+
+        if wheel_bases is None:
+            wheel_bases = np.full(len(states), self._motion_model._vehicle.wheel_base, dtype=np.float64)
+        assert len(wheel_bases) == len(states), "PDMSimulator: Batch size of states and wheel_bases does not match!"
+
         self._tracker._discretization_time = self.proposal_sampling.interval_length
 
         proposal_states = states[:, : self.proposal_sampling.num_poses + 1]
         self._tracker.update(proposal_states)
 
+        # timing objects (only relative time and iteration index are used)
+        current_time_point = TimePoint(0)
+        delta_time_point = TimeDuration.from_s(self.proposal_sampling.interval_length)
+
+        if self._backend == "fused":
+            sampling_time: TimePoint = (current_time_point + delta_time_point) - current_time_point
+            return batch_rollout(
+                self._tracker,
+                self._motion_model,
+                initial_states,
+                self.proposal_sampling.num_poses,
+                sampling_time.time_s,
+                wheel_bases,
+                self._use_numba,
+            )
+
         # state array representation for simulated vehicle states
         simulated_states = np.zeros(proposal_states.shape, dtype=np.float64)
-        simulated_states[:, 0] = ego_state_to_state_array(initial_ego_state)
-
-        # timing objects
-        current_time_point = initial_ego_state.time_point
-        delta_time_point = TimeDuration.from_s(self.proposal_sampling.interval_length)
+        simulated_states[:, 0] = initial_states
 
         current_iteration = SimulationIteration(current_time_point, 0)
         next_iteration = SimulationIteration(current_time_point + delta_time_point, 1)
@@ -80,6 +155,7 @@ class PDMSimulator:
                 states=simulated_states[:, time_idx - 1],
                 command_states=command_states,
                 sampling_time=sampling_time,
+                wheel_bases=wheel_bases,
             )
 
             current_iteration = next_iteration
@@ -1,13 +1,21 @@
-from collections import deque
 from typing import Dict, List, Optional, Tuple, Union
 
+import numpy as np
 from nuplan.common.maps.abstract_map import AbstractMap
 from nuplan.common.maps.abstract_map_objects import RoadBlockGraphEdgeMapObject
+from nuplan.common.maps.maps_datatypes import SemanticMapLayer
+
+from navsim.planning.simulation.planner.pdm_planner.utils.graph_search.graph_index import (
+    CSRGraph,
+    get_map_graph_index,
+)
 
 
 class BreadthFirstSearchRoadBlock:
     """
     A class that performs iterative breadth first search. The class operates on the roadblock graph.
+    The search runs level by level on the integer roadblock graph of the map (see MapGraphIndex),
+    where repeated visits of a roadblock within a level are merged.
     """
 
     def __init__(
@@ -23,8 +31,9 @@ class BreadthFirstSearchRoadBlock:
         :param forward_search: whether to search in driving direction, defaults to True
         """
         self._map_api: Optional[AbstractMap] = map_api
-        self._queue = deque([self.id_to_roadblock(start_roadblock_id), None])
-        self._parent: Dict[str, Optional[RoadBlockGraphEdgeMapObject]] = dict()
+        self._graph: CSRGraph = get_map_graph_index(map_api).roadblock_graph
+        self._start_roadblock_id = start_roadblock_id
+        self._parent: Dict[Tuple[int, int], Optional[int]] = dict()
         self._forward_search = forward_search
 
         #  lazy loaded
@@ -44,53 +53,63 @@ class BreadthFirstSearchRoadBlock:
             target_roadblock_id = [target_roadblock_id]
         self._target_roadblock_ids = target_roadblock_id
 
-        start_edge = self._queue[0]
+        graph = self._graph
+        start_idx = graph.get_index(
+            self._start_roadblock_id, [SemanticMapLayer.ROADBLOCK, SemanticMapLayer.ROADBLOCK_CONNECTOR]
+        )
+        assert start_idx is not None, f"BreadthFirstSearchRoadBlock: Roadblock {self._start_roadblock_id} not found!"
+        target_mask = np.zeros(len(graph), dtype=np.bool_)
+        target_mask[graph.get_indices(self._target_roadblock_ids)] = True
 
         # Initial search states
         path_found: bool = False
-        end_edge: RoadBlockGraphEdgeMapObject = start_edge
+        end_idx: int = start_idx
         end_depth: int = 1
-        depth: int = 1
-
-        self._parent[start_edge.id + f"_{depth}"] = None
-
-        while self._queue:
-            current_edge = self._queue.popleft()
 
-            # Early exit condition
-            if self._check_end_condition(depth, max_depth):
-                break
+        self._parent[(start_idx, 1)] = None
 
-            # Depth tracking
-            if current_edge is None:
-                depth += 1
-                self._queue.append(None)
-                if self._queue[0] is None:
-                    break
-                continue
+        # Each level is kept in order of first visit (for the goal condition) and of last visit (for parents),
+        # which matches a queue with repeated visits (i.e. the latest visit of a roadblock sets its children)
+        first_level: List[int] = [start_idx]
+        last_level: List[int] = [start_idx]
 
+        for depth in range(1, max_depth + 1):
             # Goal condition
-            if self._check_goal_condition(current_edge, depth, max_depth):
-                end_edge = current_edge
-                end_depth = depth
+            goal_idcs = [idx for idx in first_level if target_mask[idx]]
+            if goal_idcs:
+                end_idx, end_depth = goal_idcs[0], depth
                 path_found = True
                 break
 
-            neighbors = (
-                current_edge.outgoing_edges
-                if self._forward_search
-                else current_edge.incoming_edges
-            )
+            # Populate next level
+            for current_idx in last_level:
+                for next_idx in graph.get_neighbors(current_idx, self._forward_search).tolist():
+                    self._parent[(next_idx, depth + 1)] = current_idx
+            first_level = self._unique_neighbors(first_level)
+            last_level = self._unique_neighbors(last_level[::-1], reverse=True)[::-1]
 
-            # Populate queue
-            for next_edge in neighbors:
-                # if next_edge.id in self._candidate_lane_edge_ids_old:
-                self._queue.append(next_edge)
-                self._parent[next_edge.id + f"_{depth + 1}"] = current_edge
-                end_edge = next_edge
-                end_depth = depth + 1
+            # Early exit condition
+            if not last_level:
+                break
+            end_idx, end_depth = last_level[-1], depth + 1
 
-        return self._construct_path(end_edge, end_depth), path_found
+        path_idcs = self._construct_path(end_idx, end_depth)
+        path = [graph.get_map_object(node_idx, self._map_api) for node_idx in path_idcs]
+        path_id = [roadblock.id for roadblock in path]
+        return (path, path_id), path_found
+
+    def _unique_neighbors(self, level: List[int], reverse: bool = False) -> List[int]:
+        """
+        Collects neighbors of a level in order of first occurrence.
+        :param level: node indices of current level
+        :param reverse: whether to reverse neighbors of each node, defaults to False
+        :return: node indices of next level
+        """
+        next_level: Dict[int, None] = {}
+        for current_idx in level:
+            neighbors = self._graph.get_neighbors(current_idx, self._forward_search).tolist()
+            next_level.update(dict.fromkeys(neighbors[::-1] if reverse else neighbors))
+        return list(next_level.keys())
 
     def id_to_roadblock(self, id: str) -> RoadBlockGraphEdgeMapObject:
         """
@@ -102,51 +121,20 @@ class BreadthFirstSearchRoadBlock:
         block = block or self._map_api._get_roadblock_connector(id)
         return block
 
-    @staticmethod
-    def _check_end_condition(depth: int, max_depth: int) -> bool:
-        """
-        Check if the search should end regardless if the goal condition is met.
-        :param depth: The current depth to check.
-        :param target_depth: The target depth to check against.
-        :return: whether depth exceeds the target depth.
-        """
-        return depth > max_depth
-
-    def _check_goal_condition(
-        self,
-        current_edge: RoadBlockGraphEdgeMapObject,
-        depth: int,
-        max_depth: int,
-    ) -> bool:
-        """
-        Check if the current edge is at the target roadblock at the given depth.
-        :param current_edge: edge to check.
-        :param depth: current depth to check.
-        :param max_depth: maximum depth the edge should be at.
-        :return: True if the lane edge is contain the in the target roadblock. False, otherwise.
-        """
-        return current_edge.id in self._target_roadblock_ids and depth <= max_depth
-
-    def _construct_path(
-        self, end_edge: RoadBlockGraphEdgeMapObject, depth: int
-    ) -> List[RoadBlockGraphEdgeMapObject]:
+    def _construct_path(self, end_idx: int, depth: int) -> List[int]:
         """
         Constructs a path when goal was found.
-        :param end_edge: The end edge to start back propagating back to the start edge.
+        :param end_idx: The node index of the end edge to start back propagating back to the start edge.
         :param depth: The depth of the target edge.
-        :return: The constructed path as a list of RoadBlockGraphEdgeMapObject
+        :return: The constructed path as a list of node indices
         """
-        path = [end_edge]
-        path_id = [end_edge.id]
+        path = [end_idx]
 
-        while self._parent[end_edge.id + f"_{depth}"] is not None:
-            path.append(self._parent[end_edge.id + f"_{depth}"])
-            path_id.append(path[-1].id)
-            end_edge = self._parent[end_edge.id + f"_{depth}"]
+        while self._parent[(path[-1], depth)] is not None:
+            path.append(self._parent[(path[-1], depth)])
             depth -= 1
 
         if self._forward_search:
             path.reverse()
-            path_id.reverse()
 
-        return (path, path_id)
+        return path
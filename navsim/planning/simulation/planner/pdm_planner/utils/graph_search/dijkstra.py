@@ -1,29 +1,47 @@
-from typing import Dict, List, Optional, Tuple
+import heapq
+from typing import Dict, List, Set, Tuple
 
 import numpy as np
+from nuplan.common.maps.abstract_map import AbstractMap
 from nuplan.common.maps.abstract_map_objects import (
     LaneGraphEdgeMapObject,
     RoadBlockGraphEdgeMapObject,
 )
+from nuplan.common.maps.maps_datatypes import SemanticMapLayer
+
+from navsim.planning.simulation.planner.pdm_planner.utils.graph_search.graph_index import (
+    LaneCSRGraph,
+    get_map_graph_index,
+)
 
 
 class Dijkstra:
     """
     A class that performs dijkstra's shortest path. The class operates on lane level graph search.
     The goal condition is specified to be if the lane can be found at the target roadblock or roadblock connector.
+    The search runs on the integer lane graph of the map (see MapGraphIndex) with a binary heap as frontier.
     """
 
     def __init__(
-        self, start_edge: LaneGraphEdgeMapObject, candidate_lane_edge_ids: List[str]
+        self,
+        start_edge: LaneGraphEdgeMapObject,
+        candidate_lane_edge_ids: List[str],
+        map_api: AbstractMap,
     ):
         """
         Constructor for the Dijkstra class.
         :param start_edge: The starting edge for the search
         :param candidate_lane_edge_ids: The candidates lane ids that can be included in the search.
+        :param map_api: map class in nuPlan, to retrieve the lane graph and map objects of the route
         """
-        self._queue = list([start_edge])
-        self._parent: Dict[str, Optional[LaneGraphEdgeMapObject]] = dict()
-        self._candidate_lane_edge_ids = candidate_lane_edge_ids
+        self._start_edge = start_edge
+        self._map_api = map_api
+        self._graph: LaneCSRGraph = get_map_graph_index(map_api).lane_graph
+
+        self._candidate_mask = np.zeros(len(self._graph), dtype=np.bool_)
+        self._candidate_mask[self._graph.get_indices(candidate_lane_edge_ids)] = True
+
+        self._parent: Dict[int, int] = dict()
 
     def search(
         self, target_roadblock: RoadBlockGraphEdgeMapObject
@@ -37,85 +55,67 @@ class Dijkstra:
               from the start edge to an edge contained in the end roadblock.
               If unsuccessful the shortest deepest path is returned.
         """
-        start_edge = self._queue[0]
+        graph = self._graph
+        start_idx = graph.get_index(
+            self._start_edge.id, [SemanticMapLayer.LANE, SemanticMapLayer.LANE_CONNECTOR]
+        )
+        assert start_idx is not None, f"Dijkstra: Start edge {self._start_edge.id} not in lane graph!"
 
         # Initial search states
         path_found: bool = False
-        end_edge: LaneGraphEdgeMapObject = start_edge
+        end_idx: int = start_idx
 
-        self._parent[start_edge.id] = None
-        self._frontier = [start_edge.id]
-        self._dist = [1]
-        self._depth = [1]
+        self._parent[start_idx] = -1
+        dist: Dict[int, float] = {start_idx: 1}
+        depth: Dict[int, int] = {start_idx: 1}
 
-        self._expanded = []
-        self._expanded_id = []
-        self._expanded_dist = []
-        self._expanded_depth = []
+        # ties are resolved by order of insertion into the frontier, which is kept on decrease-key
+        insertion_order: Dict[int, int] = {start_idx: 0}
+        frontier: List[Tuple[float, int, int]] = [(1, 0, start_idx)]
 
-        while len(self._queue) > 0:
-            dist, idx = min((val, idx) for (idx, val) in enumerate(self._dist))
-            current_edge = self._queue[idx]
-            current_depth = self._depth[idx]
+        expanded: Set[int] = set()
+        expanded_idcs: List[int] = []
 
-            del self._dist[idx], self._queue[idx], self._frontier[idx], self._depth[idx]
+        while frontier:
+            current_dist, _, current_idx = heapq.heappop(frontier)
 
-            if self._check_goal_condition(current_edge, target_roadblock):
-                end_edge = current_edge
+            # skip outdated entries of decreased keys
+            if current_idx in expanded:
+                continue
+
+            if graph.roadblock_ids[current_idx] == target_roadblock.id:
+                end_idx = current_idx
                 path_found = True
                 break
 
-            self._expanded.append(current_edge)
-            self._expanded_id.append(current_edge.id)
-            self._expanded_dist.append(dist)
-            self._expanded_depth.append(current_depth)
+            expanded.add(current_idx)
+            expanded_idcs.append(current_idx)
+            current_depth = depth[current_idx]
 
             # Populate queue
-            for next_edge in current_edge.outgoing_edges:
-                if next_edge.id not in self._candidate_lane_edge_ids:
+            for next_idx in graph.get_neighbors(current_idx).tolist():
+                if not self._candidate_mask[next_idx] or next_idx in expanded:
                     continue
 
-                alt = dist + self._edge_cost(next_edge)
-                if (
-                    next_edge.id not in self._expanded_id
-                    and next_edge.id not in self._frontier
-                ):
-                    self._parent[next_edge.id] = current_edge
-                    self._queue.append(next_edge)
-                    self._frontier.append(next_edge.id)
-                    self._dist.append(alt)
-                    self._depth.append(current_depth + 1)
-                    end_edge = next_edge
-
-                elif next_edge.id in self._frontier:
-                    next_edge_idx = self._frontier.index(next_edge.id)
-                    current_cost = self._dist[next_edge_idx]
-                    if alt < current_cost:
-                        self._parent[next_edge.id] = current_edge
-                        self._dist[next_edge_idx] = alt
-                        self._depth[next_edge_idx] = current_depth + 1
+                alt = current_dist + graph.costs[next_idx]
+                if next_idx not in dist or alt < dist[next_idx]:
+                    if next_idx not in insertion_order:
+                        insertion_order[next_idx] = len(insertion_order)
+                    self._parent[next_idx] = current_idx
+                    dist[next_idx] = alt
+                    depth[next_idx] = current_depth + 1
+                    heapq.heappush(frontier, (alt, insertion_order[next_idx], next_idx))
 
         if not path_found:
-            # filter max depth
-            max_depth = max(self._expanded_depth)
-            idx_max_depth = list(
-                np.where(np.array(self._expanded_depth) == max_depth)[0]
-            )
-            dist_at_max_depth = [self._expanded_dist[i] for i in idx_max_depth]
-
-            dist, _idx = min((val, idx) for (idx, val) in enumerate(dist_at_max_depth))
-            end_edge = self._expanded[idx_max_depth[_idx]]
-
-        return self._construct_path(end_edge), path_found
+            # filter max depth, and select shortest (first expanded) edge
+            max_depth = max(depth[idx] for idx in expanded_idcs)
+            end_idx = min(
+                (dist[idx], order, idx)
+                for order, idx in enumerate(expanded_idcs)
+                if depth[idx] == max_depth
+            )[-1]
 
-    @staticmethod
-    def _edge_cost(lane: LaneGraphEdgeMapObject) -> float:
-        """
-        Edge cost of given lane.
-        :param lane: lane class
-        :return: length of lane
-        """
-        return lane.baseline_path.length
+        return self._construct_path(end_idx), path_found
 
     @staticmethod
     def _check_end_condition(depth: int, target_depth: int) -> bool:
@@ -128,32 +128,16 @@ class Dijkstra:
         """
         return depth > target_depth
 
-    @staticmethod
-    def _check_goal_condition(
-        current_edge: LaneGraphEdgeMapObject,
-        target_roadblock: RoadBlockGraphEdgeMapObject,
-    ) -> bool:
-        """
-        Check if the current edge is at the target roadblock at the given depth.
-        :param current_edge: The edge to check.
-        :param target_roadblock: The target roadblock the edge should be contained in.
-        :return: whether the current edge is in the target roadblock
-        """
-        return current_edge.get_roadblock_id() == target_roadblock.id
-
-    def _construct_path(
-        self, end_edge: LaneGraphEdgeMapObject
-    ) -> List[LaneGraphEdgeMapObject]:
+    def _construct_path(self, end_idx: int) -> List[LaneGraphEdgeMapObject]:
         """
-        :param end_edge: The end edge to start back propagating back to the start edge.
-        :param depth: The depth of the target edge.
+        :param end_idx: The node index of the end edge to start back propagating back to the start edge.
         :return: The constructed path as a list of LaneGraphEdgeMapObject
         """
-        path = [end_edge]
-        while self._parent[end_edge.id] is not None:
-            node = self._parent[end_edge.id]
-            path.append(node)
-            end_edge = node
-        path.reverse()
-
-        return path
+        path_idcs = [end_idx]
+        while self._parent[path_idcs[-1]] >= 0:
+            path_idcs.append(self._parent[path_idcs[-1]])
+        path_idcs.reverse()
+
+        return [self._start_edge] + [
+            self._graph.get_map_object(node_idx, self._map_api) for node_idx in path_idcs[1:]
+        ]
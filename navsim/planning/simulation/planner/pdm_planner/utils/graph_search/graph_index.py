@@ -0,0 +1,271 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import numpy.typing as npt
+from nuplan.common.maps.abstract_map import AbstractMap, MapObject
+from nuplan.common.maps.maps_datatypes import SemanticMapLayer
+
+# per-worker registry of graph indices, keyed by map name
+_GRAPH_INDICES: Dict[str, "MapGraphIndex"] = {}
+
+
+@dataclass
+class CSRGraph:
+    """
+    Directed graph over integer node indices in compressed sparse row (CSR) format.
+    Neighbors of a node are stored in the order of the map-api (e.g. of outgoing_edges).
+    """
+
+    ids: List[str]  # map object id per node
+    layers: List[SemanticMapLayer]  # map layer per node
+    outgoing_indptr: npt.NDArray[np.int64]
+    outgoing_indices: npt.NDArray[np.int64]
+    incoming_indptr: npt.NDArray[np.int64]
+    incoming_indices: npt.NDArray[np.int64]
+
+    def __post_init__(self):
+        # ids are unique per layer only, e.g. a lane and lane connector may share an id
+        self.layer_id_to_idx: Dict[Tuple[SemanticMapLayer, str], int] = {
+            (layer, id_): idx for idx, (layer, id_) in enumerate(zip(self.layers, self.ids))
+        }
+        self.id_to_idcs: Dict[str, List[int]] = {}
+        for idx, id_ in enumerate(self.ids):
+            self.id_to_idcs.setdefault(id_, []).append(idx)
+
+    def __len__(self) -> int:
+        """
+        Number of nodes in the graph
+        :return: int
+        """
+        return len(self.ids)
+
+    def get_index(self, id_: str, layers: List[SemanticMapLayer]) -> Optional[int]:
+        """
+        Converts a map object id to its node index, for the first layer containing the id.
+        :param id_: map object id
+        :param layers: candidate layers of the map object
+        :return: node index, or None if not in the graph
+        """
+        for layer in layers:
+            if (layer, id_) in self.layer_id_to_idx:
+                return self.layer_id_to_idx[(layer, id_)]
+        return None
+
+    def get_indices(self, ids: List[str]) -> npt.NDArray[np.int64]:
+        """
+        Converts map object ids of any layer to node indices, ids not in the graph are ignored.
+        :param ids: map object ids
+        :return: node indices
+        """
+        return np.array(
+            [idx for id_ in ids for idx in self.id_to_idcs.get(id_, [])], dtype=np.int64
+        )
+
+    def get_neighbors(self, node_idx: int, forward: bool = True) -> npt.NDArray[np.int64]:
+        """
+        Retrieves neighbors of a node.
+        :param node_idx: index of node
+        :param forward: whether to retrieve outgoing or incoming neighbors, defaults to True
+        :return: node indices of neighbors
+        """
+        indptr, indices = (
+            (self.outgoing_indptr, self.outgoing_indices)
+            if forward
+            else (self.incoming_indptr, self.incoming_indices)
+        )
+        return indices[indptr[node_idx] : indptr[node_idx + 1]]
+
+    def get_map_object(self, node_idx: int, map_api: AbstractMap) -> MapObject:
+        """
+        Retrieves map object of a node from the map-api.
+        :param node_idx: index of node
+        :param map_api: map class in nuPlan
+        :return: map object (e.g. lane or roadblock)
+        """
+        return map_api.get_map_object(self.ids[node_idx], self.layers[node_idx])
+
+
+@dataclass
+class LaneCSRGraph(CSRGraph):
+    """CSR graph of lanes and lane connectors, incl. edge costs and roadblock id of each node."""
+
+    costs: npt.NDArray[np.float64]  # length of baseline path, i.e. cost of entering the node
+    roadblock_ids: List[str]
+
+
+def _to_ids(column: npt.NDArray) -> List[str]:
+    """
+    Converts an id column of a vector map layer to string ids, as in nuPlan's map objects.
+    :param column: id column, e.g. of integers or strings
+    :return: list of string ids
+    """
+    return [str(id_) for id_ in column.astype(int)]
+
+
+def _build_csr(
+    num_nodes: int, sources: npt.NDArray[np.int64], targets: npt.NDArray[np.int64]
+) -> Tuple[npt.NDArray[np.int64], npt.NDArray[np.int64]]:
+    """
+    Builds CSR adjacency from edge lists, while keeping the order of edges per source node.
+    :param num_nodes: number of nodes
+    :param sources: node index of edge sources
+    :param targets: node index of edge targets
+    :return: index pointer and indices of CSR adjacency
+    """
+    order = np.argsort(sources, kind="stable")
+    indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=num_nodes), out=indptr[1:])
+    return indptr, targets[order].astype(np.int64)
+
+
+def _lookup(id_to_idx: Dict[str, int], ids: List[str]) -> npt.NDArray[np.int64]:
+    """
+    Converts ids to node indices, ids not in the graph are set to -1.
+    :param id_to_idx: dictionary of node index per id
+    :param ids: list of ids
+    :return: node indices
+    """
+    return np.array([id_to_idx.get(id_, -1) for id_ in ids], dtype=np.int64)
+
+
+class MapGraphIndex:
+    """
+    Lane and roadblock graph of a map over integer ids, built once from nuPlan's vector layers.
+    Used for graph searches (e.g. route correction and centerline extraction) without querying map objects.
+    """
+
+    def __init__(self, map_api: AbstractMap):
+        """
+        Constructor of MapGraphIndex
+        :param map_api: nuPlan's map api (e.g. NuPlanMap)
+        """
+        self._lane_graph = self._build_lane_graph(map_api)
+        self._roadblock_graph = self._build_roadblock_graph(map_api)
+
+    @property
+    def lane_graph(self) -> LaneCSRGraph:
+        """
+        Getter for graph of lanes and lane connectors
+        :return: LaneCSRGraph dataclass
+        """
+        return self._lane_graph
+
+    @property
+    def roadblock_graph(self) -> CSRGraph:
+        """
+        Getter for graph of roadblocks and roadblock connectors
+        :return: CSRGraph dataclass
+        """
+        return self._roadblock_graph
+
+    @staticmethod
+    def _build_lane_graph(map_api: AbstractMap) -> LaneCSRGraph:
+        """
+        Builds graph of lanes and lane connectors, as of outgoing_edges and incoming_edges in nuPlan.
+        :param map_api: nuPlan's map api
+        :return: LaneCSRGraph dataclass
+        """
+        lanes_df = map_api._get_vector_map_layer(SemanticMapLayer.LANE)
+        lane_connectors_df = map_api._get_vector_map_layer(SemanticMapLayer.LANE_CONNECTOR)
+        baseline_paths_df = map_api._get_vector_map_layer(SemanticMapLayer.BASELINE_PATHS)
+
+        lane_ids = _to_ids(lanes_df["fid"].to_numpy())
+        connector_ids = _to_ids(lane_connectors_df["fid"].to_numpy())
+        num_lanes, num_connectors = len(lane_ids), len(connector_ids)
+
+        ids = lane_ids + connector_ids
+        lane_id_to_idx = {id_: idx for idx, id_ in enumerate(lane_ids)}
+        connector_id_to_idx = {id_: num_lanes + idx for idx, id_ in enumerate(connector_ids)}
+        connector_idcs = np.arange(num_lanes, num_lanes + num_connectors, dtype=np.int64)
+
+        # lane -> connector (exit_lane_fid) and connector -> lane (entry_lane_fid), see NuPlanLane
+        exit_lane_idcs = _lookup(lane_id_to_idx, _to_ids(lane_connectors_df["exit_lane_fid"].to_numpy()))
+        entry_lane_idcs = _lookup(lane_id_to_idx, _to_ids(lane_connectors_df["entry_lane_fid"].to_numpy()))
+
+        valid_exit, valid_entry = exit_lane_idcs >= 0, entry_lane_idcs >= 0
+        sources = np.concatenate([exit_lane_idcs[valid_exit], connector_idcs[valid_entry]])
+        targets = np.concatenate([connector_idcs[valid_exit], entry_lane_idcs[valid_entry]])
+        outgoing_indptr, outgoing_indices = _build_csr(len(ids), sources, targets)
+        incoming_indptr, incoming_indices = _build_csr(len(ids), targets, sources)
+
+        # cost of each node as length of its baseline path
+        costs = np.full(len(ids), np.nan, dtype=np.float64)
+        lengths = baseline_paths_df["geometry"].length.to_numpy()
+        for column, id_to_idx in [("lane_fid", lane_id_to_idx), ("lane_connector_fid", connector_id_to_idx)]:
+            valid = baseline_paths_df[column].notna().to_numpy()
+            node_idcs = _lookup(id_to_idx, _to_ids(baseline_paths_df[column].to_numpy()[valid]))
+            costs[node_idcs[node_idcs >= 0]] = lengths[valid][node_idcs >= 0]
+
+        layers = [SemanticMapLayer.LANE] * num_lanes + [SemanticMapLayer.LANE_CONNECTOR] * num_connectors
+        for node_idx in np.flatnonzero(np.isnan(costs)):
+            costs[node_idx] = map_api.get_map_object(ids[node_idx], layers[node_idx]).baseline_path.length
+
+        return LaneCSRGraph(
+            ids=ids,
+            layers=layers,
+            outgoing_indptr=outgoing_indptr,
+            outgoing_indices=outgoing_indices,
+            incoming_indptr=incoming_indptr,
+            incoming_indices=incoming_indices,
+            costs=costs,
+            roadblock_ids=_to_ids(lanes_df["lane_group_fid"].to_numpy())
+            + _to_ids(lane_connectors_df["lane_group_connector_fid"].to_numpy()),
+        )
+
+    @staticmethod
+    def _build_roadblock_graph(map_api: AbstractMap) -> CSRGraph:
+        """
+        Builds graph of roadblocks and roadblock connectors, as of outgoing_edges and incoming_edges in nuPlan.
+        :param map_api: nuPlan's map api
+        :return: CSRGraph dataclass
+        """
+        roadblocks_df = map_api._get_vector_map_layer(SemanticMapLayer.ROADBLOCK)
+        roadblock_connectors_df = map_api._get_vector_map_layer(SemanticMapLayer.ROADBLOCK_CONNECTOR)
+
+        roadblock_ids = _to_ids(roadblocks_df["fid"].to_numpy())
+        connector_ids = _to_ids(roadblock_connectors_df["fid"].to_numpy())
+        num_roadblocks, num_connectors = len(roadblock_ids), len(connector_ids)
+
+        ids = roadblock_ids + connector_ids
+        roadblock_id_to_idx = {id_: idx for idx, id_ in enumerate(roadblock_ids)}
+        connector_idcs = np.arange(num_roadblocks, num_roadblocks + num_connectors, dtype=np.int64)
+
+        # roadblock -> connector (from_lane_group_fid) and connector -> roadblock (to_lane_group_fid)
+        from_idcs = _lookup(
+            roadblock_id_to_idx, _to_ids(roadblock_connectors_df["from_lane_group_fid"].to_numpy())
+        )
+        to_idcs = _lookup(roadblock_id_to_idx, _to_ids(roadblock_connectors_df["to_lane_group_fid"].to_numpy()))
+
+        valid_from, valid_to = from_idcs >= 0, to_idcs >= 0
+        outgoing_indptr, outgoing_indices = _build_csr(
+            len(ids),
+            np.concatenate([from_idcs[valid_from], connector_idcs[valid_to]]),
+            np.concatenate([connector_idcs[valid_from], to_idcs[valid_to]]),
+        )
+        incoming_indptr, incoming_indices = _build_csr(
+            len(ids),
+            np.concatenate([to_idcs[valid_to], connector_idcs[valid_from]]),
+            np.concatenate([connector_idcs[valid_to], from_idcs[valid_from]]),
+        )
+
+        return CSRGraph(
+            ids=ids,
+            layers=[SemanticMapLayer.ROADBLOCK] * num_roadblocks
+            + [SemanticMapLayer.ROADBLOCK_CONNECTOR] * num_connectors,
+            outgoing_indptr=outgoing_indptr,
+            outgoing_indices=outgoing_indices,
+            incoming_indptr=incoming_indptr,
+            incoming_indices=incoming_indices,
+        )
+
+
+def get_map_graph_index(map_api: AbstractMap) -> MapGraphIndex:
+    """
+    Retrieves the graph index of a map in the current process, e.g. shared by all scenes of a worker.
+    :param map_api: nuPlan's map api
+    :return: MapGraphIndex object
+    """
+    if map_api.map_name not in _GRAPH_INDICES:
+        _GRAPH_INDICES[map_api.map_name] = MapGraphIndex(map_api)
+    return _GRAPH_INDICES[map_api.map_name]
@@ -99,3 +99,27 @@ def convert_absolute_to_relative_se2_array(
     points_rel[:, 2] = normalize_angle(points_rel[:, 2])
 
     return points_rel
+
+
+def convert_relative_to_absolute_se2_array(
+    origin: StateSE2, state_se2_array: npt.NDArray[np.float64]
+) -> npt.NDArray[np.float64]:
+    """
+    Converts an StateSE2 array from relative to global coordinates.
+    :param origin: origin pose of relative coords system
+    :param state_se2_array: array of SE2 states with (x,y,θ) in last dim
+    :return: SE2 coords array in global coordinates
+    """
+    assert len(SE2Index) == state_se2_array.shape[-1]
+
+    theta = origin.heading
+    origin_array = np.array([origin.x, origin.y, origin.heading], dtype=np.float64)
+
+    R = np.array([[np.cos(theta), -np.sin(theta)], [np.sin(theta), np.cos(theta)]])
+
+    points_abs = np.array(state_se2_array, dtype=np.float64)
+    points_abs[..., :2] = points_abs[..., :2] @ R.T
+    points_abs += origin_array
+    points_abs[..., 2] = normalize_angle(points_abs[..., 2])
+
+    return points_abs
@@ -0,0 +1,153 @@
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+import numpy as np
+import numpy.typing as npt
+import shapely
+from nuplan.common.actor_state.state_representation import Point2D
+from nuplan.common.maps.abstract_map import AbstractMap, MapObject
+from nuplan.common.maps.maps_datatypes import SemanticMapLayer
+from shapely.strtree import STRtree
+
+# per-worker registry of map caches, keyed by map name and tile size
+_MAP_CACHES: Dict[Tuple[str, float], "PDMMapCache"] = {}
+
+
+class PDMMapCache:
+    """
+    Wrapper of nuPlan's map api, which caches spatial queries across scenes (e.g. of a log in metric caching).
+    Object ids are memoized per layer and spatial tile, while map objects (incl. polygons and graph edges)
+    are materialized once by the wrapped map api. Queries return the same objects in the same order.
+    Other attributes are forwarded to the wrapped map api.
+    """
+
+    def __init__(self, map_api: AbstractMap, tile_size: float = 50.0):
+        """
+        Constructor of PDMMapCache
+        :param map_api: nuPlan's map api (e.g. NuPlanMap)
+        :param tile_size: [m] edge length of the square tiles of memoized queries, defaults to 50.0
+        """
+        assert tile_size > 0, "PDMMapCache: Tile size must be positive!"
+
+        self._map_api = map_api
+        self._tile_size = tile_size
+
+        # lazy loaded
+        self._layer_indices: Dict[SemanticMapLayer, Tuple[npt.NDArray[np.object_], List[str], STRtree]] = {}
+        self._tile_positions: Dict[Tuple[SemanticMapLayer, int, int], npt.NDArray[np.int64]] = {}
+
+    def __reduce__(self) -> Tuple[Type["PDMMapCache"], Tuple[Any, ...]]:
+        """Helper for pickling (without memoized queries)."""
+        return self.__class__, (self._map_api, self._tile_size)
+
+    def __getattr__(self, name: str) -> Any:
+        """Forwards attributes to the wrapped map api."""
+        if name.startswith("__") or name == "_map_api":
+            raise AttributeError(name)
+        return getattr(self._map_api, name)
+
+    @property
+    def map_api(self) -> AbstractMap:
+        """
+        Getter for wrapped map api
+        :return: nuPlan's map api
+        """
+        return self._map_api
+
+    def _get_layer_index(
+        self, layer: SemanticMapLayer
+    ) -> Tuple[npt.NDArray[np.object_], List[str], STRtree]:
+        """
+        Builds the spatial index over geometries of a vector map layer (lazy loaded).
+        :param layer: semantic map layer
+        :return: tuple of geometries, object ids, and spatial index (in row order of the layer)
+        """
+        if layer not in self._layer_indices:
+            layer_df = self._map_api._get_vector_map_layer(layer)
+            geometries = np.array(layer_df["geometry"].tolist(), dtype=object)
+            self._layer_indices[layer] = (geometries, layer_df["fid"].tolist(), STRtree(geometries))
+        return self._layer_indices[layer]
+
+    def _get_tile_positions(self, layer: SemanticMapLayer, tile_x: int, tile_y: int) -> npt.NDArray[np.int64]:
+        """
+        Retrieves row positions of geometries intersecting a tile (memoized).
+        :param layer: semantic map layer
+        :param tile_x: tile index along x-axis
+        :param tile_y: tile index along y-axis
+        :return: row positions in the layer
+        """
+        key = (layer, tile_x, tile_y)
+        if key not in self._tile_positions:
+            _, _, tree = self._get_layer_index(layer)
+            tile = shapely.box(
+                tile_x * self._tile_size,
+                tile_y * self._tile_size,
+                (tile_x + 1) * self._tile_size,
+                (tile_y + 1) * self._tile_size,
+            )
+            self._tile_positions[key] = tree.query(tile, predicate="intersects").astype(np.int64)
+        return self._tile_positions[key]
+
+    def get_proximal_map_objects(
+        self, point: Point2D, radius: float, layers: List[SemanticMapLayer]
+    ) -> Dict[SemanticMapLayer, List[MapObject]]:
+        """
+        Retrieves map objects intersecting the square patch around a point, as in NuPlanMap.
+        :param point: center of the patch
+        :param radius: [m] half edge length of the patch
+        :param layers: semantic map layers to query
+        :return: dictionary of map objects per layer
+        """
+        x_min, x_max = point.x - radius, point.x + radius
+        y_min, y_max = point.y - radius, point.y + radius
+        patch = shapely.box(x_min, y_min, x_max, y_max)
+
+        tiles_x = range(int(np.floor(x_min / self._tile_size)), int(np.floor(x_max / self._tile_size)) + 1)
+        tiles_y = range(int(np.floor(y_min / self._tile_size)), int(np.floor(y_max / self._tile_size)) + 1)
+
+        object_map: Dict[SemanticMapLayer, List[MapObject]] = {}
+        for layer in layers:
+            geometries, object_ids, _ = self._get_layer_index(layer)
+
+            # candidates of all covered tiles, refined by the exact patch (row order as in NuPlanMap)
+            positions = np.unique(
+                np.concatenate(
+                    [self._get_tile_positions(layer, tile_x, tile_y) for tile_x in tiles_x for tile_y in tiles_y]
+                )
+            )
+            positions = positions[shapely.intersects(geometries[positions], patch)]
+            object_map[layer] = [self._map_api.get_map_object(object_ids[idx], layer) for idx in positions]
+
+        return object_map
+
+    def get_distance_to_nearest_map_object(
+        self, point: Point2D, layer: SemanticMapLayer
+    ) -> Tuple[Optional[str], Optional[float]]:
+        """
+        Retrieves the id of and distance to the nearest map object of a layer, vectorized over geometries.
+        :param point: query point
+        :param layer: semantic map layer
+        :return: tuple of object id and distance
+        """
+        geometries, object_ids, _ = self._get_layer_index(layer)
+        if len(geometries) == 0:
+            return None, None
+
+        distances = shapely.distance(geometries, shapely.Point(point.x, point.y))
+        nearest_idx = int(np.argmin(distances))
+        return object_ids[nearest_idx], float(distances[nearest_idx])
+
+
+def get_map_cache(map_api: AbstractMap, tile_size: float = 50.0) -> PDMMapCache:
+    """
+    Retrieves the map cache of a map in the current process, e.g. shared by all scenes of a worker.
+    :param map_api: nuPlan's map api
+    :param tile_size: [m] edge length of the square tiles of memoized queries, defaults to 50.0
+    :return: PDMMapCache object
+    """
+    if isinstance(map_api, PDMMapCache):
+        return map_api
+
+    key = (map_api.map_name, tile_size)
+    if key not in _MAP_CACHES:
+        _MAP_CACHES[key] = PDMMapCache(map_api, tile_size)
+    return _MAP_CACHES[key]
@@ -45,6 +45,19 @@ class PDMPath:
         self._linestring = linestrings(self._states_se2_array[:, : SE2Index.HEADING])
         self._interpolator = interp1d(self._progress, self._states_se2_array, axis=0)
 
+        # segments for vectorized projection, relative to first point for numerical precision
+        self._origin = self._states_se2_array[0, : SE2Index.HEADING]
+        points = self._states_se2_array[:, : SE2Index.HEADING] - self._origin
+        self._segment_starts = points[:-1]
+        self._segment_vectors = points[1:] - points[:-1]
+        segment_lengths_squared = (self._segment_vectors**2).sum(axis=-1)
+        self._inverse_segment_lengths_squared = np.divide(
+            1.0,
+            segment_lengths_squared,
+            out=np.zeros_like(segment_lengths_squared),
+            where=segment_lengths_squared > 0.0,
+        )
+
     def __reduce__(self) -> Tuple[Type[PDMPath], Tuple[Any, ...]]:
         """Helper for pickling."""
         return self.__class__, (self._discrete_path, )
@@ -72,6 +85,51 @@ class PDMPath:
         )
         return self._linestring.project(points)
 
+    def project_array(
+        self, points: npt.NDArray[np.float64], max_chunk_size: int = 2**18
+    ) -> npt.NDArray[np.float64]:
+        """
+        Calculates distances along the path of the nearest path points, similar to shapely's project.
+        Uses a segment-wise nearest point lookup and the cumulative arc length of the discrete path.
+        :param points: array of (x,y) coordinates, shape (...,2)
+        :param max_chunk_size: maximum number of point-segment pairs processed at once
+        :return: array of distances along the path [m], shape (...)
+        """
+        points = np.asarray(points, dtype=np.float64)
+        flat_points = points.reshape(-1, 2) - self._origin
+        num_segments = len(self._segment_vectors)
+
+        if num_segments == 0:
+            return np.zeros(points.shape[:-1], dtype=np.float64)
+
+        segment_x, segment_y = self._segment_starts[:, 0], self._segment_starts[:, 1]
+        vector_x, vector_y = self._segment_vectors[:, 0], self._segment_vectors[:, 1]
+
+        distances = np.zeros(len(flat_points), dtype=np.float64)
+        chunk_size = max(max_chunk_size // num_segments, 1)
+        for start_idx in range(0, len(flat_points), chunk_size):
+            chunk_points = flat_points[start_idx : start_idx + chunk_size]
+
+            # relative position of nearest point on each segment, shape (N, S)
+            offsets_x = chunk_points[:, 0, None] - segment_x
+            offsets_y = chunk_points[:, 1, None] - segment_y
+            fractions = offsets_x * vector_x + offsets_y * vector_y
+            fractions *= self._inverse_segment_lengths_squared
+            np.clip(fractions, 0.0, 1.0, out=fractions)
+
+            # select nearest segment, first segment on ties
+            offsets_x -= fractions * vector_x
+            offsets_y -= fractions * vector_y
+            squared_distances = offsets_x * offsets_x + offsets_y * offsets_y
+            segment_idcs = np.argmin(squared_distances, axis=-1)
+            chunk_fractions = fractions[np.arange(len(chunk_points)), segment_idcs]
+
+            distances[start_idx : start_idx + chunk_size] = self._progress[
+                segment_idcs
+            ] + chunk_fractions * (self._progress[segment_idcs + 1] - self._progress[segment_idcs])
+
+        return distances.reshape(points.shape[:-1])
+
     def interpolate(
         self,
         distances: Union[List[float], npt.NDArray[np.float64]],
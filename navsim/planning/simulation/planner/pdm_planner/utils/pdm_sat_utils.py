@@ -0,0 +1,146 @@
+from typing import Tuple
+
+import numpy as np
+import numpy.typing as npt
+
+# indices of the next corner of both quadrilaterals, stacked along the corner-dim
+NEXT_CORNER_IDCS = [1, 2, 3, 0, 5, 6, 7, 4]
+
+
+def get_local_coordinates(
+    quads_a: npt.NDArray[np.float64], quads_b: npt.NDArray[np.float64]
+) -> Tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+    """
+    Shifts pairs of quadrilaterals into the local frame of the first quad, for numerical precision
+    (e.g. UTM coordinates). Coordinates are returned corner-first, i.e. reductions over corners are
+    vectorized along the pairs.
+    :param quads_a: corner coordinates in consecutive order, shape (N, 4, 2)
+    :param quads_b: corner coordinates in consecutive order, shape (N, 4, 2)
+    :return: local coordinates of both quadrilaterals, shape (2, 4, N)
+    """
+    assert quads_a.shape == quads_b.shape, "Quadrilateral arrays must have equal shape!"
+    assert quads_a.shape[-2:] == (4, 2), "Quadrilateral arrays must have shape (...,4,2)!"
+
+    origins = quads_a[:, :1, :]
+    coords_a = np.ascontiguousarray((quads_a - origins).transpose(2, 1, 0))
+    coords_b = np.ascontiguousarray((quads_b - origins).transpose(2, 1, 0))
+    return coords_a, coords_b
+
+
+def get_projection_gaps(
+    coords_a: npt.NDArray[np.float64],
+    coords_b: npt.NDArray[np.float64],
+    normalize: bool = False,
+) -> npt.NDArray[np.float64]:
+    """
+    Calculates gaps between the projections of quadrilaterals onto the normals of all their edges.
+    :param coords_a: corner-first coordinates, shape (2, 4, N), see get_local_coordinates
+    :param coords_b: corner-first coordinates, shape (2, 4, N), see get_local_coordinates
+    :param normalize: whether to normalize the normals, i.e. gaps in meter, defaults to False
+    :return: gaps along each normal (positive if separated, -inf for degenerate edges if normalized), shape (8, N)
+    """
+    coords = np.concatenate([coords_a, coords_b], axis=1)
+    edges = coords[:, NEXT_CORNER_IDCS] - coords
+    normals_x, normals_y = -edges[1], edges[0]  # (8, N)
+
+    if normalize:
+        lengths = np.hypot(normals_x, normals_y)
+        degenerate_mask = lengths == 0.0  # e.g. edges of segments
+        lengths[degenerate_mask] = np.inf
+        normals_x, normals_y = normals_x / lengths, normals_y / lengths
+
+    normals_x, normals_y = normals_x[:, None], normals_y[:, None]
+    projections_a = normals_x * coords_a[0] + normals_y * coords_a[1]  # (8, 4, N)
+    projections_b = normals_x * coords_b[0] + normals_y * coords_b[1]  # (8, 4, N)
+
+    gaps = np.maximum(
+        projections_b.min(axis=1) - projections_a.max(axis=1),
+        projections_a.min(axis=1) - projections_b.max(axis=1),
+    )
+    if normalize:
+        gaps[degenerate_mask] = -np.inf
+    return gaps
+
+
+def convex_quads_intersect(
+    quads_a: npt.NDArray[np.float64], quads_b: npt.NDArray[np.float64]
+) -> npt.NDArray[np.bool_]:
+    """
+    Checks pairwise intersection of convex quadrilaterals with the separating axis theorem.
+    Touching quadrilaterals are considered intersecting. Segments can be passed as degenerate
+    quadrilaterals, i.e. [start, end, end, start].
+    :param quads_a: corner coordinates in consecutive order, shape (N, 4, 2)
+    :param quads_b: corner coordinates in consecutive order, shape (N, 4, 2)
+    :return: boolean array, shape (N,)
+    """
+    coords_a, coords_b = get_local_coordinates(quads_a, quads_b)
+    return ~(get_projection_gaps(coords_a, coords_b) > 0.0).any(axis=0)
+
+
+def segments_to_quads(segments: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
+    """
+    Converts segments to degenerate quadrilaterals for separating axis tests.
+    :param segments: start and end points, shape (..., 2, 2)
+    :return: quadrilaterals, shape (..., 4, 2)
+    """
+    return segments[..., [0, 1, 1, 0], :]
+
+
+def are_convex_quads(quads: npt.NDArray[np.float64]) -> npt.NDArray[np.bool_]:
+    """
+    Checks whether quadrilaterals are convex (consistent turning direction of all corners).
+    :param quads: corner coordinates in consecutive order, shape (..., 4, 2)
+    :return: boolean array, shape (...)
+    """
+    edges = np.roll(quads, -1, axis=-2) - quads
+    next_edges = np.roll(edges, -1, axis=-2)
+    cross = edges[..., 0] * next_edges[..., 1] - edges[..., 1] * next_edges[..., 0]
+    return np.logical_and(
+        np.all(np.isfinite(cross), axis=-1),
+        np.logical_or(np.all(cross >= 0, axis=-1), np.all(cross <= 0, axis=-1)),
+    )
+
+
+def get_corners_to_edges_distances(
+    coords_a: npt.NDArray[np.float64], coords_b: npt.NDArray[np.float64]
+) -> npt.NDArray[np.float64]:
+    """
+    Calculates the minimal distance of the corners of quadrilaterals to the edges of others.
+    :param coords_a: corner-first coordinates of corners, shape (2, 4, N), see get_local_coordinates
+    :param coords_b: corner-first coordinates of edges, shape (2, 4, N), see get_local_coordinates
+    :return: minimal distance of any corner to any edge, shape (N,)
+    """
+    edges_x = (coords_b[0, NEXT_CORNER_IDCS[:4]] - coords_b[0])[None]
+    edges_y = (coords_b[1, NEXT_CORNER_IDCS[:4]] - coords_b[1])[None]
+    offsets_x = coords_a[0][:, None] - coords_b[0][None]  # (4, 4, N)
+    offsets_y = coords_a[1][:, None] - coords_b[1][None]  # (4, 4, N)
+
+    # relative position of nearest point on each edge, zero for degenerate edges
+    squared_lengths = np.maximum(edges_x * edges_x + edges_y * edges_y, np.finfo(np.float64).tiny)
+    fractions = (offsets_x * edges_x + offsets_y * edges_y) / squared_lengths
+    np.clip(fractions, 0.0, 1.0, out=fractions)
+
+    offsets_x -= fractions * edges_x
+    offsets_y -= fractions * edges_y
+    squared_distances = offsets_x * offsets_x + offsets_y * offsets_y
+    return np.sqrt(squared_distances.reshape(16, -1).min(axis=0))
+
+
+def convex_quads_distances(
+    quads_a: npt.NDArray[np.float64], quads_b: npt.NDArray[np.float64]
+) -> npt.NDArray[np.float64]:
+    """
+    Calculates pairwise distances of convex quadrilaterals. Intersecting quadrilaterals (see
+    convex_quads_intersect) have zero distance, otherwise the minimal corner-to-edge distance is returned.
+    :param quads_a: corner coordinates in consecutive order, shape (N, 4, 2)
+    :param quads_b: corner coordinates in consecutive order, shape (N, 4, 2)
+    :return: distance array, shape (N,)
+    """
+    coords_a, coords_b = get_local_coordinates(quads_a, quads_b)
+
+    distances = np.minimum(
+        get_corners_to_edges_distances(coords_a, coords_b),
+        get_corners_to_edges_distances(coords_b, coords_a),
+    )
+    distances[~(get_projection_gaps(coords_a, coords_b) > 0.0).any(axis=0)] = 0.0
+    return distances
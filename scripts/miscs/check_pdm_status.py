@@ -3,7 +3,9 @@ import os
 from pathlib import Path
 import sys
 import numpy as np
-from typing import Optional
+
+from navsim.evaluate.pdm_result_store import PDMResultStore
+from navsim.planning.metric_caching.metric_cache import load_metric_cache_paths
 
 PRINT_SAMPLES = 10
 
@@ -47,16 +49,6 @@ def summarize_tokens(name: str, tokens: set[str]):
         print(f"{name} samples (up to {PRINT_SAMPLES}): {sample}")
 
 
-def extract_token_from_cache_path(line: str) -> Optional[str]:
-    # Expect .../<log_name>/<scenario_type>/<token>/metric_cache.pkl[.xz]
-    parts = Path(line.strip()).parts
-    if len(parts) < 2:
-        return None
-    # filename is last; token is parent dir name
-    token = Path(line.strip()).parent.name
-    return token if token else None
-
-
 def main():
     print_header("Environment")
     openscene_root = env_path("OPENSCENE_DATA_ROOT")
@@ -75,11 +67,18 @@ def main():
     else:
         print("! Anchors file not found")
 
-    print_header("Formatted PDM scores (formatted_pdm_score_256.npy)")
+    print_header("Formatted PDM scores (formatted_pdm_score_256)")
+    store_path = openscene_root / "extra_data/planning_vb/formatted_pdm_score_256"
     formatted_path = openscene_root / "extra_data/planning_vb/formatted_pdm_score_256.npy"
+    print(f"store_path = {store_path}")
     print(f"formatted_path = {formatted_path}")
     formatted_tokens: set[str] = set()
-    if formatted_path.exists():
+    if PDMResultStore.exists(store_path):
+        store = PDMResultStore(store_path)
+        print(f"result store: num_anchors = {store.num_anchors}; metrics = {store.metric_names}")
+        formatted_tokens = set(store.tokens)
+        summarize_tokens("formatted_tokens", formatted_tokens)
+    elif formatted_path.exists():
         formatted = safe_load_npy_dict(formatted_path)
         if isinstance(formatted, dict):
             formatted_tokens = set(k for k in formatted.keys() if isinstance(k, str))
@@ -87,7 +86,7 @@ def main():
         else:
             print("! formatted file exists but could not parse as dict")
     else:
-        print("! formatted file not found")
+        print("! result store and formatted file not found")
 
     print_header("Metric cache metadata")
     cache_root = exp_root / "metric_cache"
@@ -100,19 +99,13 @@ def main():
         csvs = sorted([p for p in metadata_dir.iterdir() if p.suffix == ".csv" or ".csv" in p.name])
         print(f"metadata csv files = {[str(p.name) for p in csvs]}")
         if csvs:
-            # per loader code, it reads the first csv and skips header
+            # per loader code, it reads the first csv (successful scenes only)
             csv_path = csvs[0]
             try:
                 lines = csv_path.read_text(encoding="utf-8", errors="ignore").splitlines()
                 print(f"{csv_path.name}: total lines = {len(lines)}")
-                payload = lines[1:] if len(lines) > 1 else []
-                # Try to parse token from each path line
-                for ln in payload[:50000]:  # cap to avoid huge memory if extremely large
-                    if not ln:
-                        continue
-                    tok = extract_token_from_cache_path(ln)
-                    if tok:
-                        cache_tokens.add(tok)
+                cache_tokens = set(load_metric_cache_paths(csv_path).keys())
+                print(f"failed scenes = {max(len(lines) - 1 - len(cache_tokens), 0)}")
                 summarize_tokens("cache_tokens (unique)", cache_tokens)
             except Exception as e:
                 print(f"! Failed to read metadata csv: {e}")
@@ -12,8 +12,6 @@ from typing import Any, Dict, List, Union, Tuple
 from dataclasses import asdict
 from datetime import datetime
 import logging
-import lzma
-import pickle
 import os
 import uuid
 
@@ -23,7 +21,9 @@ from nuplan.planning.utils.multithreading.worker_utils import worker_map
 from navsim.planning.script.builders.worker_pool_builder import build_worker
 from navsim.common.dataloader import MetricCacheLoader
 from navsim.agents.abstract_agent import AbstractAgent
-from navsim.evaluate.pdm_score import pdm_score, pdm_score_multi_trajs
+from navsim.evaluate.pdm_score import pdm_score, pdm_score_batch, pdm_score_multi_trajs
+from navsim.evaluate.pdm_score_cache import PDMScoreCache, PDMSimulationCache
+from navsim.evaluate.pdm_result_store import PDMResultStore, PDM_RESULT_NAMES
 from navsim.planning.simulation.planner.pdm_planner.simulation.pdm_simulator import (
     PDMSimulator
 )
@@ -61,26 +61,15 @@ def main(cfg: DictConfig) -> None:
     metric_cache_loader = MetricCacheLoader(Path(cfg.metric_cache_path))
 
     # Determine already-formatted tokens (to support resume)
-    formatted_path = os.path.join(
-        os.environ.get('OPENSCENE_DATA_ROOT', ''), f'extra_data/planning_vb/formatted_pdm_score_{num_clusters}.npy'
-    )
+    formatted_path = get_formatted_path(num_clusters)
+    migrate_legacy_scores(formatted_path)
     done_tokens: set[str] = set()
-    if os.path.exists(formatted_path):
-        try:
-            existing = np.load(formatted_path, allow_pickle=True)
-            # try to coerce to dict
-            if isinstance(existing, np.ndarray) and existing.dtype == object:
-                try:
-                    existing = existing.item()
-                except Exception:
-                    existing = {}
-            if isinstance(existing, dict):
-                done_tokens = set(k for k in existing.keys() if isinstance(k, str))
-                logger.info("Found existing formatted file with %d tokens; will skip them.", len(done_tokens))
-            else:
-                logger.warning("Existing formatted file found but could not parse as dict; proceeding without resume.")
-        except Exception as e:
-            logger.warning("Failed to read existing formatted file: %s; proceeding without resume.", e)
+    if cfg.get("score_cache_path") is not None:
+        # the score cache resumes on trajectory-level, e.g. after changes of the anchors or weights
+        logger.info("Using score cache at %s; re-aggregating all tokens.", cfg.score_cache_path)
+    elif PDMResultStore.exists(formatted_path):
+        done_tokens = set(PDMResultStore(formatted_path).tokens)
+        logger.info("Found existing result store with %d tokens; will skip them.", len(done_tokens))
 
     # Compute candidate tokens and remaining to evaluate
     all_candidates = set(scene_loader.tokens) & set(metric_cache_loader.tokens)
@@ -138,46 +127,43 @@ def format_and_save_ego_states(score_rows, num_clusters, output_dir):
     np.save(save_path, score_dict, allow_pickle=True)
 
 
+def get_formatted_path(num_clusters: int) -> str:
+    """Path of the columnar result store, see PDMResultStore."""
+    return os.path.join(
+        os.environ.get('OPENSCENE_DATA_ROOT', ''), f'extra_data/planning_vb/formatted_pdm_score_{num_clusters}'
+    )
+
+
+def migrate_legacy_scores(formatted_path: str) -> None:
+    """Converts results of the legacy pickled format ({token: {...}} saved as .npy) into the result store."""
+    legacy_path = f"{formatted_path}.npy"
+    if PDMResultStore.exists(formatted_path) or not os.path.exists(legacy_path):
+        return
+    try:
+        existing = np.load(legacy_path, allow_pickle=True).item()
+        PDMResultStore.from_score_dict(formatted_path, existing)
+        logger.info("Converted %d tokens of %s into result store %s", len(existing), legacy_path, formatted_path)
+    except Exception as e:
+        logger.warning("Failed to convert legacy formatted file (%s); proceeding without it.", e)
+
+
 def format_and_save_scores(score_rows, num_clusters, output_dir):
     """
-    Formats the score rows into a dictionary, merges with existing file if present,
-    saves them, and outputs a summary DataFrame.
+    Appends the scores of all anchors per token to the columnar result store
+    and outputs a summary DataFrame.
     """
-    # Build new results dict
-    new_dict: Dict[str, Any] = {}
-    for row in tqdm(score_rows):
-        key = row['token']
-        value = {k: v for k, v in row.items() if k != 'token'}
-        new_dict[key] = value
-
-    save_path = os.path.join(os.environ.get('OPENSCENE_DATA_ROOT', ''), f'extra_data/planning_vb/formatted_pdm_score_{num_clusters}.npy')
-
-    # Merge with existing if any (resume-friendly)
-    merged: Dict[str, Any] = {}
-    existing_count = 0
-    if os.path.exists(save_path):
-        try:
-            existing = np.load(save_path, allow_pickle=True)
-            if isinstance(existing, np.ndarray) and existing.dtype == object:
-                try:
-                    existing = existing.item()
-                except Exception:
-                    existing = {}
-            if isinstance(existing, dict):
-                merged.update(existing)
-                existing_count = len(existing)
-            else:
-                logger.warning("Existing formatted file present but not a dict; overwriting with new results only.")
-        except Exception as e:
-            logger.warning("Failed loading existing formatted file (%s); overwriting with new results only.", e)
-
-    # Update with new results (new overwrites same-token entries if any)
-    merged.update(new_dict)
-
-    # Save merged results
-    np.save(save_path, merged, allow_pickle=True)
-    logger.info("Saved formatted scores to %s (existing=%d, added=%d, total=%d)",
-                save_path, existing_count, len(new_dict), len(merged))
+    # Build dense (num_tokens, num_anchors, num_metrics) array of new results
+    tokens: List[str] = [row['token'] for row in score_rows]
+    save_path = get_formatted_path(num_clusters)
+    if tokens:
+        scores = np.stack([
+            np.stack([row['trajectory_scores'][0][name] for name in PDM_RESULT_NAMES], axis=-1)
+            for row in tqdm(score_rows)
+        ])
+        # new segments overwrite same-token entries if any (resume-friendly), unchanged tokens are skipped
+        PDMResultStore.append(save_path, tokens, scores)
+        PDMResultStore.compact(save_path)
+    logger.info("Saved formatted scores to %s (added=%d)", save_path, len(tokens))
 
     # Build summary DataFrame from new rows only
     pdm_score_df = pd.DataFrame(score_rows)
@@ -238,13 +224,37 @@ def run_pdm_score(args: List[Dict[str, Union[List[str], DictConfig]]]) -> List[D
     )
     predefined_trajectories = load_predefined_trajectories()
 
+    score_cache = None
+    if cfg.get("score_cache_path") is not None:
+        score_cache = PDMScoreCache.from_scorer(
+            Path(cfg.score_cache_path), simulator, scorer, proposal_sampling
+        )
+
+    simulation_cache = None
+    if cfg.get("simulation_cache_path") is not None:
+        simulation_cache = PDMSimulationCache.from_simulator(
+            Path(cfg.simulation_cache_path), simulator, proposal_sampling
+        )
+
     tokens_to_evaluate = list(set(scene_loader.tokens) & set(metric_cache_loader.tokens))
+
+    # stack several scenes into one simulation and scoring pass, caches operate per scene
+    scenes_per_batch = cfg.get("scenes_per_batch", 1)
+    if scenes_per_batch > 1 and score_cache is None and simulation_cache is None and not compute_state_only:
+        return run_pdm_score_batched(
+            tokens_to_evaluate,
+            metric_cache_loader,
+            predefined_trajectories,
+            proposal_sampling,
+            simulator,
+            scorer,
+            scenes_per_batch,
+        )
+
     pdm_results: List[Dict[str, Any]] = []
     for idx, (token) in tqdm(enumerate(tokens_to_evaluate)):
         score_row: Dict[str, Any] = {"token": token, "valid": True}
-        metric_cache_path = metric_cache_loader.metric_cache_paths[token]
-        with lzma.open(metric_cache_path, "rb") as f:
-            metric_cache: MetricCache = pickle.load(f)
+        metric_cache: MetricCache = metric_cache_loader.get_from_token(token)
 
         trajectory_scores = []
 
@@ -254,6 +264,9 @@ def run_pdm_score(args: List[Dict[str, Union[List[str], DictConfig]]]) -> List[D
             future_sampling=proposal_sampling,
             simulator=simulator,
             scorer=scorer,
+            score_cache=score_cache,
+            token=token,
+            simulation_cache=simulation_cache,
         )
         if compute_state_only:
             trajectory_scores.append(pdm_result)
@@ -267,6 +280,41 @@ def run_pdm_score(args: List[Dict[str, Union[List[str], DictConfig]]]) -> List[D
     return pdm_results
 
 
+def run_pdm_score_batched(
+    tokens: List[str],
+    metric_cache_loader: MetricCacheLoader,
+    predefined_trajectories: np.ndarray,
+    proposal_sampling: TrajectorySampling,
+    simulator: PDMSimulator,
+    scorer: PDMScorer,
+    scenes_per_batch: int,
+) -> List[Dict[str, Any]]:
+    """
+    Scores all anchors of several tokens per stacked simulation and scoring pass, see pdm_score_batch.
+    Results match pdm_score_multi_trajs, since scenes with heterogeneous ego states are simulated per row.
+    """
+    model_trajectories = [Trajectory(traj) for traj in predefined_trajectories]
+
+    pdm_results: List[Dict[str, Any]] = []
+    for start_idx in tqdm(range(0, len(tokens), scenes_per_batch)):
+        batch_tokens = tokens[start_idx : start_idx + scenes_per_batch]
+        metric_caches: List[MetricCache] = [
+            metric_cache_loader.get_from_token(token) for token in batch_tokens
+        ]
+
+        batch_results = pdm_score_batch(
+            metric_caches,
+            [model_trajectories] * len(metric_caches),
+            proposal_sampling,
+            simulator,
+            scorer,
+            include_pdm_reference=False,
+        )
+        for token, pdm_result in zip(batch_tokens, batch_results):
+            pdm_results.append({"token": token, "valid": True, "trajectory_scores": [asdict(pdm_result)]})
+    return pdm_results
+
+
 def load_predefined_trajectories() -> List[Any]:
     """
     Load 256 pre-defined trajectories from the given path.
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Converts a metric cache between one lzma pickle per token and one shard per log (see MetricCacheShardWriter).
+
+Usage:
+    python scripts/miscs/pack_metric_cache.py pack --cache_path $NAVSIM_EXP_ROOT/metric_cache [--codec zstd]
+    python scripts/miscs/pack_metric_cache.py unpack --cache_path $NAVSIM_EXP_ROOT/metric_cache
+"""
+import argparse
+import csv
+import lzma
+from collections import defaultdict
+from dataclasses import asdict, fields
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from tqdm import tqdm
+
+from navsim.planning.metric_caching.metric_cache import MetricCacheMetadataEntry, load_metric_cache_paths
+from navsim.planning.metric_caching.metric_cache_shard import (
+    SHARD_DIR_NAME,
+    SHARD_FILE_SUFFIX,
+    MetricCacheShardReader,
+    MetricCacheShardWriter,
+)
+
+
+def get_metadata_file(cache_path: Path) -> Path:
+    """
+    Finds the metadata csv of a metric cache, as in MetricCacheLoader.
+    :param cache_path: root of the metric cache
+    :return: path to metadata csv
+    """
+    metadata_dir = cache_path / "metadata"
+    return [file for file in metadata_dir.iterdir() if ".csv" in str(file)][0]
+
+
+def pack(cache_path: Path, shard_dir: Path, codec: Optional[str]) -> None:
+    """
+    Packs cache files of successful scenes into one shard per log.
+    :param cache_path: root of the metric cache, incl. metadata csv
+    :param shard_dir: output directory of shards
+    :param codec: compression of records, defaults to fastest available
+    """
+    metric_cache_paths = load_metric_cache_paths(get_metadata_file(cache_path))
+
+    # cache files are stored at log/scenario_type/token/metric_cache.pkl
+    tokens_per_log: Dict[str, List[Tuple[str, Path]]] = defaultdict(list)
+    for token, file_name in metric_cache_paths.items():
+        file_path = Path(file_name)
+        tokens_per_log[file_path.parents[2].name].append((token, file_path))
+
+    for log_name, token_paths in tqdm(tokens_per_log.items(), desc="Packing logs"):
+        with MetricCacheShardWriter(shard_dir / f"{log_name}{SHARD_FILE_SUFFIX}", codec) as writer:
+            for token, file_path in token_paths:
+                with lzma.open(file_path, "rb") as f:
+                    pickle_object = f.read()
+                relative_path = file_path.relative_to(file_path.parents[3]).as_posix()
+                writer.add_pickle(token, pickle_object, relative_path)
+
+    print(f"Packed {len(metric_cache_paths)} scenes of {len(tokens_per_log)} logs into {shard_dir}")
+
+
+def unpack(shard_dir: Path, cache_path: Path) -> None:
+    """
+    Unpacks shards into one lzma pickle per token, incl. metadata csv of the unpacked scenes.
+    :param shard_dir: directory of shards
+    :param cache_path: root of the unpacked metric cache
+    """
+    metadata_entries: List[MetricCacheMetadataEntry] = []
+    for shard_path in tqdm(sorted(shard_dir.glob(f"*{SHARD_FILE_SUFFIX}")), desc="Unpacking logs"):
+        shard_reader = MetricCacheShardReader(shard_path)
+        for token, relative_path in shard_reader.file_names.items():
+            file_path = cache_path / (relative_path or f"{shard_path.stem}/unknown/{token}/metric_cache.pkl")
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(file_path, "wb") as f:
+                f.write(lzma.compress(shard_reader.get_pickle(token), preset=0))
+            metadata_entries.append(MetricCacheMetadataEntry(file_path, token))
+
+    metadata_dir = cache_path / "metadata"
+    metadata_dir.mkdir(parents=True, exist_ok=True)
+    with open(metadata_dir / "unpacked_metadata.csv", "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=[field.name for field in fields(MetricCacheMetadataEntry)])
+        writer.writeheader()
+        for metadata_entry in metadata_entries:
+            writer.writerow(asdict(metadata_entry))
+
+    print(f"Unpacked {len(metadata_entries)} scenes into {cache_path}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("mode", choices=["pack", "unpack"])
+    parser.add_argument("--cache_path", type=Path, required=True, help="root of the (unpacked) metric cache")
+    parser.add_argument(
+        "--shard_dir", type=Path, default=None, help=f"directory of shards, defaults to <cache_path>/{SHARD_DIR_NAME}"
+    )
+    parser.add_argument("--codec", choices=["zstd", "lz4", "lzma"], default=None, help="compression of records")
+    args = parser.parse_args()
+
+    shard_dir = args.shard_dir or args.cache_path / SHARD_DIR_NAME
+    if args.mode == "pack":
+        pack(args.cache_path, shard_dir, args.codec)
+    else:
+        unpack(shard_dir, args.cache_path)
+
+
+if __name__ == "__main__":
+    main()